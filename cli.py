@@ -1,8 +1,9 @@
 import sys
 import os
 import json
-import pickle
 import hashlib
+import ast
+import importlib.util
 
 #CONTEXT_SETTINGS = dict(auto_envvar_prefix='COMPLEX')
 
@@ -10,12 +11,42 @@ import hashlib
 if os.path.exists("./vendor/lib/python3.7/site-packages"):
     sys.path.append("./vendor/lib/python3.7/site-packages")
 
+# commands import `from cli import pass_context`, alias this module so they share the same Context class when executed.
+sys.modules.setdefault('cli', sys.modules[__name__])
+
 import click
 import uuid
-from datetime import datetime
-import boto3
-import botocore
-from pathlib import Path
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from core.cache import MISSING, CACHE_BACKENDS, get_cache_backend
+from core.identity import IdentityCache
+from core.regions import RegionMap
+from core.deadline import Deadline, DeadlineExceeded
+from core.pool import ClientPool, RETRY_MODES, create_session
+from core.throttle import RateLimiter
+from core.aio import AsyncEngine, ENGINES
+from core.memory import MemoryCache
+from core.logs import Logger, LOG_FORMATS
+from core.metrics import MetricsRecorder, METRICS_FORMATS
+from core.serialize import FORMATS
+from core.projection import compile_projection, project
+from core.compact import compact as compact_results
+from core.shards import get_shard_configs, merge_shards
+from core.inventory import InventoryStore
+from core.events import get_listing_id, patch_cache
+
+# ClientError codes returned by regions that exist but are not enabled for the account.
+REGION_NOT_ENABLED_ERRORS = ['AuthFailure', 'InvalidClientTokenId', 'UnrecognizedClientException', 'OptInRequired']
+
+# --offline serves cached entries whatever their age.
+OFFLINE_CACHE_TTL = 9999999999
+
+class OfflineError(click.ClickException):
+    """Raised in --offline mode for anything that would need AWS: a call that is not cached or an aws client."""
+
 
 class Context(object):
     obj = {}
@@ -25,119 +56,294 @@ class Context(object):
         self.debug      = False
         self.home       = os.getcwd()
         self.uuid        = '{}'.format(uuid.uuid4())
-
-    def log(self, msg, *args):
-
-        """Logs a message to stderr."""
-        if args:
-            msg %= args
-        click.echo('[{}]::[{}]::{}'.format(self.uuid, datetime.utcnow().strftime('%Y/%m/%d %H:%M:%S UTC'), msg), file=sys.stderr)
-
-    def vlog(self, msg, *args):
-        """Logs a message to stderr only if verbose is enabled."""
+        self.logger             = Logger(self.uuid)
+        self.data_dir           = 'data'
+        self.cache_backend_name = 'sqlite'
+        self.cache_format       = 'typed'
+        self.cache_backend      = None
+        self.cache_max_bytes    = 0
+        self.cache_max_entries  = 0
+        self.identity_cache     = IdentityCache(self)
+        self.region_map         = RegionMap(self)
+        self.client_pool        = ClientPool(self)
+        self.rate_limiter       = RateLimiter(self)
+        self.async_engine       = AsyncEngine(self)
+        self.memory_cache       = MemoryCache(self)
+        self.metrics            = MetricsRecorder(self)
+        self.max_workers        = 8
+        self.stale_ttl          = 0
+        self.inventory          = None
+        self.inventory_max_age  = 0
+        self.offline            = False
+        self.deadline           = Deadline()
+        self.call_info          = threading.local()
+        self.refreshing         = {}
+
+    def log(self, msg, *args, **fields):
+        """
+        Logs a message to stderr, see `core/logs.py`.
+        :param msg: (String|Callable) Message, formatted with `args` (`str.format`), or a callable returning it.
+        :param fields: Fields of the line in `--log-format json` (region, api, duration, ...).
+        """
+        self.logger.emit('info', msg, args, fields)
+
+    def vlog(self, msg, *args, **fields):
+        """Logs a message to stderr only if verbose is enabled; nothing is formatted otherwise."""
         if self.verbose:
-            self.log(msg, *args)
+            self.logger.emit('verbose', msg, args, fields)
 
-    def dlog(self, msg, *args):
-        """Logs a message to stderr only if debug is enabled."""
+    def dlog(self, msg, *args, **fields):
+        """Logs a message to stderr only if debug is enabled; nothing is formatted otherwise."""
         if self.debug:
-            self.log(msg, *args)
+            self.logger.emit('debug', msg, args, fields)
 
     def get_uuid(self):
         return self.uuid
 
-    def get_aws_client(self, client_name = "ec2", region = None):
-        client_namespace = format('client_{}_{}'.format(client_name, region))
-        self.dlog('[get_aws_client]::[client_namespace]::[{}]'.format(client_namespace))
-
-        if client_namespace in self.obj:
-            self.dlog('[get_aws_client]::[using existing client]::[{}]'.format(client_namespace))
-            client = self.obj[client_namespace]
-        else:
-            self.dlog('[get_aws_client]::[create new client]::[{}]'.format(client_namespace))
-            session = self.get_aws_session(region)
-
-            if not region:
-                region  = self.obj['region']
-
-            client_namespace            = format('client_{}_{}'.format(client_name, region))
-            client                      = session.client(client_name, region)
-            self.obj[client_namespace]  = client
-
-        return client
+    def get_aws_client(self, client_name = "ec2", region = None, lazy = False):
+        """
+        Clients come from the pool, one per (profile, service, region), and are safe to share between threads.
+        :param client_name: (String) Service name (ec2, rds, ...).
+        :param region: (String) Region name; the session region when not set.
+        :param lazy: (Boolean) Returns a stand in that creates the client on first use, for calls that may be cached.
+        :return: (botocore.client.BaseClient)
+        """
+        if self.offline:
+            raise OfflineError('[offline]::[aws client requested]::[{}]::[this command calls aws directly, run it without --offline]'.format(client_name))
+        if lazy:
+            return self.client_pool.get_lazy_client(client_name, region or None, self.obj.get('aws_profile', ''))
+        return self.client_pool.get_client(client_name, region or None, self.obj.get('aws_profile', ''))
 
     def get_aws_session(self, region = None):
-        self.dlog('[get_aws_session]::[region]::[{}]'.format(region))
+        self.dlog('[get_aws_session]::[region]::[{}]', region)
 
         if 'session' in self.obj and self.obj['session'] is not None:
             self.dlog('[get_aws_session]::[using existing session]')
-            session = self.obj['session']
-        elif self.obj['aws_profile'] != "":
-            self.dlog('[get_aws_session]::[starting session]::[with profile]::[{}]'.format(self.obj['aws_profile']))
-            if region:
-                session = boto3.session.Session(profile_name=self.obj['aws_profile'], region_name=region)
+            return self.obj['session']
+
+        # boto3 sessions are not thread safe, only one thread may start it.
+        with self.client_pool.lock:
+            if self.obj.get('session') is not None:
+                return self.obj['session']
+            elif self.offline:
+                # no credentials: the identity, and so the cache namespace, of the last session of the profile.
+                caller_id = self.identity_cache.get_last_identity(self.obj['aws_profile'])
+                if caller_id is None:
+                    raise OfflineError('[offline]::[no identity stored for profile]::[{}]::[run any command once online with this profile]'.format(self.obj['aws_profile'] or 'default'))
+                self.dlog('[get_aws_session]::[offline]::[{}]::[{}]', caller_id.get('Arn'), caller_id['region'])
+                session = create_session(region_name=caller_id['region'])
             else:
-                session = boto3.session.Session(profile_name=self.obj['aws_profile'])
-        else:
-            self.dlog('[get_aws_session]::[starting session]::[no profile]')
-            session = boto3.session.Session()
+                if self.obj['aws_profile'] != "":
+                    self.dlog('[get_aws_session]::[starting session]::[with profile]::[{}]', self.obj['aws_profile'])
+                    if region:
+                        session = create_session(profile_name=self.obj['aws_profile'], region_name=region)
+                    else:
+                        session = create_session(profile_name=self.obj['aws_profile'])
+                else:
+                    self.dlog('[get_aws_session]::[starting session]::[no profile]')
+                    session = create_session()
+
+                # define a session namespace to allow cache to be unique per iam/region/account, computed once per session.
+                caller_id           = dict(self.identity_cache.get_identity(session, self.obj['aws_profile']))
+                caller_id['region'] = session.region_name
+                self.identity_cache.remember(self.obj['aws_profile'], caller_id)
 
-        # define a session namespace to allow cache to be unique per iam/region/account.
-        client = session.client('sts')
-        caller_id = client.get_caller_identity()
-        caller_id.pop('ResponseMetadata', None)
-        caller_id['region']             = session.region_name
-        self.obj['region']              = session.region_name
-        self.obj['session']             = session
-        self.obj['caller_id']           = caller_id
-        self.obj['session_namespace']   = hashlib.md5(str(pickle.dumps(caller_id)).encode("utf-8")).hexdigest()
+            self.obj['region']              = session.region_name
+            self.obj['caller_id']           = caller_id
+            self.obj['session_namespace']   = hashlib.md5(json.dumps(caller_id, sort_keys=True).encode("utf-8")).hexdigest()
+            self.obj['session']             = session
 
-        self.dlog('[get_aws_session]::[region]::[{}]'.format(self.obj['region']))
+        self.dlog('[get_aws_session]::[region]::[{}]', self.obj['region'])
 
         return session
 
-    def get_from_aws_api(self, api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl = 0, region = ''):
-        client              = self.get_aws_client(api_namespace, region)
+    def get_from_aws_api(self, api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl = 0, region = '', stale_ttl = None, fields = None, compact = False, shards = None, negative_ttl = 0, timeout = None):
+        """
+        :param stale_ttl: (Int) Seconds past `api_cache_ttl` a cached result is still returned while one background
+            refresh replaces it; the global --stale-ttl when not set. See `last_call()` for where the result came from.
+        :param fields: (List|String) Keys kept from each item, or a JMESPath expression applied to each item; only the
+            projected items are held and cached, as page after page is received. See `core/projection.py`.
+        :param compact: (Boolean) Interns strings and turns `Tags` into tuples of (key, value) pairs, for very large
+            inventories; results are read only and tags are read with `core.compact.get_tag`. See `core/compact.py`.
+        :param shards: (String|List) Splits the listing into filtered listings paginated at the same time, ex: `status`
+            or `['status', 'encrypted']`; results are the same as the unsharded call. See `core/shards.py`.
+        :param negative_ttl: (Int) Seconds a not found result (404, None) is cached, independently of `api_cache_ttl`;
+            `invalidate_missing()` drops it once the item is known to exist. `last_call()` source is `missing` on a hit.
+        :param timeout: (Float) Seconds the call may take, nested in the budget of the fan-out or command it runs in;
+            checked before every page and retry. See `core/deadline.py`.
+        :return: None when the api or item is not found, or the service is not deployed to `region` (see `core/regions.py`).
+        :raises DeadlineExceeded: The time budget was spent or cancelled, `results` holds the items paginated so far.
+        """
+        if timeout:
+            with self.deadline_scope(timeout):
+                return self.get_from_aws_api(api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl, region, stale_ttl, fields, compact, shards, negative_ttl)
+
+        if not self.region_map.is_available(api_namespace, region):
+            self.dlog('[get_from_aws_api]::[{}]::[{}]::[{}]::[service not in region]', api_namespace, api_name, region)
+            return None
+
+        if self.offline:
+            return self.get_offline_results(api_namespace, api_name, api_response_key, api_request_config, region, fields, compact)
+
+        client              = self.get_aws_client(api_namespace, region, lazy=True)
         use_cache           = True if api_cache_ttl > 0 else False
+        stale_ttl           = self.stale_ttl if stale_ttl is None else stale_ttl
+        projection          = compile_projection(fields, compact)
 
-        # namespace calculated for each api cache request.
-        call_ns = 'aws.{}.{}'.format(
-            hashlib.md5('.'.join([self.obj['session_namespace'], api_namespace, region, api_name, str(api_response_key)]).encode('utf-8')).hexdigest(),
-            hashlib.md5(str(pickle.dumps(api_request_config)).encode("utf-8")).hexdigest()
-        )
+        call_ns             = self.get_call_namespace(api_namespace, api_name, api_response_key, api_request_config, region, fields, compact)
 
         log_prefix  = '[get_from_aws_api]::[{}]'.format(call_ns)
-        self.dlog('{}::[started]'.format(log_prefix))
-        self.dlog('{}::[api_request_config]::[{}]::[use_cache]::[{}]'.format(log_prefix, api_request_config, use_cache))
+        started     = time.time()
+        self.dlog('{}::[started]', log_prefix)
+        self.dlog('{}::[api_request_config]::[{}]::[use_cache]::[{}]', log_prefix, api_request_config, use_cache)
+
+        cache_meta  = {'namespace': api_namespace, 'region': region or self.obj.get('region', ''), 'api': api_name, 'ttl': api_cache_ttl + stale_ttl}
+
+        if negative_ttl and self.get_cache(call_ns + '.missing', None, negative_ttl, cache_meta=cache_meta) is not None:
+            self.set_last_call(call_ns, 'missing', (self.get_cache_backend().last_lookup() or {}).get('age'), cache_meta)
+            self.dlog('{}::[completed]::[cached not found]', log_prefix)
+            return None
+
+        if use_cache is not True:
+            results = self.get_api_results(client, api_name, api_response_key, api_request_config, log_prefix, projection, shards)
+            self.set_last_call(call_ns, 'live', None, cache_meta, results)
+            self.put_missing(call_ns, results, negative_ttl, cache_meta)
+            self.vlog('{}::[completed]', log_prefix, service=api_namespace, api=api_name, region=cache_meta['region'], source='live', duration=time.time() - started)
+            return results
+
+        # identical calls made at the same time share the result of the first one.
+        flight, leader = self.memory_cache.join(call_ns)
+        if not leader:
+            self.dlog('{}::[coalesced]', log_prefix)
+            results, source, age = flight.result()
+            # the items of a coalesced call were received, and counted, once by the leader.
+            self.set_last_call(call_ns, 'cache' if source == 'live' else source, age, cache_meta)
+            return results
+
+        try:
+            results, source, age = self.get_cached_results(call_ns, client, api_name, api_response_key, api_request_config, api_cache_ttl, stale_ttl, cache_meta, log_prefix, projection, compact, shards)
+            flight.set_result((results, source, age))
+        except Exception as e:
+            flight.set_exception(e)
+            raise e
+        finally:
+            self.memory_cache.leave(call_ns)
+
+        self.set_last_call(call_ns, source, age, cache_meta, results)
+        if source == 'live':
+            self.put_missing(call_ns, results, negative_ttl, cache_meta)
+        self.dlog('{}::[{}]', log_prefix, source, service=api_namespace, api=api_name, region=cache_meta['region'], source=source, duration=time.time() - started)
+        return results
+
+    def get_offline_results(self, api_namespace, api_name, api_response_key, api_request_config, region = '', fields = None, compact = False):
+        """
+        --offline: the cached result of a call whatever its age, or None for a cached not found result; aws is never called.
+        :raises OfflineError: The call was never cached.
+        """
+        self.get_aws_session()
+        call_ns     = self.get_call_namespace(api_namespace, api_name, api_response_key, api_request_config, region, fields, compact)
+        cache_meta  = {'namespace': api_namespace, 'region': region or self.obj.get('region', ''), 'api': api_name}
+
+        cached = self.memory_cache.get(call_ns, OFFLINE_CACHE_TTL)
+        if cached is not MISSING:
+            self.set_last_call(call_ns, 'cache', cached[2], cache_meta)
+            return cached[0]
+
+        results = self.get_cache(call_ns, None, OFFLINE_CACHE_TTL, cache_meta=cache_meta)
+        if results is not None:
+            self.set_last_call(call_ns, 'cache', (self.get_cache_backend().last_lookup() or {}).get('age'), cache_meta)
+            results = compact_results(results) if compact else results
+            self.memory_cache.put(call_ns, results, meta=cache_meta)
+            return results
+
+        if self.get_cache(call_ns + '.missing', None, OFFLINE_CACHE_TTL, cache_meta=cache_meta) is not None:
+            self.set_last_call(call_ns, 'missing', None, cache_meta)
+            return None
+
+        raise OfflineError('[offline]::[not cached]::[{}.{}]::[{}]::[{}]::[run it once online to cache it]'.format(
+            api_namespace, api_name, cache_meta['region'], json.dumps(api_request_config, sort_keys=True, default=str)))
+
+    def put_missing(self, call_ns, results, negative_ttl, cache_meta):
+        """Caches a not found result for `negative_ttl` seconds, next to the entry of the call."""
+        if results is None and negative_ttl:
+            self.put_cache(call_ns + '.missing', {'missing': True, 'api': cache_meta['api']}, cache_meta=dict(cache_meta, ttl=negative_ttl))
+
+    def invalidate_missing(self, api_namespace, api_name, api_response_key, api_request_config, region = '', fields = None, compact = False):
+        """Drops the cached not found result of a call (see `negative_ttl`), once the item is known to exist."""
+        call_ns = self.get_call_namespace(api_namespace, api_name, api_response_key, api_request_config, region, fields, compact)
+        self.get_cache_backend().delete(call_ns + '.missing')
+        self.memory_cache.remove(call_ns + '.missing')
+        self.dlog('[invalidate_missing]::[{}]', call_ns)
+
+    def get_cached_results(self, call_ns, client, api_name, api_response_key, api_request_config, api_cache_ttl, stale_ttl, cache_meta, log_prefix, projection = None, compact = False, shards = None):
+        """
+        Looks up the memory cache, then the cache backend, then calls the api; stale entries are refreshed in the background.
+        :return: (Tuple) (results, source, age) where source is cache, stale or live.
+        """
+        cached = self.lookup_cache(call_ns, client, api_name, api_response_key, api_request_config, api_cache_ttl, stale_ttl, cache_meta, log_prefix, projection, compact, shards)
+        if cached is not None:
+            return cached
+
+        results = self.get_api_results(client, api_name, api_response_key, api_request_config, log_prefix, projection, shards)
+        self.vlog('{}::[completed]', log_prefix)
+        self.save_results(call_ns, results, cache_meta)
+        return results, 'live', None
+
+    def lookup_cache(self, call_ns, client, api_name, api_response_key, api_request_config, api_cache_ttl, stale_ttl, cache_meta, log_prefix, projection = None, compact = False, shards = None):
+        """
+        Memory cache, then cache backend part of `get_cached_results`, also used by the async engine; a stale entry is
+        refreshed in the background with `client`.
+        :return: (Tuple) (results, source, age) where source is cache or stale, None when the call is not cached.
+        """
+        cached = self.memory_cache.get(call_ns, api_cache_ttl, stale_ttl)
+        if cached is not MISSING:
+            results, state, age = cached
+            self.get_cache_backend().touch(call_ns)
+            self.dlog('{}::[completed]::[memory cache used]', log_prefix)
+        else:
+            results = self.get_cache(call_ns, None, api_cache_ttl, cache_meta=cache_meta, stale_ttl=stale_ttl)
+            if results is None:
+                return None
+
+            lookup      = self.get_cache_backend().last_lookup() or {}
+            state, age  = lookup.get('state'), lookup.get('age') or 0
+            # strings are interned across entries, and json cache entries get their tag tuples back.
+            results     = compact_results(results) if compact else results
+            self.memory_cache.put(call_ns, results, age, cache_meta, lookup.get('size'))
+            self.dlog('{}::[completed]::[cache used]', log_prefix)
+
+        if state == 'stale':
+            self.refresh_in_background(call_ns, client, api_name, api_response_key, api_request_config, cache_meta, projection, shards)
+            return results, 'stale', age
+        return results, 'cache', age
+
+    def save_results(self, call_ns, results, cache_meta):
+        """Caches the results of a live call in the backend and the memory cache; not found results (None) are not."""
+        if results is not None:
+            self.put_cache(call_ns, results, cache_meta=cache_meta)
+            self.memory_cache.put(call_ns, results, meta=cache_meta)
 
-        check_cache = self.get_cache(call_ns, None, api_cache_ttl)
-        if use_cache is True and check_cache is not None:
-            self.dlog('{}::[completed]::[cache used]'.format(log_prefix))
-            return check_cache
+    def get_api_results(self, client, api_name, api_response_key, api_request_config, log_prefix, projection = None, shards = None):
+        """Calls the api, all pages when the request has a `PaginationConfig`; None when the api or item is not found."""
+        if shards:
+            return self.get_sharded_results(client, api_name, api_response_key, api_request_config, log_prefix, projection, shards)
+
+        # botocore is only imported once a command calls aws, not to start the cli.
+        import botocore.exceptions
 
         results = []
         if 'PaginationConfig' in api_request_config:
-            paginator           = client.get_paginator(api_name)
-            iterator            = paginator.paginate(**api_request_config)
-            count               = 0
-
-            self.vlog('{}::[call-api]'.format(log_prefix))
-            for page in iterator:
-                count += 1
-                self.dlog('{}::[item]::[{}]'.format(log_prefix, count))
-                if api_response_key:
-                    if api_response_key not in page:
-                        self.dlog('{}'.format(page))
-                        raise Exception('{}::[response_key]::[{}]::[not in]::[paginated response]::[{}]'.format(log_prefix, api_response_key, api_name))
-                    if type(page[api_response_key]) is list:
-                        for item in page[api_response_key]:
-                            results.append(item)
+            try:
+                for items in self.get_api_pages(client, api_name, api_response_key, api_request_config, log_prefix, projection):
+                    if type(items) is list:
+                        results.extend(items)
                     else:
-                        self.dlog('[{}]::[warning]::[these results may be off, this is not tested functionality.]'. format(page))
-                        results = page[api_response_key]
-                else:
-                    for item in page:
-                        results.append(item)
+                        self.dlog('[{}]::[warning]::[these results may be off, this is not tested functionality.]', items)
+                        results = items
+            except DeadlineExceeded as e:
+                self.vlog('{}::[timeout]::[partial results]::[{}]', log_prefix, len(results))
+                e.results = results
+                raise e
         else:
             try:
                 func = getattr(client, api_name)
@@ -145,7 +351,7 @@ class Context(object):
 
                 if api_response_key:
                     if api_response_key not in response:
-                        self.dlog('{}'.format(response))
+                        self.dlog('{}', response)
                         raise Exception('{}::[response_key]::[{}]::[not in]::[response]::[{}]'.format(log_prefix, api_response_key, api_name))
 
                     if type(response[api_response_key]) is list:
@@ -155,73 +361,442 @@ class Context(object):
                         results = response[api_response_key]
                 else:
                     results = response
+                results = project(projection, results)
 
             #  aws may not deploy api's if the service isn't available in a region.
             except botocore.exceptions.EndpointConnectionError as e:
-                self.dlog('{}::[api not available]::[{}]::[{}]'.format(log_prefix, api_name, e))
+                self.dlog('{}::[api not available]::[{}]::[{}]', log_prefix, api_name, e)
                 return None
 
             except botocore.exceptions.ClientError as e:
                 if e.response['Error']['Code'] == "404":
                     return None
                 else:
-                    self.dlog('{}::[api error]::[{}]::[{}]::[{}]'.format(log_prefix, api_name, e.response['Error']['Code'], e.response['Error']['Message']))
+                    self.dlog('{}::[api error]::[{}]::[{}]::[{}]', log_prefix, api_name, e.response['Error']['Code'], e.response['Error']['Message'])
                     raise e
 
-        self.vlog('{}::[completed]'.format(log_prefix))
-        return self.put_cache(call_ns, results)
+        return results
+
+    def get_sharded_results(self, client, api_name, api_response_key, api_request_config, log_prefix, projection, shards):
+        """Calls every shard of the listing at once, at most --max-workers; duplicates are dropped before the projection."""
+        configs     = get_shard_configs(api_name, api_request_config, shards)
+        started     = time.time()
+        deadline    = self.get_deadline()
+
+        def call(shard_config):
+            with self.deadline_scope(deadline=deadline):
+                return self.get_api_results(client, api_name, api_response_key, shard_config, log_prefix)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(configs)))) as executor:
+            results = merge_shards(api_name, executor.map(call, configs))
+
+        self.vlog('{}::[shards]::[{}]::[items]::[{}]::[elapsed]::[{:.2f}s]', log_prefix, len(configs), len(results), time.time() - started)
+        return project(projection, results)
+
+    def set_last_call(self, name_space, source, age = None, cache_meta = None, results = None):
+        """Also records the call in the metrics (`--metrics`) when `cache_meta` is given; `results` of live calls are counted."""
+        self.call_info.last = {'namespace': name_space, 'source': source, 'age': age}
+        if cache_meta is not None:
+            self.metrics.record_call(cache_meta, source, results)
+
+    def last_call(self):
+        """
+        Where the last `get_from_aws_api`/`iter_from_aws_api` result of the calling thread came from.
+        :return: (Dict) [namespace, source, age]; source is cache, stale, live or missing (a cached not found result),
+            age of the cached entry in seconds.
+        """
+        return getattr(self.call_info, 'last', None)
+
+    def get_deadline(self):
+        """:return: (Deadline) Time budget of the calling thread, the command budget (--time-budget) by default."""
+        return getattr(self.call_info, 'deadline', None) or self.deadline
+
+    @contextmanager
+    def deadline_scope(self, seconds = 0, deadline = None):
+        """Calls made by the thread in the block run under `deadline`, or a budget of `seconds` nested in the current one."""
+        previous                = getattr(self.call_info, 'deadline', None)
+        self.call_info.deadline = deadline or Deadline(seconds, self.get_deadline())
+        try:
+            yield self.call_info.deadline
+        finally:
+            self.call_info.deadline = previous
+
+    def check_deadline(self, log_prefix = ''):
+        """Checked by every aws client before each request attempt. :raises DeadlineExceeded:"""
+        self.get_deadline().check(log_prefix)
+
+    def cancel(self):
+        """Cancels the command: every call, in any thread, stops at its next page or retry."""
+        self.deadline.cancel()
+
+    def refresh_in_background(self, name_space, client, api_name, api_response_key, api_request_config, cache_meta, projection = None, shards = None):
+        """Refetches a stale cache entry in a thread, once per entry and run; `close()` waits for it to be saved."""
+        with self.client_pool.lock:
+            if name_space in self.refreshing:
+                return
+            self.refreshing[name_space] = threading.Thread(
+                target=self.refresh_cache, name='refresh-{}'.format(name_space),
+                args=(name_space, client, api_name, api_response_key, api_request_config, cache_meta, projection, shards)
+            )
+            self.refreshing[name_space].start()
+
+    def refresh_cache(self, name_space, client, api_name, api_response_key, api_request_config, cache_meta, projection = None, shards = None):
+        log_prefix = '[refresh_cache]::[{}]'.format(name_space)
+        try:
+            results = self.get_api_results(client, api_name, api_response_key, api_request_config, log_prefix, projection, shards)
+            self.save_results(name_space, results, cache_meta)
+            self.dlog('{}::[refreshed]', log_prefix)
+        except Exception as e:
+            self.dlog('{}::[failed]::[{}]', log_prefix, e)
+
+    def iter_from_aws_api(self, api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl = 0, region = '', fields = None, compact = False, shards = None):
+        """
+        Generator version of `get_from_aws_api`; items are yielded page by page as they are received, so memory is
+        bound to a single page instead of the full result set. Pages are written to the cache as they stream in and
+        the entry is saved once the last page is received, a cache hit is streamed back page by page the same way.
+        Calls without a `PaginationConfig`, sharded or --offline, are passed through `get_from_aws_api`. `fields` and `compact`
+        apply to each item before it is cached or yielded, see `get_from_aws_api`.
+        """
+        if 'PaginationConfig' not in api_request_config or shards or self.offline:
+            results = self.get_from_aws_api(api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl, region, fields=fields, compact=compact, shards=shards)
+            if type(results) is list:
+                yield from results
+            elif results is not None:
+                yield results
+            return
+
+        if not self.region_map.is_available(api_namespace, region):
+            self.dlog('[iter_from_aws_api]::[{}]::[{}]::[{}]::[service not in region]', api_namespace, api_name, region)
+            return
+
+        client      = self.get_aws_client(api_namespace, region, lazy=True)
+        use_cache   = True if api_cache_ttl > 0 else False
+        call_ns     = self.get_call_namespace(api_namespace, api_name, api_response_key, api_request_config, region, fields, compact)
+        cache_meta  = {'namespace': api_namespace, 'region': region or self.obj.get('region', ''), 'api': api_name, 'ttl': api_cache_ttl}
+        log_prefix  = '[iter_from_aws_api]::[{}]'.format(call_ns)
+        started     = time.time()
+        self.dlog('{}::[started]::[use_cache]::[{}]', log_prefix, use_cache)
+
+        if use_cache is True:
+            pages = self.get_cache_pages(call_ns, api_cache_ttl, cache_meta=cache_meta)
+            if pages is not None:
+                self.set_last_call(call_ns, 'cache', (self.get_cache_backend().last_lookup() or {}).get('age'), cache_meta)
+                for items in pages:
+                    yield from compact_results(items) if compact else items
+                self.dlog('{}::[completed]::[cache used]', log_prefix)
+                return
+
+        writer      = self.open_cache_pages(call_ns, cache_meta) if use_cache else None
+        completed   = False
+        received    = 0
+        self.set_last_call(call_ns, 'live', None, cache_meta)
+        try:
+            for items in self.get_api_pages(client, api_name, api_response_key, api_request_config, log_prefix, compile_projection(fields, compact)):
+                if type(items) is not list:
+                    items = [items]
+                if writer is not None:
+                    writer = self.write_cache_page(writer, items)
+                received += len(items)
+                yield from items
+            completed = True
+        finally:
+            self.metrics.record_items(cache_meta, received)
+            # a consumer that stops early leaves a partial result, which is never saved.
+            if writer is not None:
+                try:
+                    writer.commit() if completed else writer.abort()
+                except Exception as e:
+                    self.dlog('{}::[failed to save cache]::[{}]', log_prefix, e)
+
+        self.vlog('{}::[completed]', log_prefix, service=api_namespace, api=api_name, region=cache_meta['region'], source='live', duration=time.time() - started)
+
+    async def aget_from_aws_api(self, api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl = 0, region = '', stale_ttl = None, fields = None, compact = False, shards = None, negative_ttl = 0, timeout = None):
+        """Coroutine version of `get_from_aws_api`, same arguments, results and cache entries."""
+        return await self.async_engine.aget_from_aws_api(api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl, region, stale_ttl, fields, compact, shards, negative_ttl, timeout)
+
+    async def agather_from_aws_api(self, calls):
+        """
+        Awaits many `get_from_aws_api` calls at once, at most --max-concurrency in flight.
+        :param calls: (List) Keyword arguments of `get_from_aws_api`, one dict per call.
+        :return: (List) Result of each call in the order given, or the exception it raised.
+        """
+        return await self.async_engine.gather(calls)
+
+    def gather_from_aws_api(self, calls):
+        """Sync version of `agather_from_aws_api`, lets a sync command batch a call site without becoming async."""
+        return self.async_engine.run(calls)
+
+    def fan_out(self, api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl = 0, regions = None, max_workers = None, fields = None, compact = False, shards = None, negative_ttl = 0, timeout = None):
+        """
+        Runs the same `get_from_aws_api` call in every region at once, wall clock time is that of the slowest region.
+        :param regions: (List) Region names, the session region when not set; `all` is every enabled region.
+        :param max_workers: (Integer) Max regions called at once, the global --max-workers when not set.
+        :param timeout: (Float) Time budget of the whole fan-out, see `fan_out_regions`.
+        :return: (Dict) region => {'results', 'error', 'status', 'elapsed'}, in the order of `regions`.
+        """
+        def call(region):
+            return self.get_from_aws_api(api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl, region, fields=fields, compact=compact, shards=shards, negative_ttl=negative_ttl)
+
+        return self.fan_out_regions(call, regions, max_workers, '[fan_out]::[{}]::[{}]'.format(api_namespace, api_name), timeout)
+
+    def fan_out_regions(self, func, regions = None, max_workers = None, log_prefix = '[fan_out_regions]', timeout = None):
+        """
+        Calls `func(region)` for every region on a bounded thread pool. Regions where the service has no endpoint, or
+        that are not enabled for the account, come back as empty results; any other error is returned, not raised.
+        :param func: (Callable) Takes the region name, all AWS calls must go through the context clients.
+        :param regions: (List) Region names, the session region when not set; `all` is every enabled region.
+        :param max_workers: (Integer) Max regions called at once, the global --max-workers when not set.
+        :param timeout: (Float) Time budget of the whole fan-out, nested in the command budget. Once it is spent the
+            regions in flight stop at their next page or retry (status `timeout`, with the results received so far) and
+            the regions not started yet are not called (status `cancelled`).
+        :return: (Dict) region => {'results', 'error', 'status', 'elapsed'}, in the order of `regions`; status is ok,
+            error, timeout or cancelled.
+        """
+        session     = self.get_aws_session()
+        regions     = self.region_map.resolve(regions or [session.region_name])
+        max_workers = max(1, min(max_workers or self.max_workers, len(regions)))
+        outcomes    = OrderedDict((region, {'results': [], 'error': None, 'status': 'ok', 'elapsed': 0.0}) for region in regions)
+        deadline    = Deadline(timeout or 0, self.get_deadline())
+
+        def run(region):
+            started = time.time()
+            if deadline.expired():
+                # the budget was spent before the region started, it is not called at all.
+                outcomes[region]['error']   = DeadlineExceeded('{}::[{}]::[cancelled]::[not started]'.format(log_prefix, region))
+                outcomes[region]['status']  = 'cancelled'
+                return
+            try:
+                with self.deadline_scope(deadline=deadline):
+                    results = func(region)
+                if results is not None:
+                    outcomes[region]['results'] = results
+            except DeadlineExceeded as e:
+                outcomes[region]['error']   = e
+                outcomes[region]['status']  = 'timeout'
+                outcomes[region]['results'] = e.results if e.results is not None else []
+            except Exception as e:
+                reason = self.get_unavailable_reason(e)
+                if reason is not None:
+                    self.vlog('{}::[{}]::[{}]::[{}]', log_prefix, region, reason, e)
+                else:
+                    outcomes[region]['error']   = e
+                    outcomes[region]['status']  = 'error'
+            outcomes[region]['elapsed'] = time.time() - started
+
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(run, regions))
+
+        for region, outcome in outcomes.items():
+            if outcome['error'] is not None:
+                self.vlog('{}::[{}]::[{}]::[{}]', log_prefix, region, outcome['status'], outcome['error'])
+        self.vlog('{}::[regions]::[{}]::[workers]::[{}]::[elapsed]::[{:.2f}s]::[slowest region]::[{:.2f}s]',
+            log_prefix, len(regions), max_workers, time.time() - started, max([o['elapsed'] for o in outcomes.values()] or [0.0]),
+            regions=len(regions), duration=time.time() - started
+        )
+
+        return outcomes
+
+    def get_unavailable_reason(self, e):
+        """
+        Errors of a call that only mean the service is not there for the region; callers skip the call, not the region.
+        :return: (String) `api not available` when the service has no endpoint in the region, `region not enabled` when
+            the region is not enabled for the account, None for any other error.
+        """
+        import botocore.exceptions
+
+        if isinstance(e, (botocore.exceptions.EndpointConnectionError, botocore.exceptions.UnknownEndpointError)):
+            return 'api not available'
+        if isinstance(e, botocore.exceptions.ClientError) and e.response['Error']['Code'] in REGION_NOT_ENABLED_ERRORS:
+            return 'region not enabled'
+        return None
+
+    def get_api_pages(self, client, api_name, api_response_key, api_request_config, log_prefix, projection = None):
+        """Yields the response key value of each page, a list of items in all but untested cases, projected as they arrive."""
+        paginator   = client.get_paginator(api_name)
+        iterator    = paginator.paginate(**api_request_config)
+        count       = 0
+
+        self.vlog('{}::[call-api]', log_prefix)
+        for page in iterator:
+            count += 1
+            self.dlog('{}::[item]::[{}]', log_prefix, count)
+            if api_response_key:
+                if api_response_key not in page:
+                    self.dlog('{}', page)
+                    raise Exception('{}::[response_key]::[{}]::[not in]::[paginated response]::[{}]'.format(log_prefix, api_response_key, api_name))
+                yield project(projection, page[api_response_key])
+            else:
+                yield [item for item in page]
+
+    def get_call_namespace(self, api_namespace, api_name, api_response_key, api_request_config, region = '', fields = None, compact = False):
+        """namespace calculated for each api cache request, unique per session (iam/region/account), request and projection."""
+        request = [api_response_key, api_request_config] if not fields and not compact else [api_response_key, api_request_config, fields, compact]
+        return '{}{}'.format(
+            self.get_api_prefix(api_namespace, api_name, region),
+            hashlib.md5(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        )
+
+    def get_api_prefix(self, api_namespace, api_name, region = ''):
+        """:return: (String) Start of the namespace of every cache request of an api, for the session and region."""
+        # clients are created lazily, the session (and its namespace) may not be started yet.
+        if 'session_namespace' not in self.obj:
+            self.get_aws_session()
+        return 'aws.{}.'.format(
+            hashlib.md5('.'.join([self.obj['session_namespace'], api_namespace, region or self.obj['region'], api_name]).encode('utf-8')).hexdigest()
+        )
+
+    def get_cache_backend(self):
+        if self.cache_backend is None:
+            with self.client_pool.lock:
+                if self.cache_backend is None:
+                    self.cache_backend = get_cache_backend(self.cache_backend_name, context=self, cache_dir=os.path.join(self.data_dir, 'cache'))
+        return self.cache_backend
+
+    def get_inventory(self):
+        if self.inventory is None:
+            with self.client_pool.lock:
+                if self.inventory is None:
+                    self.inventory = InventoryStore(self, os.path.join(self.data_dir, 'inventory'))
+        return self.inventory
+
+    def get_inventory_resources(self, resource_type, region = '', **filters):
+        """
+        Resources of a type from the local inventory, see `inventory sync`, instead of describing them.
+        :param filters: state, tag_key, tag_value or parent_id, see `InventoryStore.get_resources`.
+        :return: (List) Resources, None when --inventory-max-age is not set or the region was not synced within it.
+        """
+        if not self.inventory_max_age:
+            return None
+
+        session     = self.get_aws_session()
+        account     = self.obj['caller_id']['Account']
+        region      = region or session.region_name
+        synced_at   = self.get_inventory().get_last_sync(account, region, resource_type)
+        if synced_at is None or time.time() - synced_at > self.inventory_max_age:
+            self.dlog('[get_inventory_resources]::[{}]::[{}]::[not synced]', resource_type, region)
+            return None
 
-    def put_cache(self, name_space, results, fo_mode = 'w'):
+        self.dlog('[get_inventory_resources]::[{}]::[{}]::[synced]::[{:.0f}s ago]', resource_type, region, time.time() - synced_at)
+        return self.get_inventory().get_resources(account, region, resource_type, **filters)
+
+    def write_through(self, region = '', deleted = None, tags_set = None, tags_removed = None):
+        """
+        Hook for mutating calls: applies deleted resources and tag changes to the listings cached for a region (memory
+        and cache backend) and to the inventory, so cached listings stay right for their whole ttl.
+        :param deleted: (List) Ids or ARNs of the resources deleted.
+        :param tags_set: (Dict) Id or ARN => tags set, key => value.
+        :param tags_removed: (Dict) Id or ARN => keys of the tags removed.
+        :return: (Dict) [patched, invalidated] cache entries.
+        """
+        region  = region or self.obj.get('region', '')
+        result  = patch_cache(self, region, deleted or [], tags_set, tags_removed)
+
+        # an inventory that was never synced is not created.
+        store = self.get_inventory()
+        if os.path.exists(store.db_path):
+            account = self.obj['caller_id']['Account']
+            store.delete(account, region, [get_listing_id(resource_id) for resource_id in deleted or []])
+            for resource_id in set(tags_set or {}) | set(tags_removed or {}):
+                store.update_tags(account, region, get_listing_id(resource_id), (tags_set or {}).get(resource_id), (tags_removed or {}).get(resource_id))
+
+        self.dlog('[write_through]::[{}]::[{}]', region, result)
+        return result
+
+    def put_cache(self, name_space, results, fo_mode = 'w', cache_meta = None):
 
         if not isinstance(name_space, str) or len(name_space) > 265:
-            self.dlog('[put_cache]::[cache-error]::[{}]'.format(name_space))
+            self.dlog('[put_cache]::[cache-error]::[{}]', name_space)
             raise Exception('[put_cache]::[name_space]::[incorrect type/length]::[{}]::[{}]'.format(isinstance(name_space, str), len(name_space)))
         elif isinstance(name_space, list) and len(name_space) == 0:
-            self.dlog('[put_cache]::[cache-missed]::[{}]'.format(name_space))
+            self.dlog('[put_cache]::[cache-missed]::[{}]', name_space)
             return results
         else:
-            cache_file = 'data/cache/{}.json'.format(name_space)
             try:
-                fopen = click.open_file(cache_file, fo_mode)
-                json.dump(results, fopen, default=str)
                 if fo_mode == 'a':
-                    fopen.write("\n")
-                self.dlog('[put_cache]::[cache-saved]::[{}]'.format(cache_file))
+                    self.get_cache_backend().append(name_space, results, cache_meta)
+                else:
+                    self.get_cache_backend().put(name_space, results, cache_meta)
             except Exception as e:
-                self.dlog('[failed to create cached file]::[{}]::[{}]'.format(cache_file, e))
+                self.dlog('[failed to save cache]::[{}]::[{}]', name_space, e)
 
             return results
 
-    def get_cache(self, name_space, default_return = None, cache_ttl = 0, rebuild_cache = False):
-        cache_file = 'data/cache/{}.json'.format(name_space)
+    def get_cache(self, name_space, default_return = None, cache_ttl = 0, rebuild_cache = False, cache_meta = None, stale_ttl = 0):
+        try:
+            results = self.get_cache_backend().get(name_space, cache_ttl, rebuild_cache, cache_meta, stale_ttl)
+        except Exception as e:
+            self.dlog('[get_cache]::[cache-error]::[{}]::[{}]', name_space, e)
+            return default_return
+
+        return default_return if results is MISSING else results
 
+    def get_cache_pages(self, name_space, cache_ttl = 0, rebuild_cache = False, cache_meta = None):
         try:
-            fh = Path(cache_file)
-            fh_stat = fh.stat()
+            pages = self.get_cache_backend().iter_pages(name_space, cache_ttl, rebuild_cache, cache_meta)
+        except Exception as e:
+            self.dlog('[get_cache_pages]::[cache-error]::[{}]::[{}]', name_space, e)
+            return None
 
-            if os.path.getsize(cache_file) == 0:
-                os.remove(cache_file)
+        return None if pages is MISSING else pages
 
-        # create new cache file
-        except FileNotFoundError:
-            self.dlog('[get_cache]::[cache-missed]::[{}]'.format(cache_file))
-            return default_return
+    def open_cache_pages(self, name_space, cache_meta = None):
+        try:
+            return self.get_cache_backend().open_pages(name_space, cache_meta)
+        except Exception as e:
+            self.dlog('[open_cache_pages]::[cache-error]::[{}]::[{}]', name_space, e)
+            return None
 
-        # use or rebuild cache file.
-        else:
-            time_now = datetime.utcnow()
-            time_fh = datetime.utcfromtimestamp(fh_stat.st_mtime)
-            difference = time_now - time_fh
-            if difference.seconds > cache_ttl or rebuild_cache is True:
-                self.dlog('[get_cache]::[cache-expired]::[{}]::[{}>{}]'.format(cache_file, difference, cache_ttl))
-                import shutil
-                file_from   = cache_file
-                file_to     = '{}-expired_by-{}'.format(cache_file, self.uuid)
-                shutil.move(file_from, file_to)
-                return default_return
-
-            self.dlog('[get_cache]::[cache-hit]::[{}]::[{}<{}]'.format(cache_file, difference, cache_ttl))
-            return json.load(click.open_file(cache_file, 'r'))
+    def write_cache_page(self, writer, items):
+        """:return: the writer, or None once a write failed; the api results keep streaming without the cache."""
+        try:
+            writer.write(items)
+            return writer
+        except Exception as e:
+            self.dlog('[write_cache_page]::[cache-error]::[{}]', e)
+
+        try:
+            writer.abort()
+        except Exception as e:
+            self.dlog('[write_cache_page]::[cache-error]::[abort]::[{}]', e)
+        return None
+
+    def close(self):
+        """Called once the command completes; persists cache stats and keeps the cache within its limits."""
+        self.vlog('[close]::[sts_calls]::[{}]', self.identity_cache.sts_calls)
+        self.async_engine.shutdown()
+        for name_space, thread in list(self.refreshing.items()):
+            self.dlog('[close]::[waiting for refresh]::[{}]', name_space)
+            thread.join()
+        self.dlog('[close]::[l1_cache]::[hits]::[{}]::[misses]::[{}]::[ratio]::[{:.1f}%]::[coalesced]::[{}]::[evicted]::[{}]::[bytes]::[{}/{}]',
+            self.memory_cache.stats['hits'], self.memory_cache.stats['misses'], self.memory_cache.hit_ratio(),
+            self.memory_cache.stats['coalesced'], self.memory_cache.stats['evicted'], self.memory_cache.bytes, self.memory_cache.max_bytes
+        )
+        for profile, service, region, stats in self.client_pool.utilization():
+            self.vlog('[close]::[client_pool]::[{}]::[{}]::[{}]::[requests]::[{}]::[peak_in_flight]::[{}/{}]::[utilization]::[{:.0f}%]::[saturated]::[{}]',
+                profile or 'default', service, region, stats.requests, stats.peak_in_flight, stats.max_pool_connections,
+                stats.utilization(), stats.saturated
+            )
+        for account, region, service, metrics, rate in self.rate_limiter.report():
+            self.vlog('[close]::[rate_limiter]::[{}]::[{}]::[{}]::[requests]::[{}]::[throttles]::[{}]::[retries]::[{}]::[wait_time]::[{:.2f}s]::[rate]::[{:.2f}/s]',
+                account, region, service, metrics['requests'], metrics['throttles'], metrics['retries'], metrics['wait_time'], rate
+            )
+        self.metrics.report()
+        if self.cache_backend is None:
+            return
+
+        try:
+            self.cache_backend.flush()
+            # an offline run could not fetch evicted entries again.
+            if (self.cache_max_bytes or self.cache_max_entries) and not self.offline:
+                usage = self.cache_backend.usage()
+                if (self.cache_max_bytes and usage['bytes'] > self.cache_max_bytes) \
+                        or (self.cache_max_entries and usage['entries'] > self.cache_max_entries):
+                    result = self.cache_backend.evict(self.cache_max_bytes, self.cache_max_entries)
+                    self.dlog('[close]::[cache-evicted]::[{}]', result)
+            self.cache_backend.flush()
+        except Exception as e:
+            self.dlog('[close]::[cache-error]::[{}]', e)
 
 pass_context   = click.make_pass_decorator(Context, ensure=True)
 command_dir    = os.path.join(os.path.dirname(__file__), 'command')
@@ -237,20 +812,85 @@ class AwsToolsCLI(click.MultiCommand):
         return rv
 
     def get_command(self, ctx, name):
-        ns  = {}
-        fn  = os.path.join(command_dir, 'cmd_' + name + '.py')
+        """Imports `command/cmd_{name}.py` once per run, with the import system so its bytecode is cached in __pycache__."""
+        fn          = os.path.join(command_dir, 'cmd_' + name + '.py')
+        module_name = 'command.cmd_' + name
 
         if not os.path.isfile(fn):
             return None
 
-        with open(fn) as f:
-            code = compile(f.read(), fn, 'exec')
-            eval(code, ns, ns)
-        return ns['subcmd']
+        if module_name not in sys.modules:
+            spec    = importlib.util.spec_from_file_location(module_name, fn)
+            module  = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            sys.modules[module_name] = module
+        return sys.modules[module_name].subcmd
+
+    def get_command_help(self, name):
+        """:return: (String) Docstring of the `subcmd` group of a command, read from its source without importing it."""
+        with open(os.path.join(command_dir, 'cmd_' + name + '.py')) as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and node.name == 'subcmd':
+                return ast.get_docstring(node) or ''
+        return ''
+
+    def format_commands(self, ctx, formatter):
+        """Same listing as click, the help of each command is read from its source: `--help` imports no command."""
+        commands = self.list_commands(ctx)
+        if commands:
+            limit = formatter.width - 6 - max(len(name) for name in commands)
+            with formatter.section('Commands'):
+                formatter.write_dl([(name, click.utils.make_default_short_help(self.get_command_help(name), limit)) for name in commands])
 
 @click.command(cls = AwsToolsCLI, help = '')
-def cli():
-    pass
+@click.option('--data-dir', envvar='DATA_DIR', default='data', type=click.Path(file_okay=False), help='Directory of the API cache (`cache/`) and the inventory (`inventory/`); must be writable and kept between runs (Default: data).')
+@click.option('--cache-backend', envvar='CACHE_BACKEND', default='sqlite', type=click.Choice(sorted(CACHE_BACKENDS)), help='API cache backend (Default: sqlite).')
+@click.option('--cache-format', envvar='CACHE_FORMAT', default='typed', type=click.Choice(FORMATS), help='Format of sqlite cache entries; typed keeps datetimes, bytes and decimals and is compressed (Default: typed).')
+@click.option('--cache-max-bytes', envvar='CACHE_MAX_BYTES', default=536870912, type=click.INT, help='Max size of cached entries before least recently used are evicted; zero for no limit (Default: 512MB).')
+@click.option('--cache-max-entries', envvar='CACHE_MAX_ENTRIES', default=50000, type=click.INT, help='Max number of cached entries before least recently used are evicted; zero for no limit (Default: 50000).')
+@click.option('--memory-cache-max-bytes', envvar='MEMORY_CACHE_MAX_BYTES', default=67108864, type=click.IntRange(0), help='Max size of API results kept in memory in front of the cache backend; zero disables it (Default: 64MB).')
+@click.option('--max-pool-connections', envvar='MAX_POOL_CONNECTIONS', default=10, type=click.IntRange(1), help='Max HTTP connections kept open per AWS client (Default: 10).')
+@click.option('--connect-timeout', envvar='CONNECT_TIMEOUT', default=60, type=click.INT, help='Seconds to wait for a connection to AWS (Default: 60).')
+@click.option('--read-timeout', envvar='READ_TIMEOUT', default=60, type=click.INT, help='Seconds to wait for an AWS response (Default: 60).')
+@click.option('--tcp-keepalive', envvar='TCP_KEEPALIVE', is_flag=True, default=False, help='Enable TCP keep-alive on AWS connections.')
+@click.option('--retry-mode', envvar='RETRY_MODE', default='legacy', type=click.Choice(RETRY_MODES), help='botocore retry mode (Default: legacy).')
+@click.option('--max-attempts', envvar='MAX_ATTEMPTS', default=0, type=click.INT, help='Max attempts per AWS call; zero for the retry mode default.')
+@click.option('--stale-ttl', envvar='STALE_TTL', default=0, type=click.IntRange(0), help='Seconds past its ttl a cached API result is still used while it is refreshed in the background (Default: 0).')
+@click.option('--rate-limit', envvar='RATE_LIMIT', default=20.0, type=click.FloatRange(0), help='Requests per second each account/region/service starts at, halved when throttled; zero disables rate limiting (Default: 20).')
+@click.option('--max-rate', envvar='MAX_RATE', default=100.0, type=click.FloatRange(0), help='Requests per second the rate limit may grow to while calls succeed (Default: 100).')
+@click.option('--throttle-attempts', envvar='THROTTLE_ATTEMPTS', default=10, type=click.IntRange(1), help='Max attempts of a throttled AWS call (Default: 10).')
+@click.option('--async-engine', envvar='ASYNC_ENGINE', default='auto', type=click.Choice(ENGINES), help='Engine of batched AWS calls; auto uses aiobotocore when installed, threads otherwise (Default: auto).')
+@click.option('--max-concurrency', envvar='MAX_CONCURRENCY', default=64, type=click.IntRange(1), help='Max batched AWS calls in flight at once (Default: 64).')
+@click.option('--max-workers', envvar='MAX_WORKERS', default=8, type=click.IntRange(1), help='Max regions called at once by commands that fan out (Default: 8).')
+@click.option('--inventory-max-age', envvar='INVENTORY_MAX_AGE', default=0, type=click.IntRange(0), help='Commands read resources from the local inventory when `inventory sync` ran within these seconds; zero always describes them (Default: 0).')
+@click.option('--offline', envvar='OFFLINE', is_flag=True, default=False, help='Serve every AWS read from the cache whatever its age, with no credentials or network; fails on anything not cached.')
+@click.option('--time-budget', envvar='TIME_BUDGET', default=0, type=click.IntRange(0), help='Seconds the command may spend on AWS calls, checked before every page and retry; zero is no limit (Default: 0).')
+@click.option('--log-format', envvar='LOG_FORMAT', default='text', type=click.Choice(LOG_FORMATS), help='Format of the log lines on stderr; json writes one object per line with the uuid, command and fields of the line (Default: text).')
+@click.option('--metrics', envvar='METRICS', is_flag=True, default=False, help='Print the calls, cache hits, requests, bytes, latency, throttles and retries of each api and region once the command completes.')
+@click.option('--metrics-file', envvar='METRICS_FILE', default=None, type=click.Path(dir_okay=False, writable=True), help='Write the metrics of the run to this file once the command completes.')
+@click.option('--metrics-format', envvar='METRICS_FORMAT', default='json', type=click.Choice(METRICS_FORMATS), help='Format of --metrics-file (Default: json).')
+@pass_context
+def cli(context, data_dir, cache_backend, cache_format, cache_max_bytes, cache_max_entries, memory_cache_max_bytes, max_pool_connections, connect_timeout, read_timeout,
+        tcp_keepalive, retry_mode, max_attempts, stale_ttl, rate_limit, max_rate, throttle_attempts, async_engine, max_concurrency, max_workers,
+        inventory_max_age, offline, time_budget, log_format, metrics, metrics_file, metrics_format):
+    context.data_dir            = data_dir
+    context.cache_backend_name  = cache_backend
+    context.cache_format        = cache_format
+    context.cache_max_bytes     = cache_max_bytes
+    context.cache_max_entries   = cache_max_entries
+    context.memory_cache.max_bytes = memory_cache_max_bytes
+    context.max_workers         = max_workers
+    context.stale_ttl           = stale_ttl
+    context.inventory_max_age   = inventory_max_age
+    context.offline             = offline
+    context.deadline            = Deadline(time_budget)
+    context.logger.configure(log_format, click.get_current_context().invoked_subcommand or '')
+    context.metrics.configure(metrics, metrics_file, metrics_format)
+    context.rate_limiter.configure(rate_limit, max_rate, throttle_attempts)
+    context.async_engine.configure(async_engine, max_concurrency)
+    context.client_pool.configure(max_pool_connections, connect_timeout, read_timeout, tcp_keepalive, retry_mode, max_attempts)
+    click.get_current_context().call_on_close(context.close)
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -6,6 +6,9 @@ import hashlib
 import dateutil.parser as parser
 import datetime
 
+# snapshots not exported yet have no export info in s3, their miss is cached until an export task is seen.
+EXPORT_INFO_NEGATIVE_TTL = 3600
+
 class SnapshotCollection:
     context = None
     config  = {
@@ -100,10 +103,9 @@ class SnapshotModel(object):
         return True if self['Status'].lower() == 'available' else False
 
     def can_delete(self):
-        try:
-            created_at = parser.parse(self['SnapshotCreateTime'])
-        except TypeError:
-            created_at = self['SnapshotCreateTime']
+        created_at = self['SnapshotCreateTime']
+        if not isinstance(created_at, datetime.datetime):
+            created_at = parser.parse(created_at)
 
         time_now    = datetime.datetime.now(datetime.timezone.utc)
         time_diff   = ((time_now - created_at).days)
@@ -138,6 +140,7 @@ class SnapshotModel(object):
             api_response_key    = '',
             api_name            = 'head_object',
             api_cache_ttl       = 0,
+            negative_ttl        = EXPORT_INFO_NEGATIVE_TTL,
             api_request_config  = {
                 'Bucket':   self.get_from_config('archive_bucket'),
                 'Key':      search_key,
@@ -272,11 +275,11 @@ class ExportQueue(object):
                     self.add_item_to_state('queued', snapshot)
                 else:
                     self.add_item_to_state('not_allowed', snapshot)
-                    self.context.dlog('[fill_open_queue]::[snap-not-allowed-to-archive]::[{}]'.format(snapshot['id']))
+                    self.context.dlog('[fill_open_queue]::[snap-not-allowed-to-archive]::[{}]', snapshot['id'])
             else:
                 self.add_item_to_state('un_processed', item)
                 queue_used = self.get_state_count('queued') + self.get_state_count('active')
-                self.context.dlog('[ExportQueue]::[run]::[queue closed]::[slots used]::[{} of {}]'.format(queue_used, self.batch_limit))
+                self.context.dlog('[ExportQueue]::[run]::[queue closed]::[slots used]::[{} of {}]', queue_used, self.batch_limit)
 
     def process_queued(self):
         queued_items    = self.state['queued']['items']
@@ -284,10 +287,10 @@ class ExportQueue(object):
             try:
                 self.process_queued_item(item)
             except Exception as e:
-                self.context.vlog('[process_queued_item]::[failed]::[{}]::[{}]').format(e, item)
+                self.context.vlog('[process_queued_item]::[failed]::[{}]::[{}]', e, item)
 
     def process_queued_item(self, item):
-        self.context.dlog('[ExportQueue]::[process_queued_item]::[{}]'.format(item['s3_base_path']))
+        self.context.dlog('[ExportQueue]::[process_queued_item]::[{}]', item['s3_base_path'])
 
         if self.config['dry_run'] is True:
             print('')
@@ -319,10 +322,10 @@ class ExportQueue(object):
             )
 
             if 'FailureCause' in result:
-                self.context.vlog('[FAILURE]::[{}]').format(result['FailureCause'])
+                self.context.vlog('[FAILURE]::[{}]', result['FailureCause'])
 
             if 'WarningMessage' in result:
-                self.context.vlog('[WARN]::[{}]').format(result['WarningMessage'])
+                self.context.vlog('[WARN]::[{}]', result['WarningMessage'])
 
     def can_delete_snapshots(self):
         return self.config['delete_snapshots']
@@ -364,24 +367,27 @@ class ExportQueue(object):
 
     def is_snapshot_in_s3(self, snapshot):
         search_key  = '{}/export_info_{}.json'.format(snapshot['s3_base_path'], snapshot['id'])
-        self.context.dlog('[is_snapshot_in_s3]::[search_key]::[{}]'.format(search_key))
+        request     = {'Bucket': self.config['s3_bucket_name'], 'Key': search_key}
+        self.context.dlog('[is_snapshot_in_s3]::[search_key]::[{}]', search_key)
+
+        # an export task of the snapshot may have written the export info since its miss was cached.
+        if self.get_snapshot_state(snapshot) is not None:
+            self.context.invalidate_missing('s3', 'head_object', '', request)
 
         result =  self.context.get_from_aws_api(
             api_namespace       = 's3',
             api_response_key    = '',
             api_name            = 'head_object',
             api_cache_ttl       = 0,
-            api_request_config  = {
-                'Bucket':   self.config['s3_bucket_name'],
-                'Key':      search_key,
-            }
+            negative_ttl        = EXPORT_INFO_NEGATIVE_TTL,
+            api_request_config  = request
         )
         self.context.dlog(result)
         return True if result else False
 
     def is_open(self):
         queue_used  = self.get_state_count('queued') + self.get_state_count('active')
-        self.context.dlog('[queue]::[is_open]::[{} of {}]'.format(queue_used, self.batch_limit))
+        self.context.dlog('[queue]::[is_open]::[{} of {}]', queue_used, self.batch_limit)
         return True if queue_used < self.batch_limit else False
 
     def get_state_count(self, type):
@@ -456,17 +462,17 @@ def subcmd(ctx, profile, verbose, debug):
 @subcmd.command()
 @pass_context
 def describe_manual_snapshots(ctx):
-    ctx.vlog('[describe_manual_snapshots]::[started]'.format())
+    ctx.vlog('[describe_manual_snapshots]::[started]')
     print(get_snapshots(ctx))
-    ctx.vlog('[describe_manual_snapshots]::[completed]'.format())
+    ctx.vlog('[describe_manual_snapshots]::[completed]')
 
 @subcmd.command()
 @pass_context
 def describe_active_exports(ctx):
-    ctx.vlog('[describe_active_exports]::[started]'.format())
+    ctx.vlog('[describe_active_exports]::[started]')
     res = get_active_export_tasks(ctx)
     output_as_csv(['SourceArn', 'ExportTaskIdentifier', 'Status', 'PercentProgress', 'S3Bucket', 'S3Prefix', 'TotalExtractedDataInGB'], res)
-    ctx.vlog('[describe_active_exports]::[completed]'.format())
+    ctx.vlog('[describe_active_exports]::[completed]')
 
 @subcmd.command()
 @click.option('--s3-bucket-name', envvar="S3_BUCKET_NAME", default="", help='S3 Bucket name to sync snapshots to.')
@@ -475,11 +481,11 @@ def describe_active_exports(ctx):
 @click.option('--dry-run', envvar='DRY_RUN', is_flag=True, default=False, help='Enables a Dry run (no export)')
 @pass_context
 def export_to_s3(ctx, s3_bucket_name, iam_role_arn, kms_key_id, dry_run):
-    ctx.vlog('[export_to_s3]::[started]'.format())
-    ctx.dlog('[export_to_s3]::[s3_bucket_name]::[{}]'.format(s3_bucket_name))
-    ctx.dlog('[export_to_s3]::[iam_role_arn]::[{}]'.format(iam_role_arn))
-    ctx.dlog('[export_to_s3]::[kms_key_id]::[{}]'.format(kms_key_id))
-    ctx.dlog('[export_to_s3]::[dry_run]::[{}]'.format(dry_run))
+    ctx.vlog('[export_to_s3]::[started]')
+    ctx.dlog('[export_to_s3]::[s3_bucket_name]::[{}]', s3_bucket_name)
+    ctx.dlog('[export_to_s3]::[iam_role_arn]::[{}]', iam_role_arn)
+    ctx.dlog('[export_to_s3]::[kms_key_id]::[{}]', kms_key_id)
+    ctx.dlog('[export_to_s3]::[dry_run]::[{}]', dry_run)
 
     queue   = ExportQueue({
         'context':          ctx,
@@ -492,7 +498,7 @@ def export_to_s3(ctx, s3_bucket_name, iam_role_arn, kms_key_id, dry_run):
     queue.run()
     report = queue.get_response().get_report('basic')
     output_as_csv(report[0].keys(), report)
-    ctx.vlog('[export_to_s3]::[completed]'.format())
+    ctx.vlog('[export_to_s3]::[completed]')
 
 @subcmd.command()
 @click.option('--s3-bucket-name', envvar="S3_BUCKET_NAME", default="", help='S3 Bucket name to sync snapshots to.')
@@ -511,12 +517,12 @@ def delete_snapshots(ctx, s3_bucket_name, iam_role_arn, kms_key_id, dry_run, lim
     :param ctx:
     :return:
     """
-    ctx.vlog('[delete_snapshots]::[started]'.format())
-    ctx.dlog('[delete_snapshots]::[s3_bucket_name]::[{}]'.format(s3_bucket_name))
-    ctx.dlog('[delete_snapshots]::[iam_role_arn]::[{}]'.format(iam_role_arn))
-    ctx.dlog('[delete_snapshots]::[kms_key_id]::[{}]'.format(kms_key_id))
-    ctx.dlog('[delete_snapshots]::[dry_run]::[{}]'.format(dry_run))
-    ctx.dlog('[delete_snapshots]::[limit]::[{}]'.format(limit))
+    ctx.vlog('[delete_snapshots]::[started]')
+    ctx.dlog('[delete_snapshots]::[s3_bucket_name]::[{}]', s3_bucket_name)
+    ctx.dlog('[delete_snapshots]::[iam_role_arn]::[{}]', iam_role_arn)
+    ctx.dlog('[delete_snapshots]::[kms_key_id]::[{}]', kms_key_id)
+    ctx.dlog('[delete_snapshots]::[dry_run]::[{}]', dry_run)
+    ctx.dlog('[delete_snapshots]::[limit]::[{}]', limit)
 
     snapshots   = SnapshotCollection({
         'max_records'   : 9999,
@@ -547,4 +553,4 @@ def delete_snapshots(ctx, s3_bucket_name, iam_role_arn, kms_key_id, dry_run, lim
         else:
             break
 
-    ctx.vlog('[delete_snapshots]::[completed]'.format())
+    ctx.vlog('[delete_snapshots]::[completed]')
@@ -0,0 +1,256 @@
+import click
+from cli import pass_context
+
+#-{Import unique to this command}--------------------------------------------------------------------------------------#
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from core import serialize
+from core.cache import MISSING
+from core.compact import compact
+from core.metrics import format_bytes
+from core.pool import create_session
+from core.shards import SHARD_KEYS, SHARD_STRATEGIES
+
+#-{Command Function/Classes}-------------------------------------------------------------------------------------------#
+
+def best_time(func, rounds):
+    """:return: (Float) Fastest of `rounds` calls of `func`, in seconds."""
+    rv = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        rv      = min(rv, time.perf_counter() - started)
+    return rv
+
+
+def traced_size(func):
+    """:return: (Tuple) Result of `func` and the bytes it still holds once returned, as traced by tracemalloc."""
+    tracemalloc.start()
+    try:
+        rv = func()
+        return rv, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def get_sample_snapshots(count):
+    """Synthetic `describe_snapshots` items, shaped like the boto3 response."""
+    time_now = datetime.now(timezone.utc)
+    return [{
+        'SnapshotId':   'snap-{:017x}'.format(i),
+        'VolumeId':     'vol-{:017x}'.format(i % 5000),
+        'State':        'completed',
+        'StartTime':    time_now - timedelta(days=i % 700, seconds=i),
+        'Progress':     '100%',
+        'OwnerId':      '123456789012',
+        'Description':  'Created by CreateImage(i-{:017x}) for ami-{:017x}'.format(i % 3000, i),
+        'VolumeSize':   8 * (1 + i % 16),
+        'Encrypted':    bool(i % 2),
+        'StorageTier':  'standard',
+        'Tags':         [{'Key': 'Name', 'Value': 'app-{}'.format(i % 200)}, {'Key': 'Environment', 'Value': 'Production'}],
+    } for i in range(count)]
+
+# services the commands create clients for.
+CLIENT_SERVICES = [
+    'autoscaling', 'cloudfront', 'ec2', 'ecr', 'efs', 'elasticache', 'elb', 'es', 'iam', 'lambda', 'pinpoint', 'rds',
+    'redshift', 'resourcegroupstaggingapi', 's3', 'sts'
+]
+
+
+def create_client(session_factory, service, region):
+    """Client of a new session, created the way the pool does it; no request is sent."""
+    return session_factory(region_name=region).client(service, region)
+
+# modules a command should only import once it runs, reported when `--help` loads them.
+HEAVY_IMPORTS = ['boto3', 'botocore', 'jmespath', 'fabric', 'paramiko', 'cffi', 'yaml', 'asyncio', 'aiobotocore']
+
+
+def clear_bytecode(root):
+    """Removes the cached bytecode of the cli and its packages, the next run compiles every module it imports."""
+    for directory in [root, os.path.join(root, 'core'), os.path.join(root, 'command')]:
+        for filename in os.listdir(directory):
+            if filename.endswith('.py'):
+                try:
+                    os.remove(importlib.util.cache_from_source(os.path.join(directory, filename)))
+                except FileNotFoundError:
+                    pass
+
+
+def run_help(root, args, python_args = ()):
+    """:return: (Tuple) Seconds `cli.py {args} --help` took in a new interpreter, and its stderr."""
+    # bytecode is always written, warm runs measure the cli as installed.
+    env     = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable] + list(python_args) + [os.path.join(root, 'cli.py')] + list(args) + ['--help'],
+                             cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise click.ClickException('[startup]::[{}]::[failed]::[{}]'.format(' '.join(args) or 'cli', process.stderr.strip().splitlines()[-1:]))
+    return elapsed, process.stderr
+
+
+def get_heavy_imports(stderr):
+    """:return: (List) HEAVY_IMPORTS found in the `-X importtime` output of a run."""
+    imported = set(line.rsplit('|', 1)[-1].strip() for line in stderr.splitlines() if line.startswith('import time:'))
+    return [name for name in HEAVY_IMPORTS if name in imported]
+
+#-{CLI Commands}-------------------------------------------------------------------------------------------------------#
+
+@click.group()
+@click.option('--profile', envvar='PROFILE', default="", help='AWS Configuration Profile Name, for the benchmarks calling AWS.')
+@click.option('-v', '--verbose', envvar='VERBOSE', is_flag=True, default=False, help='Enables verbose mode.')
+@click.option('-d', '--debug', envvar='DEBUG', is_flag=True, default=False, help='Enables verbose debug mode.')
+@pass_context
+def subcmd(context, profile, verbose, debug):
+    """Micro benchmarks of the cli internals, only sharded-scan calls AWS."""
+    context.obj['aws_profile'] = profile
+    context.verbose = verbose
+    context.debug   = debug
+
+
+@subcmd.command()
+@click.option('--items', default=50000, help='Number of synthetic describe_snapshots items.')
+@click.option('--key', default=None, help='Benchmark a cached entry by key instead of synthetic items.')
+@click.option('--rounds', default=5, help='Runs of each measure, the fastest is reported.')
+@pass_context
+def cache_format(context, items, key, rounds):
+    """Size, encode and decode time of the cache formats against the original json."""
+    if key:
+        results = context.get_cache_backend().get(key, cache_ttl=float('inf'))
+        if results is MISSING:
+            raise click.ClickException('[cache_format]::[key not found]::[{}]'.format(key))
+    else:
+        results = get_sample_snapshots(items)
+
+    formats = [('json', 'json'), ('typed ({})'.format(serialize.get_codec()), 'typed')]
+    row = '{:<16}{:>12}{:>12}{:>12}{:>10}  {}'
+    print(row.format('Format', 'Size', 'Encode', 'Decode', 'Ratio', 'Types kept'))
+    baseline = None
+    for name, cache_format in formats:
+        payload     = serialize.dumps(results, cache_format)
+        encode_time = best_time(lambda: serialize.dumps(results, cache_format), rounds)
+        decode_time = best_time(lambda: serialize.loads(payload), rounds)
+        baseline    = baseline or len(payload)
+        print(row.format(name, format_bytes(len(payload)), '{:.3f}s'.format(encode_time), '{:.3f}s'.format(decode_time),
+                         '{:.1f}x'.format(baseline / len(payload)), 'yes' if serialize.loads(payload) == results else 'no'))
+
+
+@subcmd.command()
+@click.option('--items', default=100000, help='Number of synthetic describe_snapshots items.')
+@click.option('--rounds', default=3, help='Runs of each measure, the fastest is reported.')
+@pass_context
+def inventory_memory(context, items, rounds):
+    """Memory held by a decoded inventory, as returned by the cache, against its compact form."""
+    payload = json.dumps(get_sample_snapshots(items), default=str).encode('utf-8')
+    modes   = [
+        ('decoded', lambda: json.loads(payload)),
+        ('compact', lambda: compact(json.loads(payload))),
+    ]
+
+    row = '{:<16}{:>12}{:>12}{:>10}'
+    print(row.format('Mode', 'Memory', 'Decode', 'Ratio'))
+    baseline = None
+    for name, decode in modes:
+        results, size   = traced_size(decode)
+        del results
+        decode_time     = best_time(decode, rounds)
+        baseline        = baseline or size
+        print(row.format(name, format_bytes(size), '{:.3f}s'.format(decode_time), '{:.1f}x'.format(baseline / size)))
+
+
+@subcmd.command()
+@click.option('--api', default='describe_snapshots', type=click.Choice(sorted(SHARD_KEYS)), help='EC2 listing to scan.')
+@click.option('--strategy', '-s', multiple=True, default=['status'], type=click.Choice(sorted(SHARD_STRATEGIES)), help='Shard strategy, repeat to cross strategies (Default: status).')
+@click.option('--region', default='', help='Region to scan, the session region when not set.')
+@pass_context
+def sharded_scan(context, api, strategy, region):
+    """Live listing with and without shards; fails when the sharded listing differs from the unsharded one."""
+    response_keys   = {'describe_snapshots': 'Snapshots', 'describe_volumes': 'Volumes', 'describe_instances': 'Reservations'}
+    request_config  = {'PaginationConfig': {}}
+    if api == 'describe_snapshots':
+        request_config['OwnerIds'] = ['self']
+
+    listings = []
+    for shards in [None, list(strategy)]:
+        started = time.perf_counter()
+        results = context.get_from_aws_api(
+            api_namespace='ec2', api_name=api, api_response_key=response_keys[api], api_request_config=request_config,
+            region=region, shards=shards
+        )
+        listings.append(({item[SHARD_KEYS[api]] for item in results or []}, time.perf_counter() - started))
+
+    (unsharded, unsharded_time), (sharded, sharded_time) = listings
+    row = '{:<16}{:>10}{:>12}'
+    print(row.format('Scan', 'Items', 'Elapsed'))
+    print(row.format('unsharded', len(unsharded), '{:.2f}s'.format(unsharded_time)))
+    print(row.format('+'.join(strategy), len(sharded), '{:.2f}s'.format(sharded_time)))
+
+    if unsharded != sharded:
+        raise click.ClickException('[sharded_scan]::[listings differ]::[missing]::[{}]::[extra]::[{}]'.format(
+            len(unsharded - sharded), len(sharded - unsharded))
+        )
+
+
+@subcmd.command()
+@click.option('--service', multiple=True, default=CLIENT_SERVICES, help='Service to create clients of, repeat for more (Default: the services the commands use).')
+@click.option('--region', default='us-east-1', help='Region of the clients, no request is sent (Default: us-east-1).')
+@click.option('--rounds', default=5, help='Runs of each measure, the fastest is reported.')
+@pass_context
+def client_creation(context, service, region, rounds):
+    """Client creation time of a new session with its own botocore loader, against one sharing the loader of the process."""
+    import boto3
+
+    factories = [
+        ('own loader', boto3.session.Session),
+        ('shared loader', create_session),
+    ]
+
+    row = '{:<28}{:>14}{:>16}{:>10}'
+    print(row.format('Service', factories[0][0], factories[1][0], 'Speedup'))
+    totals = [0.0, 0.0]
+    for name in service:
+        times = [best_time(lambda: create_client(factory, name, region), rounds) for _, factory in factories]
+        totals = [total + elapsed for total, elapsed in zip(totals, times)]
+        print(row.format(name, '{:.1f}ms'.format(times[0] * 1000), '{:.1f}ms'.format(times[1] * 1000), '{:.1f}x'.format(times[0] / times[1])))
+    print(row.format('total', '{:.1f}ms'.format(totals[0] * 1000), '{:.1f}ms'.format(totals[1] * 1000), '{:.1f}x'.format(totals[0] / totals[1])))
+
+
+@subcmd.command()
+@click.option('--command', 'commands', multiple=True, help='Command to time, repeat for more (Default: the cli and every command).')
+@click.option('--rounds', default=3, help='Runs of each measure, the fastest is reported.')
+@click.option('--max-warm', default=0, type=click.IntRange(0), help='Fail when the warm `--help` of a command takes more milliseconds; zero disables the check.')
+@pass_context
+def startup(context, commands, rounds, max_warm):
+    """
+    Time to `--help` of the cli and each command in a new interpreter: cold without the bytecode of the cli, warm with it.
+    Also lists the heavy modules each one imports, `--help` should import none of them.
+    """
+    root        = os.path.dirname(os.path.abspath(sys.modules['cli'].__file__))
+    root_ctx    = click.get_current_context().find_root()
+    names       = list(commands) or [''] + root_ctx.command.list_commands(root_ctx)
+    row         = '{:<20}{:>10}{:>10}  {}'
+    slow        = []
+
+    print(row.format('Command', 'Cold', 'Warm', 'Heavy imports'))
+    for name in names:
+        args = [name] if name else []
+
+        def cold():
+            clear_bytecode(root)
+            run_help(root, args)
+
+        cold_time   = best_time(cold, rounds)
+        warm_time   = best_time(lambda: run_help(root, args), rounds)
+        heavy       = get_heavy_imports(run_help(root, args, ['-X', 'importtime'])[1])
+        if max_warm and warm_time * 1000 > max_warm:
+            slow.append(name or 'cli')
+        print(row.format(name or 'cli', '{:.0f}ms'.format(cold_time * 1000), '{:.0f}ms'.format(warm_time * 1000), ', '.join(heavy) or '-'))
+
+    if slow:
+        raise click.ClickException('[startup]::[slower than {}ms]::[{}]'.format(max_warm, ', '.join(slow)))
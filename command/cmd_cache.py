@@ -0,0 +1,121 @@
+import click
+from cli import pass_context
+
+#-{Import unique to this command}--------------------------------------------------------------------------------------#
+import json
+from datetime import datetime
+from core.cache import remove_legacy_files
+from core.metrics import format_bytes
+
+#-{Command Function/Classes}-------------------------------------------------------------------------------------------#
+
+def format_time(timestamp):
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y/%m/%d %H:%M:%S UTC') if timestamp else ''
+
+
+def hit_ratio(stats):
+    lookups = stats['hits'] + stats['misses']
+    return '{:.1f}%'.format(100 * stats['hits'] / lookups) if lookups else '-'
+
+#-{CLI Commands}-------------------------------------------------------------------------------------------------------#
+
+@click.group()
+@click.option('-v', '--verbose', envvar='VERBOSE', is_flag=True, default=False, help='Enables verbose mode.')
+@click.option('-d', '--debug', envvar='DEBUG', is_flag=True, default=False, help='Enables verbose debug mode.')
+@pass_context
+def subcmd(context, verbose, debug):
+    """Maintenance of the local API cache."""
+    context.verbose = verbose
+    context.debug   = debug
+    context.dlog('[cache]::[backend]::[{}]', context.cache_backend_name)
+
+
+@subcmd.command()
+@pass_context
+def stats(context):
+    """Report entries, bytes and hit/miss counts per namespace."""
+    backend = context.get_cache_backend()
+    backend.flush()
+    totals  = {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+    row     = '{:<32}{:>10}{:>12}{:>10}{:>10}{:>10}{:>10}{:>10}'
+
+    print(row.format('Namespace', 'Entries', 'Bytes', 'Hits', 'Misses', 'Ratio', 'Expired', 'Evicted'))
+    for namespace, values in sorted(backend.stats().items()):
+        for key in totals:
+            totals[key] += values[key] or 0
+        print(row.format(namespace or '-', values['entries'], format_bytes(values['bytes'] or 0), values['hits'],
+                         values['misses'], hit_ratio(values), values['expired'], values['evicted']))
+    print(row.format('[total]', totals['entries'], format_bytes(totals['bytes']), totals['hits'], totals['misses'],
+                     hit_ratio(totals), totals['expired'], totals['evicted']))
+
+    print('')
+    print('[backend]::[{}]::[max_bytes]::[{}]::[max_entries]::[{}]'.format(
+        backend.name, format_bytes(context.cache_max_bytes), context.cache_max_entries)
+    )
+    if hasattr(backend, 'disk_usage'):
+        print('[bytes on disk]::[{}]::[{}]'.format(backend.db_path, format_bytes(backend.disk_usage())))
+
+
+@subcmd.command()
+@click.option('--max-bytes', default=None, type=click.INT, help='Override the global --cache-max-bytes limit.')
+@click.option('--max-entries', default=None, type=click.INT, help='Override the global --cache-max-entries limit.')
+@pass_context
+def gc(context, max_bytes, max_entries):
+    """Remove expired entries and evict least recently used entries over the size limits."""
+    backend     = context.get_cache_backend()
+    max_bytes   = context.cache_max_bytes if max_bytes is None else max_bytes
+    max_entries = context.cache_max_entries if max_entries is None else max_entries
+
+    context.vlog('[gc]::[started]::[max_bytes]::[{}]::[max_entries]::[{}]', max_bytes, max_entries)
+    result                      = backend.evict(max_bytes, max_entries)
+    legacy_files, legacy_bytes  = remove_legacy_files(backend.cache_dir)
+    if hasattr(backend, 'vacuum'):
+        backend.vacuum()
+
+    print('[expired]::[{}]::[evicted]::[{}]::[freed]::[{}]'.format(result['expired'], result['evicted'], format_bytes(result['bytes_freed'])))
+    print('[legacy expired files removed]::[{}]::[freed]::[{}]'.format(legacy_files, format_bytes(legacy_bytes)))
+    context.vlog('[gc]::[completed]')
+
+
+@subcmd.command()
+@click.option('--namespace', default=None, help='Service namespace (ec2, rds, ...) or key prefix to purge, `log.` for the audit logs; all entries but the audit logs when not set.')
+@click.option('--yes', is_flag=True, default=False, help='Do not ask for confirmation.')
+@pass_context
+def purge(context, namespace, yes):
+    """Remove cached entries."""
+    if not yes and not click.confirm('Purge [{}] cached entries?'.format(namespace or 'all')):
+        return
+
+    removed = context.get_cache_backend().purge(namespace)
+    print('[purged]::[{}]::[entries]::[{}]'.format(namespace or 'all', removed))
+
+
+@subcmd.command()
+@click.argument('key', required=False)
+@click.option('--namespace', default=None, help='Limit the listing to a service namespace or key prefix.')
+@click.option('--limit', default=20, help='Number of entries to list, largest first.')
+@click.option('--payload', is_flag=True, default=False, help='Output the cached payload of KEY.')
+@pass_context
+def inspect(context, key, namespace, limit, payload):
+    """Show a single cache entry by KEY, or list the largest entries."""
+    backend = context.get_cache_backend()
+
+    if key is None:
+        row = '{:<72}{:<12}{:<16}{:<32}{:>12}  {}'
+        print(row.format('Key', 'Namespace', 'Region', 'Api', 'Bytes', 'Last Accessed'))
+        for entry in backend.entries(namespace, limit):
+            print(row.format(entry['key'], entry['namespace'], entry['region'], entry['api'], format_bytes(entry['size']),
+                             format_time(entry['last_accessed'])))
+        return
+
+    entry = backend.inspect(key)
+    if entry is None:
+        raise click.ClickException('[inspect]::[key not found]::[{}]'.format(key))
+
+    for name, value in entry.items():
+        if name in ['created_at', 'last_accessed']:
+            value = format_time(value)
+        print('{:<16}{}'.format(name, value))
+
+    if payload:
+        print(json.dumps(backend.get(key, cache_ttl=float('inf')), indent=4, sort_keys=True, default=str))
@@ -3,8 +3,6 @@ from cli import pass_context
 
 # -{Import unique to this command}--------------------------------------------------------------------------------------#
 import sys
-import boto3
-import botocore
 import os
 from time import sleep
 import configparser
@@ -14,10 +12,16 @@ from dataclasses import dataclass, field
 from collections import OrderedDict, abc
 from datetime import datetime
 from dateutil import parser
+from functools import lru_cache
 
 
 # -{Command Function/Classes}-------------------------------------------------------------------------------------------#
 
+@lru_cache(maxsize=4096)
+def parse_timestamp(date_string):
+    return parser.parse(date_string).timestamp()
+
+
 def validate_input(value):
     if value.lower() == 'exit' or value.lower() == 'quit':
         print('\n\n')
@@ -86,7 +90,7 @@ def subcmd(context, profile, verbose, debug, dry_run, cache_ttl):
     context.dry_run = dry_run
     context.cache_ttl = int(cache_ttl)
 
-    context.dlog('[{}].[{}].[{}].[{}].[{}]'.format(profile, verbose, debug, dry_run, cache_ttl))
+    context.dlog('[{}].[{}].[{}].[{}].[{}]', profile, verbose, debug, dry_run, cache_ttl)
 
 
 # @todo inver the `interactive` logic to ensure it's the default.
@@ -112,10 +116,10 @@ def purge_snapshots(context, name, delete_older_than_date, retain_newer_than_dat
     """
 
     log_prefix = "purge-snapshots"
-    context.dlog('[{}]::[started]::[]'.format(log_prefix))
+    context.dlog('[{}]::[started]::[]', log_prefix)
 
     if context.dry_run:
-        context.dlog('[{}]::[dry_run]::[{}]'.format(log_prefix, context.dry_run))
+        context.dlog('[{}]::[dry_run]::[{}]', log_prefix, context.dry_run)
 
     rules = {
         'name': name,
@@ -143,7 +147,7 @@ def purge_snapshots(context, name, delete_older_than_date, retain_newer_than_dat
             elif snapshot.LifeCycle['actionSuggested'] == 'remove':
                 cnt_deleted += 1
 
-            context.log('{}::[{}]:[{}]::[reasons]::[{}]'.format(snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'], ', '.join(snapshot.LifeCycle['actionReasons'])))
+            context.log('{}::[{}]:[{}]::[reasons]::[{}]', snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'], ', '.join(snapshot.LifeCycle['actionReasons']))
 
     if interactive:
         print('')
@@ -158,13 +162,13 @@ def purge_snapshots(context, name, delete_older_than_date, retain_newer_than_dat
             debug_output('okay..removing now please stay tuned, this will take a while.')
         else:
             print('Good Bye')
-            context.dlog('[{}]::[started]::[]'.format(log_prefix))
+            context.dlog('[{}]::[started]::[]', log_prefix)
             return
 
     cnt_deleted = 0
     cnt_retained = 0
     for snapshot in court.get_judged():
-        context.dlog('{}::[{}]:[{}]::[reasons]::[{}]'.format(snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'], ', '.join(snapshot.LifeCycle['actionReasons'])))
+        context.dlog('{}::[{}]:[{}]::[reasons]::[{}]', snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'], ', '.join(snapshot.LifeCycle['actionReasons']))
 
         if snapshot.LifeCycle['actionSuggested'] == 'retain':
             cnt_retained += 1
@@ -172,16 +176,17 @@ def purge_snapshots(context, name, delete_older_than_date, retain_newer_than_dat
 
         if snapshot.LifeCycle['actionSuggested'] == 'remove':
             if context.dry_run:
-                context.log('[DRY RUN::REMOVE]::{}::[{}]:[{}]::[{}]'.format(snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'], ', '.join(snapshot.LifeCycle['actionReasons'])))
+                context.log('[DRY RUN::REMOVE]::{}::[{}]:[{}]::[{}]', snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'], ', '.join(snapshot.LifeCycle['actionReasons']))
             else:
                 if cnt_deleted < limit:
                     try:
                         context.get_from_aws_api(api_namespace='ec2', api_name='delete_snapshot', api_response_key='',
                                                  api_cache_ttl=0, api_request_config={'SnapshotId': snapshot.SnapshotId})
+                        context.write_through(deleted=[snapshot.SnapshotId])
                     except BaseException as err:
-                        context.log('Failed to delete snapshot]::[{}]::[because]::[{}]'.format(snapshot.SnapshotId, err))
+                        context.log('Failed to delete snapshot]::[{}]::[because]::[{}]', snapshot.SnapshotId, err)
                         pass
-                    context.log('[REMOVED]::{}::[{}]:[{}]::[{}]'.format(snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'],', '.join(snapshot.LifeCycle['actionReasons'])))
+                    context.log('[REMOVED]::{}::[{}]:[{}]::[{}]', snapshot.NameTag, snapshot.SnapshotId, snapshot.LifeCycle['actionSuggested'],', '.join(snapshot.LifeCycle['actionReasons']))
 
         cnt_deleted += 1
 
@@ -193,8 +198,8 @@ def purge_snapshots(context, name, delete_older_than_date, retain_newer_than_dat
     print('++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++')
     print('')
 
-    context.vlog('[deleted]::[{}]::[retained]::[{}]'.format(cnt_deleted, cnt_retained))
-    context.dlog('[{}]::[completed]'.format(log_prefix))
+    context.vlog('[deleted]::[{}]::[retained]::[{}]', cnt_deleted, cnt_retained)
+    context.dlog('[{}]::[completed]', log_prefix)
 
 
 # @todo eol_strings should be more expressive as a regex, but for current use a string match is all that's needed.
@@ -314,11 +319,10 @@ class AdjudicateSnapshotGroups():
         return False
 
     def get_timestamp(self, thing):
-        if type(thing) in (datetime, datetime.date, datetime.time):
+        # cached results keep their datetimes, strings only come from the json cache backend or the rules.
+        if isinstance(thing, datetime):
             return thing.timestamp()
-        else:
-            date_time = parser.parse(thing)
-            return date_time.timestamp()
+        return parse_timestamp(thing)
 
 
 class GroupedSnapshots(DataCollection):
@@ -338,10 +342,12 @@ class VolumeCollection(DataCollection):
 
     def __init__(self, context, region=''):
         data = {}
-        resources = context.get_from_aws_api(
-            api_namespace='ec2', api_name='describe_volumes', api_response_key='Volumes', api_cache_ttl=context.cache_ttl,
-            api_request_config={'PaginationConfig': {'MaxResults': 99999}}, region=region
-        )
+        resources = context.get_inventory_resources('volumes', region)
+        if resources is None:
+            resources = context.iter_from_aws_api(
+                api_namespace='ec2', api_name='describe_volumes', api_response_key='Volumes', api_cache_ttl=context.cache_ttl,
+                api_request_config={'PaginationConfig': {'MaxResults': 99999}}, region=region
+            )
         for item in resources:
             data[item['VolumeId']] = Volume(**item)
         DataCollection.__init__(self, data)
@@ -351,11 +357,13 @@ class ImageCollection(DataCollection):
 
     def __init__(self, context, region=''):
         data = {}
-        resources = context.get_from_aws_api(
-            api_namespace='ec2', api_name='describe_images', api_response_key='Images', api_cache_ttl=context.cache_ttl,
-            region=region,
-            api_request_config={'Owners': ['self'], 'Filters': [{'Name': 'state', 'Values': ['available']}]}
-        )
+        resources = context.get_inventory_resources('images', region, state='available')
+        if resources is None:
+            resources = context.get_from_aws_api(
+                api_namespace='ec2', api_name='describe_images', api_response_key='Images', api_cache_ttl=context.cache_ttl,
+                region=region,
+                api_request_config={'Owners': ['self'], 'Filters': [{'Name': 'state', 'Values': ['available']}]}
+            )
         for item in resources:
             data[item['ImageId']] = Image(**item)
         DataCollection.__init__(self, data)
@@ -365,14 +373,16 @@ class InstanceCollection(DataCollection):
 
     def __init__(self, context, region=''):
         data = {}
-        resources = context.get_from_aws_api(
-            api_namespace='ec2', api_name='describe_instances', api_response_key='Reservations',
-            api_cache_ttl=context.cache_ttl,
-            api_request_config={'PaginationConfig': {'MaxResults': 99999}}, region=region
-        )
-        for reservation in resources:
-            for item in reservation['Instances']:
-                data[item['InstanceId']] = Instance(**item)
+        resources = context.get_inventory_resources('instances', region)
+        if resources is None:
+            reservations = context.iter_from_aws_api(
+                api_namespace='ec2', api_name='describe_instances', api_response_key='Reservations',
+                api_cache_ttl=context.cache_ttl,
+                api_request_config={'PaginationConfig': {'MaxResults': 99999}}, region=region
+            )
+            resources = (item for reservation in reservations for item in reservation['Instances'])
+        for item in resources:
+            data[item['InstanceId']] = Instance(**item)
 
         DataCollection.__init__(self, data)
 
@@ -385,12 +395,14 @@ class SnapshotCollection(DataCollection):
 
     def __init__(self, context, region=''):
         data = {}
-        resources = context.get_from_aws_api(
-            api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots', api_cache_ttl=context.cache_ttl,
-            region=region,
-            api_request_config={'OwnerIds': ['self'], 'PaginationConfig': {'MaxResults': 99999},
-                                'Filters': [{'Name': 'status', 'Values': ['completed']}]}
-        )
+        resources = context.get_inventory_resources('snapshots', region, state='completed')
+        if resources is None:
+            resources = context.iter_from_aws_api(
+                api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots', api_cache_ttl=context.cache_ttl,
+                region=region,
+                api_request_config={'OwnerIds': ['self'], 'PaginationConfig': {'MaxResults': 99999},
+                                    'Filters': [{'Name': 'status', 'Values': ['completed']}]}
+            )
         for item in resources:
             can_add = True
             for ignored_prefix in self.ignore_description:
@@ -1,20 +1,14 @@
 import click
-import boto3
 import os
 import json
-import yaml
 import socket
 from cli import pass_context
-import cffi
-from fabric import Connection
-from fabric import ThreadingGroup
-from paramiko import SSHException
-from invoke import UnexpectedExit
 from datetime import datetime
 import sys
 from pathlib import Path
 import copy
-import botocore
+
+# fabric, paramiko and yaml are imported by the functions using them, `ec2 --help` and `ec2 get_ips` do not load them.
 
 # -{Command Function/Classes}------------------------------------------------------------------------------------------#
 
@@ -40,10 +34,11 @@ def get_security_groups_by_filters(ctx, filters, cache_ttl= 0, max_results=5,
 
 def connectionGroupRun(ctx, connections, plan):
     log_prefix = '[connectionGroupRun]'.format()
-    ctx.dlog('{}::[started]'.format(log_prefix))
-    ctx.dlog('{}::[num connections]::[{}]'.format(log_prefix, str(len(connections))))
+    ctx.dlog('{}::[started]', log_prefix)
+    ctx.dlog('{}::[num connections]::[{}]', log_prefix, str(len(connections)))
     results = []
 
+    from fabric import ThreadingGroup
     group   = ThreadingGroup.from_connections(connections)
     with click.progressbar(group, label='Running plans against connections.') as group_bar:
         for connection in group_bar:
@@ -51,25 +46,27 @@ def connectionGroupRun(ctx, connections, plan):
             result = {'connection': connection.host, 'results': result_plan}
             results.append(result)
 
-    ctx.dlog('{}::[num results]::[{}]'.format(log_prefix, str(len(results))))
-    ctx.dlog('{}::[completed]'.format(log_prefix))
+    ctx.dlog('{}::[num results]::[{}]', log_prefix, str(len(results)))
+    ctx.dlog('{}::[completed]', log_prefix)
 
     return results
 
 
 def buildConnectionsFromInstanceData(ctx, instance_data, connect_timeout=10):
     log_prefix = '[buildConnections]'.format()
-    ctx.dlog('{}::[started]'.format(log_prefix))
-    ctx.dlog('{}::[num instances]::[{}]'.format(log_prefix, str(len(instance_data))))
-    ctx.dlog('{}::[connect_timeout]::[{}]'.format(log_prefix, str(connect_timeout)))
+    ctx.dlog('{}::[started]', log_prefix)
+    ctx.dlog('{}::[num instances]::[{}]', log_prefix, str(len(instance_data)))
+    ctx.dlog('{}::[connect_timeout]::[{}]', log_prefix, str(connect_timeout))
     connections = []
 
+    from fabric import Connection
+
     for instance in instance_data:
         if 'ops_metadata' in instance and 'ssh_keys' in instance['ops_metadata'] and len(instance['ops_metadata']['ssh_keys']) > 0:
             for key_data in instance['ops_metadata']['ssh_keys']:
 
                 if 'user' not in key_data or 'local_path' not in key_data or 'host' not in key_data:
-                    ctx.dlog('{}::[error]::[key data is missing for]::[{}]'.format(log_prefix, str(instance['InstanceId'])))
+                    ctx.dlog('{}::[error]::[key data is missing for]::[{}]', log_prefix, str(instance['InstanceId']))
                     continue
 
                 connection  = Connection(key_data['host'],
@@ -80,22 +77,24 @@ def buildConnectionsFromInstanceData(ctx, instance_data, connect_timeout=10):
                 connections.append(connection)
                 break;  # first ssh key we find is good enough.
 
-    ctx.dlog('{}::[num connections]::[{}]'.format(log_prefix, str(len(connections))))
-    ctx.dlog('{}::[started]'.format(log_prefix))
+    ctx.dlog('{}::[num connections]::[{}]', log_prefix, str(len(connections)))
+    ctx.dlog('{}::[started]', log_prefix)
     return connections
 
 
 def fabric_run_plan(ctx, connection, plan_data):
+    from invoke import UnexpectedExit
+
     log_prefix  = '[fabric_run_plan]::[{}]'.format(connection.host)
     results  = {
         'upload_file': [],
         'command': []
     }
 
-    ctx.vlog('{}::[starting]'.format(log_prefix))
+    ctx.vlog('{}::[starting]', log_prefix)
 
     if 'upload_files' in plan_data:
-        ctx.vlog('{}::[starting file upload]'.format(log_prefix))
+        ctx.vlog('{}::[starting file upload]', log_prefix)
 
         for file in plan_data['upload_files']:
             source  = file['source'] if 'source' in file else None
@@ -126,11 +125,11 @@ def fabric_run_plan(ctx, connection, plan_data):
                         }
                     }
 
-                ctx.vlog('{}::[uploaded]::[source]::[{}]::[destination]::[{}]::[status]::[{}]'.format(log_prefix, source, dest, result['response']['status']))
+                ctx.vlog('{}::[uploaded]::[source]::[{}]::[destination]::[{}]::[status]::[{}]', log_prefix, source, dest, result['response']['status'])
                 results['upload_file'].append(result)
 
     if 'run' in plan_data:
-        ctx.vlog('{}::[starting command exec]'.format(log_prefix))
+        ctx.vlog('{}::[starting command exec]', log_prefix)
 
         for execute_command in plan_data['run']:
             try:
@@ -158,7 +157,7 @@ def fabric_run_plan(ctx, connection, plan_data):
                     }
                 }
 
-            ctx.vlog('{}::[execute_command]::[executed]::[{}]::[status]::[{}]'.format(log_prefix, execute_command, result['response']['status']))
+            ctx.vlog('{}::[execute_command]::[executed]::[{}]::[status]::[{}]', log_prefix, execute_command, result['response']['status'])
             results['command'].append(result)
     return results
 
@@ -169,9 +168,11 @@ def testInstanceSshUser(ctx, instance, ssh_key, user, **kwargs):
     test_command    = kwargs.get('test_command', 'hostname')
     key_name        = os.path.splitext(os.path.basename(ssh_key))[0]
     connect_timeout = kwargs.get('connect_timeout', 10)
-    ctx.dlog('{}::[started]::[{}]::[{}]::[{}]::[{}]::[{}]'.format(log_prefix, ssh_key, user, host, test_command, str(connect_timeout)))
+    ctx.dlog('{}::[started]::[{}]::[{}]::[{}]::[{}]::[{}]', log_prefix, ssh_key, user, host, test_command, str(connect_timeout))
     result    = None
 
+    from fabric import Connection
+    from paramiko import SSHException
     try:
         response = Connection(host, user=user, connect_timeout=connect_timeout,
                             connect_kwargs={'key_filename': ssh_key}).run(test_command, hide='both')
@@ -188,26 +189,26 @@ def testInstanceSshUser(ctx, instance, ssh_key, user, **kwargs):
                     'output': response.stdout.strip()
                 }
             }
-        ctx.dlog('{}::[ssh]::[confirmed key]::[ssh -i {} {}@{}]::[{}]::[{}]'.format(log_prefix, ssh_key, user, host, response.exited, response.stdout.strip()))
+        ctx.dlog('{}::[ssh]::[confirmed key]::[ssh -i {} {}@{}]::[{}]::[{}]', log_prefix, ssh_key, user, host, response.exited, response.stdout.strip())
     except SSHException as e:
-        ctx.dlog("{}::[ssh]::[key failed]::[ssh -i {} {}@{}]::[{}]".format(log_prefix, ssh_key, user, host, str(e)))
+        ctx.dlog("{}::[ssh]::[key failed]::[ssh -i {} {}@{}]::[{}]", log_prefix, ssh_key, user, host, str(e))
         result = None
         # pass
     except ValueError as e:
-        ctx.dlog("{}::[ssh]::[python library failed]::[ssh -i {} {}@{}]::[{}]".format(log_prefix, ssh_key, user, host, str(e)))
+        ctx.dlog("{}::[ssh]::[python library failed]::[ssh -i {} {}@{}]::[{}]", log_prefix, ssh_key, user, host, str(e))
         result = None
         # pass
     except Exception as e:
-        ctx.dlog("{}::[ssh]::[host failed]::[ssh -i {} {}@{}]::[{}]".format(log_prefix, ssh_key, user, host, str(e)))
+        ctx.dlog("{}::[ssh]::[host failed]::[ssh -i {} {}@{}]::[{}]", log_prefix, ssh_key, user, host, str(e))
         result = None
 
-    ctx.dlog('{}::[completed]'.format(log_prefix))
+    ctx.dlog('{}::[completed]', log_prefix)
     return result
 
 
 def testInstanceSshKey(ctx, instance, ssh_key, **kwargs):
     log_prefix = '[testInstanceSshKey]'.format()
-    ctx.dlog('{}::[started]'.format(log_prefix))
+    ctx.dlog('{}::[started]', log_prefix)
     users_expected     = kwargs.get('user_names', ['ubuntu', 'ec2-user', 'openvas', 'root'])
     users_preferred     = kwargs.get('user_names_preferred', ['ubuntu', 'ec2-user'])
     break_on_preferred  = kwargs.get('break_on_preferred', True)
@@ -223,32 +224,32 @@ def testInstanceSshKey(ctx, instance, ssh_key, **kwargs):
             if break_on_preferred is True and user in users_preferred:
                 break
 
-    ctx.dlog('{}::[completed]'.format(log_prefix))
+    ctx.dlog('{}::[completed]', log_prefix)
     return valid_ssh_keys
 
 
 def testInstanceSshKeys(ctx, instance, ssh_keys, **kwargs):
     log_prefix = '[testInstanceSshKeys]'.format()
-    ctx.dlog('{}::[started]'.format(log_prefix))
+    ctx.dlog('{}::[started]', log_prefix)
     break_on_preferred  = kwargs.get('break_on_preferred', True)
     valid_ssh_keys  = []
 
     for ssh_key in ssh_keys:
-        ctx.dlog('{}::[testing ssh key]::[{}]'.format(log_prefix, ssh_key))
+        ctx.dlog('{}::[testing ssh key]::[{}]', log_prefix, ssh_key)
         result  = testInstanceSshKey(ctx, instance, ssh_key, break_on_preferred = break_on_preferred)
 
         if result is not None and len(result) > 0:
             valid_ssh_keys  = valid_ssh_keys + result
 
             if break_on_preferred is True:
-                ctx.dlog('{}::[i was told to break]::[{}]'.format(log_prefix, result))
+                ctx.dlog('{}::[i was told to break]::[{}]', log_prefix, result)
                 break
 
     if 'ops_metadata' not in instance:
         instance['ops_metadata'] = {}
 
     instance['ops_metadata']['ssh_keys'] = valid_ssh_keys
-    ctx.dlog('{}::[completed]'.format(log_prefix))
+    ctx.dlog('{}::[completed]', log_prefix)
     return instance
 
 
@@ -261,15 +262,57 @@ def describeSshKeys(path, prefix = '', suffix = '.priv'):
     return rv
 
 
+# EC2 filter name => filter of `InventoryStore.get_resources` answering it, `tag:<key>` filters are answered too.
+INVENTORY_FILTERS = {
+    'instance-state-name':  'state',
+    'tag-key':              'tag_key',
+    'image-id':             'parent_id',
+    'vpc-id':               'parent_id',
+    'subnet-id':            'parent_id',
+}
+
+
+def get_inventory_filters(filters = None):
+    """
+    :param filters: (List) EC2 filters, ex: `[{'Name': 'tag:Name', 'Values': ['web']}]`.
+    :return: (Dict) The same filters for `get_inventory_resources`, None when the inventory can't answer one of them.
+    """
+    rv = {}
+    for ec2_filter in filters or []:
+        if len(ec2_filter.get('Values', [])) != 1:
+            return None
+
+        value = ec2_filter['Values'][0]
+        if ec2_filter['Name'].startswith('tag:'):
+            names = {'tag_key': ec2_filter['Name'][4:], 'tag_value': value}
+        elif ec2_filter['Name'] in INVENTORY_FILTERS:
+            names = {INVENTORY_FILTERS[ec2_filter['Name']]: value}
+        else:
+            return None
+
+        # one value per inventory filter, values with wildcards are matched by the api only.
+        if set(names) & set(rv) or '*' in value or '?' in value:
+            return None
+        rv.update(names)
+    return rv
+
+
 def describeInstances(ctx, limit = 1, filters = None):
     """
     AWS Api returns results in unexplained groupings of Reservations, here we break
     that up and normalize it into a single list of instances...this is the way.
+    Read from the inventory instead when it was synced recently and can answer the filters, see `inventory sync`.
     :param ctx:
     :param limit:
     :param filters:
     :return:
     """
+    inventory_filters = get_inventory_filters(filters)
+    if inventory_filters is not None:
+        instances = ctx.get_inventory_resources('instances', **inventory_filters)
+        if instances is not None:
+            return instances
+
     instance_data = ctx.get_from_aws_api(
         api_namespace       = 'ec2',
         api_name            = 'describe_instances',
@@ -314,10 +357,12 @@ def duplicate_whitelisting_by_cidr(ctx, cidr_to_copy_from, cidr_to_add):
     :param output:
     :return:
     """
+    import botocore.exceptions
+
     log_prefix = '[duplicate_whitelisting_by_cidr]'.format()
-    ctx.vlog('{}::[started]'.format(log_prefix))
-    ctx.vlog('{}::[cidr_to_copy_from]::[{}]'.format(log_prefix, str(cidr_to_copy_from)))
-    ctx.vlog('{}::[cidr_to_add]::[{}]'.format(log_prefix, str(cidr_to_add)))
+    ctx.vlog('{}::[started]', log_prefix)
+    ctx.vlog('{}::[cidr_to_copy_from]::[{}]', log_prefix, str(cidr_to_copy_from))
+    ctx.vlog('{}::[cidr_to_add]::[{}]', log_prefix, str(cidr_to_add))
 
     ec2_client = ctx.get_aws_client('ec2')
 
@@ -346,20 +391,20 @@ def duplicate_whitelisting_by_cidr(ctx, cidr_to_copy_from, cidr_to_add):
 
         if not existing_rule:
             try:
-                ctx.vlog('{}::[update]::[new_rules]::[{}]::[{}]'.format(log_prefix, sec_group['GroupId'], new_rules))
+                ctx.vlog('{}::[update]::[new_rules]::[{}]::[{}]', log_prefix, sec_group['GroupId'], new_rules)
                 ec2_client.authorize_security_group_ingress(GroupId=sec_group['GroupId'], IpPermissions=new_rules)
             except botocore.exceptions.ClientError as e:
-                ctx.vlog('{}::[api error]::[{}]::[{}]::[{}]'.format(
+                ctx.vlog('{}::[api error]::[{}]::[{}]::[{}]',
                     log_prefix, 'authorize_security_group_ingress',
-                    e.response['Error']['Code'], e.response['Error']['Message'])
+                    e.response['Error']['Code'], e.response['Error']['Message']
                 )
                 debug_exit('error latest')
 
         else:
-            ctx.dlog('{}::[no update]::[existing_rules]::[{}]::[{}]'.format(log_prefix, sec_group['GroupId'], existing_rule))
+            ctx.dlog('{}::[no update]::[existing_rules]::[{}]::[{}]', log_prefix, sec_group['GroupId'], existing_rule)
 
 
-    ctx.vlog('{}::[completed]'.format(log_prefix))
+    ctx.vlog('{}::[completed]', log_prefix)
 
 
 @subcmd.command()
@@ -369,14 +414,15 @@ def duplicate_whitelisting_by_cidr(ctx, cidr_to_copy_from, cidr_to_add):
 @pass_context
 def describe_instances(ctx, limit, filters, output):
     log_prefix = '[describe_instances]'.format()
-    ctx.vlog('{}::[started]'.format(log_prefix))
-    ctx.vlog('{}::[limit]::[{}]'.format(log_prefix, str(limit)))
-    ctx.vlog('{}::[aws_profile]::[{}]'.format(log_prefix, str(ctx.obj['aws_profile'])))
-    ctx.vlog('{}::[output]::[{}]'.format(log_prefix, str(output)))
+    ctx.vlog('{}::[started]', log_prefix)
+    ctx.vlog('{}::[limit]::[{}]', log_prefix, str(limit))
+    ctx.vlog('{}::[aws_profile]::[{}]', log_prefix, str(ctx.obj['aws_profile']))
+    ctx.vlog('{}::[output]::[{}]', log_prefix, str(output))
 
     filters_search  = None
 
     if filters:
+        import yaml
         filters_file    = click.open_file(filters, 'r')
         filters_data    = yaml.safe_load(filters_file)
 
@@ -387,15 +433,15 @@ def describe_instances(ctx, limit, filters, output):
             limit = filters_data['limit']
 
     ctx.obj['instances']    = describeInstances(ctx, limit, filters_search)
-    ctx.vlog('{}::[instances found]::[{}]'.format(log_prefix, str(len(ctx.obj['instances']))))
-    ctx.vlog('{}::[filters_search]::[{}]'.format(log_prefix, str(filters_search)))
-    ctx.vlog('{}::[limit]::[{}]'.format(log_prefix, str(limit)))
+    ctx.vlog('{}::[instances found]::[{}]', log_prefix, str(len(ctx.obj['instances'])))
+    ctx.vlog('{}::[filters_search]::[{}]', log_prefix, str(filters_search))
+    ctx.vlog('{}::[limit]::[{}]', log_prefix, str(limit))
 
     if output is not None:
         json.dump(ctx.obj['instances'], output, default=str)
         output.write(",\n")
 
-    ctx.vlog('{}::[completed]'.format(log_prefix))
+    ctx.vlog('{}::[completed]', log_prefix)
 
 
 @subcmd.command()
@@ -403,11 +449,11 @@ def describe_instances(ctx, limit, filters, output):
 @pass_context
 def describe_ssh_key(ctx, ssh_key_dir):
     log_prefix = '[describe_ssh_key]'.format()
-    ctx.vlog('{}::[started]'.format(log_prefix))
+    ctx.vlog('{}::[started]', log_prefix)
     ctx.obj['ssh_keys'] = describeSshKeys(ssh_key_dir)
-    ctx.vlog('{}::[num keys found]::[{}]'.format(log_prefix, str(len(ctx.obj['ssh_keys']))))
-    ctx.dlog('{}::[keys found]::[{}]'.format(log_prefix, ctx.obj['ssh_keys']))
-    ctx.vlog('{}::[completed]'.format(log_prefix))
+    ctx.vlog('{}::[num keys found]::[{}]', log_prefix, str(len(ctx.obj['ssh_keys'])))
+    ctx.dlog('{}::[keys found]::[{}]', log_prefix, ctx.obj['ssh_keys'])
+    ctx.vlog('{}::[completed]', log_prefix)
 
 
 @subcmd.command()
@@ -419,11 +465,11 @@ def describe_ssh_key(ctx, ssh_key_dir):
 @pass_context
 def generate_instance_data(ctx, limit, filters, output, ssh_key_dir, test_all_ssh):
     log_prefix = '[generate_instance_data]'.format()
-    ctx.vlog('{}::[started]'.format(log_prefix))
-    ctx.vlog('{}::[limit]::[{}]'.format(log_prefix, str(limit)))
-    ctx.vlog('{}::[output]::[{}]'.format(log_prefix, str(output.name)))
-    ctx.vlog('{}::[ssh_key_dir]::[{}]'.format(log_prefix, str(ssh_key_dir)))
-    ctx.vlog('{}::[test_all_ssh]::[{}]'.format(log_prefix, str(test_all_ssh)))
+    ctx.vlog('{}::[started]', log_prefix)
+    ctx.vlog('{}::[limit]::[{}]', log_prefix, str(limit))
+    ctx.vlog('{}::[output]::[{}]', log_prefix, str(output.name))
+    ctx.vlog('{}::[ssh_key_dir]::[{}]', log_prefix, str(ssh_key_dir))
+    ctx.vlog('{}::[test_all_ssh]::[{}]', log_prefix, str(test_all_ssh))
 
     ctx_local = click.get_current_context()
     ctx_local.invoke(describe_ssh_key, ssh_key_dir = ssh_key_dir)
@@ -445,9 +491,9 @@ def generate_instance_data(ctx, limit, filters, output, ssh_key_dir, test_all_ss
                     output.write(',')
     output.write(']')
     output.close()
-    ctx.vlog('{}::[num_instances_found]::[{}]'.format(log_prefix, str(len(tested_instances))))
-    ctx.vlog('{}::[num_instances_total]::[{}]'.format(log_prefix, str(len(instances))))
-    ctx.vlog('{}::[completed]'.format(log_prefix))
+    ctx.vlog('{}::[num_instances_found]::[{}]', log_prefix, str(len(tested_instances)))
+    ctx.vlog('{}::[num_instances_total]::[{}]', log_prefix, str(len(instances)))
+    ctx.vlog('{}::[completed]', log_prefix)
 
 
 @subcmd.command()
@@ -471,10 +517,10 @@ def run_plan(ctx, plan, filters, output, rebuild_cache, cache_ttl):
         to modify the timeout or you can force it to rebuild by passing the `--rebuild_cache` option.
     """
     log_prefix = '[god_mode]'.format()
-    ctx.vlog('{}::[started]'.format(log_prefix))
-    ctx.vlog('{}::[plan]::[{}]'.format(log_prefix, str(plan)))
-    ctx.vlog('{}::[filters]::[{}]'.format(log_prefix, str(filters)))
-    ctx.vlog('{}::[output]::[{}]'.format(log_prefix, str(output)))
+    ctx.vlog('{}::[started]', log_prefix)
+    ctx.vlog('{}::[plan]::[{}]', log_prefix, str(plan))
+    ctx.vlog('{}::[filters]::[{}]', log_prefix, str(filters))
+    ctx.vlog('{}::[output]::[{}]', log_prefix, str(output))
     cached_instance_file    = 'data/cache/ec2-filters--{}.json'.format(click.format_filename(filters, True).replace('.yml', ''))
     fh                      = Path(cached_instance_file)
 
@@ -489,7 +535,7 @@ def run_plan(ctx, plan, filters, output, rebuild_cache, cache_ttl):
         # Delete the cached file if it's empty; likely exception caused a failed run.
         if os.path.getsize(cached_instance_file) == 0:
             os.remove(cached_instance_file)
-            ctx.log('{}::[no instances found]::[cached_instance_file]::[{}]'.format(log_prefix, cached_instance_file))
+            ctx.log('{}::[no instances found]::[cached_instance_file]::[{}]', log_prefix, cached_instance_file)
             #raise Exception('{}::[cached_instance_file]::[empty]::[{}]'.format(log_prefix, cached_instance_file))
             rebuild_cache = True
             fh = Path(cached_instance_file)
@@ -497,25 +543,21 @@ def run_plan(ctx, plan, filters, output, rebuild_cache, cache_ttl):
 
     # create new cache file
     except FileNotFoundError:
-        ctx.vlog('{}::[cached_instance_file]::[does not exist]::[{}]'.format(log_prefix, str(cached_instance_file)))
+        ctx.vlog('{}::[cached_instance_file]::[does not exist]::[{}]', log_prefix, str(cached_instance_file))
         rebuild_cache = True
 
     # use or rebuild cache file.
     else:
-        ctx.vlog('{}::[cached_instance_file]::[does exist]::[{}]'.format(log_prefix, str(cached_instance_file)))
+        ctx.vlog('{}::[cached_instance_file]::[does exist]::[{}]', log_prefix, str(cached_instance_file))
         time_now        = datetime.utcnow()
         time_fh         = datetime.utcfromtimestamp(fh_stat.st_mtime)
         difference      = time_now - time_fh
 
         if difference.seconds > cache_ttl or rebuild_cache is True:
-            ctx.vlog('{}::[cached_instance_file]::[rebuilding cache ({}) seconds old]::[{}]'.format(log_prefix, str(difference.seconds), str(cached_instance_file)))
-            import shutil
+            ctx.vlog('{}::[cached_instance_file]::[rebuilding cache ({}) seconds old]::[{}]', log_prefix, str(difference.seconds), str(cached_instance_file))
             rebuild_cache = True
-            file_from   = cached_instance_file
-            file_to     = '{}-expired_by-{}'.format(cached_instance_file, ctx.uuid)
-
-            ctx.vlog('{}::[cached_instance_file]::[moving]::[{}]::[to]::[{}]'.format(log_prefix, str(file_from), str(file_to)))
-            shutil.move(file_from, file_to)
+            ctx.vlog('{}::[cached_instance_file]::[removing]::[{}]', log_prefix, str(cached_instance_file))
+            os.remove(cached_instance_file)
 
     if rebuild_cache is True:
         fopen = click.open_file(cached_instance_file, 'w')
@@ -524,6 +566,7 @@ def run_plan(ctx, plan, filters, output, rebuild_cache, cache_ttl):
 
     try:
         if plan is not None:
+            import yaml
             plan_file           = click.open_file(plan, 'r')
             plan_data           = yaml.safe_load(plan_file)
     except FileNotFoundError as error:
@@ -531,9 +574,9 @@ def run_plan(ctx, plan, filters, output, rebuild_cache, cache_ttl):
 
     try:
         instance_data_file  = click.open_file(cached_instance_file, 'r')
-        ctx.vlog('{}'.format(instance_data_file))
+        ctx.vlog('{}', instance_data_file)
         instance_data_json  = json.load(instance_data_file)
-        ctx.vlog('{}::[number_instances_found]::[{}]'.format(log_prefix, str(len(instance_data_json))))
+        ctx.vlog('{}::[number_instances_found]::[{}]', log_prefix, str(len(instance_data_json)))
     except FileNotFoundError as error:
         raise Exception('{}::[cached_instance_file]::[not found]::[{}]::[{}]'.format(log_prefix, str(cached_instance_file), error))
 
@@ -546,8 +589,8 @@ def run_plan(ctx, plan, filters, output, rebuild_cache, cache_ttl):
     output.write('{},{},{},'.format(plan,cached_instance_file,datetime.utcnow().strftime('%Y/%m/%d %H:%M:%S UTC')))
     json.dump(results, output, default=str)
     output.write(",\n")
-    ctx.vlog('{}::[num results]::[{}]'.format(log_prefix, str(len(results))))
-    ctx.vlog('{}::[completed]'.format(log_prefix))
+    ctx.vlog('{}::[num results]::[{}]', log_prefix, str(len(results)))
+    ctx.vlog('{}::[completed]', log_prefix)
 
 
 @subcmd.command()
@@ -569,11 +612,12 @@ def get_ips(ctx, filters, output, rebuild_cache, cache_ttl):
     :return:
     """
     log_prefix = '[get-ips]'.format()
-    ctx.vlog('{}::[started]'.format(log_prefix))
+    ctx.vlog('{}::[started]', log_prefix)
 
     filters_search  = None
 
     if filters:
+        import yaml
         filters_file    = click.open_file(filters, 'r')
         filters_data    = yaml.safe_load(filters_file)
 
@@ -584,6 +628,7 @@ def get_ips(ctx, filters, output, rebuild_cache, cache_ttl):
             limit = filters_data['limit']
 
     instances = describeInstances(ctx, limit, filters_search)
+    ctx.vlog('{}::[source]::[{}]', log_prefix, ctx.last_call())
 
     if instances:
         print('{}\t{}\t{}\t{}\t{}'.format('Name', 'InstanceId', 'PublicDnsName', 'PublicIpAddress', 'PrivateIpAddress'))
@@ -598,7 +643,7 @@ def get_ips(ctx, filters, output, rebuild_cache, cache_ttl):
 
         print('{}\t{}\t{}\t{}\t{}'.format(name, instance['InstanceId'], instance['PublicDnsName'], instance['PublicIpAddress'], instance['PrivateIpAddress']))
 
-    ctx.vlog('{}::[instances found]::[{}]'.format(log_prefix, len(instances)))
-    ctx.dlog('{}::[instances]::[{}]'.format(log_prefix, instances))
-    ctx.vlog('{}::[finished]'.format(log_prefix))
+    ctx.vlog('{}::[instances found]::[{}]', log_prefix, len(instances))
+    ctx.dlog('{}::[instances]::[{}]', log_prefix, instances)
+    ctx.vlog('{}::[finished]', log_prefix)
 
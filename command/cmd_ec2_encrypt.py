@@ -1,7 +1,5 @@
 import click
-import boto3
 from cli import pass_context
-import botocore
 import sys
 
 #
@@ -28,17 +26,17 @@ def encrypt_instances(ctx, instance_id, kms_key, cleanup_please):
     log_prefix      = '[migrate_instance]'.format()
     ctx.instance_id = instance_id
     ctx.kms_key     = kms_key
-    ctx.vlog('{}::[started]'.format(log_prefix))
-    ctx.vlog('{}::[instance_id]::[{}]'.format(log_prefix, instance_id))
-    ctx.vlog('{}::[kms_key]::[{}]'.format(log_prefix, str(kms_key)))
-    ctx.vlog('{}::[aws_profile]::[{}]'.format(log_prefix, str(ctx.obj['aws_profile'])))
+    ctx.vlog('{}::[started]', log_prefix)
+    ctx.vlog('{}::[instance_id]::[{}]', log_prefix, instance_id)
+    ctx.vlog('{}::[kms_key]::[{}]', log_prefix, str(kms_key))
+    ctx.vlog('{}::[aws_profile]::[{}]', log_prefix, str(ctx.obj['aws_profile']))
 
-    client  = get_aws_client(ctx, 'ec2')
+    client  = ctx.get_aws_client('ec2')
     waiter_instance_exists = client.get_waiter('instance_exists')
 
     for id in instance_id:
 
-        ctx.vlog('{}::[get_instance]::[{}]'.format(log_prefix, str(id)))
+        ctx.vlog('{}::[get_instance]::[{}]', log_prefix, str(id))
         try:
             instance = get_instance(ctx, id)
             waiter_instance_exists.wait(InstanceIds=[id])
@@ -46,71 +44,42 @@ def encrypt_instances(ctx, instance_id, kms_key, cleanup_please):
             sys.exit('ERROR: {}'.format(e))
 
         if instance:
-            ctx.vlog('{}::[instance_exists]::[{}]'.format(log_prefix, str(id)))
+            ctx.vlog('{}::[instance_exists]::[{}]', log_prefix, str(id))
             shutdown_instance(ctx, instance)
             volume_data = encrypt_instance_volumes(ctx, instance)
             start_instance(ctx, instance)
 
             for cleanup in volume_data:
                 if cleanup_please:
-                    ctx.log('{}::[removing snapshot]::[{}]'.format(log_prefix, cleanup['snapshot'].id))
+                    ctx.log('{}::[removing snapshot]::[{}]', log_prefix, cleanup['snapshot'].id)
                     cleanup['snapshot'].delete()
 
-                    ctx.log('{}::[removing encrypted snapshot]::[{}]'.format(log_prefix, cleanup['snapshot_encrypted'].id))
+                    ctx.log('{}::[removing encrypted snapshot]::[{}]', log_prefix, cleanup['snapshot_encrypted'].id)
                     cleanup['snapshot_encrypted'].delete()
 
-                    ctx.log('{}::[removing original volume]::[{}]'.format(log_prefix, cleanup['volume'].id))
+                    ctx.log('{}::[removing original volume]::[{}]', log_prefix, cleanup['volume'].id)
                     cleanup['volume'].delete()
                 else:
-                    ctx.log('{}::[please remove snapshot]::[{}]'.format(log_prefix, cleanup['snapshot'].id))
-                    ctx.log('{}::[please remove encrypted snapshot]::[{}]'.format(log_prefix, cleanup['snapshot_encrypted'].id))
-                    ctx.log('{}::[please remove original volume::[{}]]'.format(log_prefix, cleanup['volume'].id))
+                    ctx.log('{}::[please remove snapshot]::[{}]', log_prefix, cleanup['snapshot'].id)
+                    ctx.log('{}::[please remove encrypted snapshot]::[{}]', log_prefix, cleanup['snapshot_encrypted'].id)
+                    ctx.log('{}::[please remove original volume::[{}]]', log_prefix, cleanup['volume'].id)
 
-            ctx.vlog('{}::[completed encryption migration]::[{}]'.format(log_prefix, instance.id))
+            ctx.vlog('{}::[completed encryption migration]::[{}]', log_prefix, instance.id)
 
-    ctx.vlog('{}::[completed]'.format(log_prefix))
-
-
-def get_aws_client(ctx, client_name = "ec2"):
-    if 'client_' + client_name in ctx.obj:
-        ctx.dlog('[get_aws_client]::[using existing session]')
-        client = ctx.obj['client_' + client_name]
-    else:
-        ctx.dlog('[get_aws_client]::[staring]::[get_aws_session ]')
-        session     = get_aws_session(ctx)
-        client      = session.client(client_name)
-        ctx.obj['client_' + client_name]    = client
-
-    return client
-
-
-def get_aws_session(ctx):
-    if 'session' in ctx.obj and ctx.obj['session'] is not None:
-        ctx.dlog('[get_aws_session]::[using existing session]')
-        session = ctx.obj['session']
-    elif ctx.obj['aws_profile'] != "":
-        ctx.dlog('[get_aws_session]::[starting session]::[with profile]::[{}]'.format(ctx.obj['aws_profile']))
-        session = boto3.session.Session(profile_name=ctx.obj['aws_profile'])
-    else:
-        ctx.dlog('[get_aws_session]::[starting session]::[no profile]')
-        session = boto3.session.Session()
-
-    ctx.obj['region']   = session.region_name
-    ctx.obj['session']  = session
-    ctx.dlog('[get_aws_session]::[region]::[{}]'.format(ctx.obj['region']))
-
-    return session
+    ctx.vlog('{}::[completed]', log_prefix)
 
 
 def get_instance(ctx, instance_id):
-    session                 = get_aws_session(ctx)
-    client                  = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    session                 = ctx.get_aws_session()
+    client                  = ctx.get_aws_client('ec2')
     ec2                     = session.resource('ec2')
     instance                = ec2.Instance(instance_id)
     waiter_instance_exists  = client.get_waiter('instance_exists')
 
     try:
-        ctx.vlog('[get_instance]::[waiter_instance_exists]::[{}]'.format(instance_id))
+        ctx.vlog('[get_instance]::[waiter_instance_exists]::[{}]', instance_id)
         waiter_instance_exists.wait(InstanceIds=[instance_id])
     except botocore.exceptions.WaiterError as e:
         sys.exit('[ERROR]::[get_instance]::[{}]'.format(e))
@@ -129,7 +98,9 @@ def is_available(instance):
 
 
 def shutdown_instance(ctx, instance):
-    client                                      = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    client                                      = ctx.get_aws_client('ec2')
     waiter_instance_stopped                     = client.get_waiter('instance_stopped')
     waiter_instance_stopped.config.max_attempts = 80
 
@@ -137,7 +108,7 @@ def shutdown_instance(ctx, instance):
         instance.stop()
 
     try:
-        ctx.vlog('[shutdown_instance]::[waiter_instance_stopped]::[{}]'.format(instance.id))
+        ctx.vlog('[shutdown_instance]::[waiter_instance_stopped]::[{}]', instance.id)
         waiter_instance_stopped.wait(InstanceIds=[instance.id])
     except botocore.exceptions.WaiterError as e:
         sys.exit('ERROR: {}'.format(e))
@@ -194,8 +165,10 @@ def encrypt_instance_volumes(ctx, instance):
 
 
 def create_snapshot(ctx, instance, volume):
-    session                                         = get_aws_session(ctx)
-    client                                          = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    session                                         = ctx.get_aws_session()
+    client                                          = ctx.get_aws_client('ec2')
     ec2                                             = session.resource('ec2')
     waiter_snapshot_complete                        = client.get_waiter('snapshot_completed')
     waiter_snapshot_complete.config.max_attempts    = 240
@@ -203,7 +176,7 @@ def create_snapshot(ctx, instance, volume):
     snapshot                                        = ec2.create_snapshot(VolumeId=volume.id, Description=desc)
 
     try:
-        ctx.vlog('[create_snapshot_real]::[waiter_snapshot_complete]::[{}]::[{}]'.format(instance.id, snapshot.id))
+        ctx.vlog('[create_snapshot_real]::[waiter_snapshot_complete]::[{}]::[{}]', instance.id, snapshot.id)
         waiter_snapshot_complete.wait(SnapshotIds=[snapshot.id])
     except botocore.exceptions.WaiterError as e:
         snapshot.delete()
@@ -213,10 +186,12 @@ def create_snapshot(ctx, instance, volume):
 
 
 def create_encrypted_snapshot(ctx, instance, volume, snapshot):
+    import botocore.exceptions
+
     region                      = ctx.obj['region']
     kms_key                     = ctx.kms_key
-    session                     = get_aws_session(ctx)
-    client                      = get_aws_client(ctx, 'ec2')
+    session                     = ctx.get_aws_session()
+    client                      = ctx.get_aws_client('ec2')
     ec2                         = session.resource('ec2')
     desc                        = '[ops-cli]::[encrypted]::[{}]::[{}]::[{}]'.format(instance.id, volume.id, snapshot.id)
     waiter_snapshot_complete    = client.get_waiter('snapshot_completed')
@@ -240,8 +215,10 @@ def create_encrypted_snapshot(ctx, instance, volume, snapshot):
 
 
 def create_encrypted_volume(ctx, instance, volume, snapshot, snapshot_encrypted):
-    session                 = get_aws_session(ctx)
-    client                  = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    session                 = ctx.get_aws_session()
+    client                  = ctx.get_aws_client('ec2')
     ec2                     = session.resource('ec2')
     waiter_volume_available = client.get_waiter('volume_available')
 
@@ -276,12 +253,14 @@ def create_encrypted_volume(ctx, instance, volume, snapshot, snapshot_encrypted)
 
 
 def detatch_current_volume(ctx, instance, volume, snapshot, snapshot_encrypted, volume_encrypted, current_volume_data):
-    client  = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    client  = ctx.get_aws_client('ec2')
     waiter_volume_available = client.get_waiter('volume_available')
 
     instance.detach_volume(VolumeId=volume.id, Device=current_volume_data['DeviceName'])
     try:
-        ctx.vlog('[create_encrypted_volume]::[waiter_volume_available]::[{}]::[detatching: {}]'.format(instance.id, volume.id))
+        ctx.vlog('[create_encrypted_volume]::[waiter_volume_available]::[{}]::[detatching: {}]', instance.id, volume.id)
         waiter_volume_available.wait(VolumeIds=[volume.id])
     except botocore.exceptions.WaiterError as e:
         snapshot.delete()
@@ -293,12 +272,14 @@ def detatch_current_volume(ctx, instance, volume, snapshot, snapshot_encrypted,
 
 
 def attach_encrypted_volume(ctx, instance, volume, snapshot, snapshot_encrypted, volume_encrypted, current_volume_data):
-    client                  = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    client                  = ctx.get_aws_client('ec2')
     waiter_volume_in_use    = client.get_waiter('volume_in_use')
     instance.attach_volume(VolumeId=volume_encrypted.id, Device=current_volume_data['DeviceName'])
 
     try:
-        ctx.vlog('[attach_encrypted_volume]::[waiter_volume_in_use]::[{}]::[attatching: {}]'.format(instance.id, volume_encrypted.id))
+        ctx.vlog('[attach_encrypted_volume]::[waiter_volume_in_use]::[{}]::[attatching: {}]', instance.id, volume_encrypted.id)
         waiter_volume_in_use.wait(VolumeIds=[volume_encrypted.id])
     except botocore.exceptions.WaiterError as e:
         snapshot.delete()
@@ -322,12 +303,14 @@ def update_device_mappings(instance, volume_data):
 
 
 def start_instance(ctx, instance):
-    client  = get_aws_client(ctx, 'ec2')
+    import botocore.exceptions
+
+    client  = ctx.get_aws_client('ec2')
     instance.start()
     waiter_instance_running = client.get_waiter('instance_running')
 
     try:
-        ctx.vlog('[start_instance]::[waiter_instance_running]::[{}]'.format(instance.id))
+        ctx.vlog('[start_instance]::[waiter_instance_running]::[{}]', instance.id)
         waiter_instance_running.wait(InstanceIds=[instance.id])
     except botocore.exceptions.WaiterError as e:
         sys.exit('ERROR: {}'.format(e))
\ No newline at end of file
@@ -18,7 +18,7 @@ def subcmd(ctx, profile, verbose, debug):
 def hello(ctx, names):
     log_prefix = '[hello]'
     for name in names:
-        ctx.log('{}::[{}]'.format(log_prefix, str(name)))
+        ctx.log('{}::[{}]', log_prefix, str(name))
 
 
 
@@ -28,4 +28,4 @@ def hello(ctx, names):
 def goodbye(ctx, names):
     log_prefix = '[goodbye]'
     for name in names:
-        ctx.log('{}::[{}]'.format(log_prefix, str(name)))
\ No newline at end of file
+        ctx.log('{}::[{}]', log_prefix, str(name))
\ No newline at end of file
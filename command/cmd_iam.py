@@ -3,8 +3,6 @@ from cli import pass_context
 
 #-{Import unique to this command}--------------------------------------------------------------------------------------#
 import sys
-import boto3
-import botocore
 import os
 from time import sleep
 import configparser
@@ -62,18 +60,23 @@ class RoleCollection(DataCollection):
             api_namespace='iam', api_name='list_roles', api_response_key='Roles', api_cache_ttl=9999999999,
             api_request_config={'PaginationConfig': {'MaxItems': limit}}, region=self.region
         )
-        for item in resources:
-            item.update(self.get_role(item['RoleName']))    # RoleLastUsed data inconsistent in list api still.
+        # RoleLastUsed data inconsistent in list api still, get_role is batched as there is a call per role.
+        roles = self.context.gather_from_aws_api([self.get_role_call(item['RoleName']) for item in resources])
+        for item, role in zip(resources, roles):
+            item.update(role if isinstance(role, dict) else {})
             data[item['RoleId']] = Role(**item)
 
         DataCollection.__init__(self, data)
 
+    def get_role_call(self, role_name):
+        return {
+            'api_namespace': 'iam', 'api_name': 'get_role', 'api_response_key': 'Role', 'api_cache_ttl': 9999999999,
+            'api_request_config': {'RoleName': role_name}, 'region': self.region
+        }
+
     def get_role(self, role_name):
         try:
-            return self.context.get_from_aws_api(
-                api_namespace='iam', api_name='get_role', api_response_key='Role', api_cache_ttl=9999999999,
-                api_request_config={'RoleName': role_name}, region=self.region
-            )
+            return self.context.get_from_aws_api(**self.get_role_call(role_name))
         except Exception as e:
             return {}
 
@@ -130,15 +133,15 @@ def subcmd(context, profile, verbose, debug):
     context.obj['aws_profile']  = profile
     context.verbose             = verbose
     context.debug               = debug
-    context.dlog('[{}].[{}].[{}]'.format(profile, verbose, debug))
+    context.dlog('[{}].[{}].[{}]', profile, verbose, debug)
 
 @subcmd.command()
 @click.option('-l', '--limit', envvar='LIMIT', default=99999, help='Define Limit')
 @pass_context
 def list_roles(context, limit):
     log_prefix = "list_roles"
-    context.dlog('[{}]::[started]::[]'.format(log_prefix))
+    context.dlog('[{}]::[started]::[]', log_prefix)
     RoleCollection(context=context, limit=limit).output()
-    context.dlog('[{}]::[completed]::[]'.format(log_prefix))
+    context.dlog('[{}]::[completed]::[]', log_prefix)
 
 
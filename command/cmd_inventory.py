@@ -0,0 +1,111 @@
+import click
+from cli import pass_context
+
+#-{Import unique to this command}--------------------------------------------------------------------------------------#
+import json
+from datetime import datetime
+from core.events import apply_delta, get_deltas
+from core.inventory import RESOURCE_TYPES
+
+#-{Command Function/Classes}-------------------------------------------------------------------------------------------#
+
+def format_time(timestamp):
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y/%m/%d %H:%M:%S UTC') if timestamp else ''
+
+
+def sync_region(context, region, resource_types):
+    """
+    Lists every resource type in a region and syncs it into the inventory.
+    :return: (Dict) resource type => [added, updated, removed, unchanged]
+    """
+    store   = context.get_inventory()
+    account = context.obj['caller_id']['Account']
+    rv      = {}
+    for resource_type in resource_types:
+        spec    = RESOURCE_TYPES[resource_type]
+        results = context.get_from_aws_api(
+            api_namespace=spec['api_namespace'], api_name=spec['api_name'], api_response_key=spec['api_response_key'],
+            api_request_config=spec['api_request_config'], region=region
+        ) or []
+        items               = spec['items'](results) if spec['items'] else results
+        rv[resource_type]   = store.sync(account, region, resource_type, items)
+        context.dlog('[inventory]::[sync]::[{}]::[{}]::[{}]', region, resource_type, rv[resource_type])
+    return rv
+
+#-{CLI Commands}-------------------------------------------------------------------------------------------------------#
+
+@click.group()
+@click.option('--profile', envvar='PROFILE', default="", help='AWS Configuration Profile Name')
+@click.option('-v', '--verbose', envvar='VERBOSE', is_flag=True, default=False, help='Enables verbose mode.')
+@click.option('-d', '--debug', envvar='DEBUG', is_flag=True, default=False, help='Enables verbose debug mode.')
+@pass_context
+def subcmd(context, profile, verbose, debug):
+    """Local inventory of AWS resources, queried by commands instead of describing them again."""
+    context.obj['aws_profile'] = profile
+    context.verbose = verbose
+    context.debug   = debug
+
+
+@subcmd.command()
+@click.option('--region', '-r', multiple=True, help='Region to sync, repeat for more or "all" for every enabled region; the session region when not set.')
+@click.option('--type', '-t', 'resource_types', multiple=True, type=click.Choice(list(RESOURCE_TYPES)), help='Resource type to sync, repeat for more; all when not set.')
+@click.option('--timeout', envvar='TIMEOUT', default=0, type=click.IntRange(0), help='Seconds the sync of all regions may take, regions not done by then are reported and not synced; zero is no limit (Default: 0).')
+@pass_context
+def sync(context, region, resource_types, timeout):
+    """Pull resources into the inventory, only writing those that changed since the last sync."""
+    resource_types  = list(resource_types or RESOURCE_TYPES)
+    outcomes        = context.fan_out_regions(lambda name: sync_region(context, name, resource_types), list(region), log_prefix='[inventory]::[sync]', timeout=timeout)
+
+    row     = '{:<16}{:<12}{:>10}{:>10}{:>10}{:>10}'
+    failed  = False
+    print(row.format('Region', 'Type', 'Added', 'Updated', 'Removed', 'Unchanged'))
+    for name, outcome in outcomes.items():
+        if outcome['error'] is not None:
+            failed = True
+            print('{:<16}[{}]::[{}]'.format(name, outcome['status'], outcome['error']))
+            continue
+        for resource_type, result in (outcome['results'] or {}).items():
+            print(row.format(name, resource_type, result['added'], result['updated'], result['removed'], result['unchanged']))
+
+    if failed:
+        raise click.ClickException('[inventory]::[sync]::[failed in some regions]')
+
+
+@subcmd.command()
+@pass_context
+def stats(context):
+    """Report the resources held per account, region and type, and when they were synced."""
+    store   = context.get_inventory()
+    row     = '{:<16}{:<16}{:<12}{:>10}  {}'
+    print(row.format('Account', 'Region', 'Type', 'Items', 'Synced'))
+    for entry in store.stats():
+        print(row.format(entry['account'], entry['region'], entry['resource_type'], entry['items'], format_time(entry['synced_at'])))
+    print('')
+    print('[inventory]::[{}]::[inventory_max_age]::[{}]'.format(store.db_path, context.inventory_max_age))
+
+
+@subcmd.command()
+@click.argument('files', nargs=-1, type=click.File('r'))
+@click.option('--dry-run', is_flag=True, default=False, help='Print the changes read from the events without applying them.')
+@click.option('--describe/--no-describe', default=True, help='Describe created or changed resources by id, or only invalidate their cached listings (Default: describe).')
+@pass_context
+def ingest(context, files, dry_run, describe):
+    """Apply CloudTrail/EventBridge events (JSON files, '-' for stdin) to the inventory and the cache."""
+    deltas = []
+    for file in files or [click.get_text_stream('stdin')]:
+        try:
+            deltas.extend(get_deltas(json.load(file)))
+        except ValueError as e:
+            raise click.ClickException('[inventory]::[ingest]::[{}]::[invalid json]::[{}]'.format(file.name, e))
+
+    row = '{:<28}{:<16}{:>10}{:>10}{:>10}{:>10}{:>12}'
+    if not dry_run:
+        print(row.format('Event', 'Region', 'Described', 'Deleted', 'Tagged', 'Patched', 'Invalidated'))
+    for delta in deltas:
+        if dry_run:
+            print(delta)
+            continue
+        result = apply_delta(context, delta, describe=describe)
+        print(row.format(delta.event_name[:27], delta.region, result['described'], result['deleted'], result['tagged'], result['patched'], result['invalidated']))
+
+    print('[inventory]::[ingest]::[events]::[{}]'.format(len(deltas)))
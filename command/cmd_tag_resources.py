@@ -3,8 +3,6 @@ from cli import pass_context
 
 #-{Import unique to this command}--------------------------------------------------------------------------------------#
 import sys
-import boto3
-import botocore
 import os
 from time import sleep
 import configparser
@@ -42,35 +40,35 @@ def get_name_from_description(description, matched_desc_patterns = ['i-', 'ami-'
 
 def get_rds_instance_tags(context, region):
     log_prefix = 'get_rds_instance_tags'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     instance_tags   = {}
     instances       = context.get_from_aws_api(
         api_namespace='rds', api_name='describe_db_instances', api_response_key='DBInstances',
-        api_cache_ttl=1, api_request_config={'PaginationConfig': {'MaxRecords': 99999}}, region=region
+        api_cache_ttl=context.cache_ttl, api_request_config={'PaginationConfig': {'MaxRecords': 99999}}, region=region
     )
 
     for instance in instances:
         instance_tags[instance['DBInstanceIdentifier']] = instance['TagList']
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return instance_tags
 
 
 def get_rds_cluster_tags(context, region):
     log_prefix = 'get_rds_instance_tags'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     instance_tags   = {}
     instances       = context.get_from_aws_api(
         api_namespace='rds', api_name='describe_db_clusters', api_response_key='DBClusters',
-        api_cache_ttl=1, api_request_config={'PaginationConfig': {'MaxRecords': 99999}}, region=region
+        api_cache_ttl=context.cache_ttl, api_request_config={'PaginationConfig': {'MaxRecords': 99999}}, region=region
     )
 
     for instance in instances:
         instance_tags[instance['DBClusterIdentifier']] = instance['TagList']
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return instance_tags
 
 
@@ -83,11 +81,11 @@ def get_ec2_tags(context, region, resource_types = ['instance']):
     :return: Dict with a key of the ResourceId and all tags associated.
     """
     log_prefix = 'get_ec2_tags'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     instances       = {}
     instance_tags   = context.get_from_aws_api(
-        api_namespace='ec2', api_name='describe_tags', api_response_key='Tags', api_cache_ttl=1,
+        api_namespace='ec2', api_name='describe_tags', api_response_key='Tags', api_cache_ttl=context.cache_ttl,
         api_request_config={
             'Filters': [{'Name': 'resource-type', 'Values': resource_types}],
             'PaginationConfig': {'MaxRecords': 99999}
@@ -103,7 +101,7 @@ def get_ec2_tags(context, region, resource_types = ['instance']):
         tags.append({'Key': instance_tag['Key'], 'Value': instance_tag['Value']})
         instances[instance_tag['ResourceId']] = tags
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return instances
 
 
@@ -189,7 +187,7 @@ def tag_resources(context, resources, region):
     client          = context.get_aws_client('resourcegroupstaggingapi', region)
     num_resources   = len(resources)
     i               = 1
-    context.dlog('[{}]::[started]::[{}]::[number of resources to tag]::[{}]'.format(log_prefix, region, num_resources))
+    context.dlog('[{}]::[started]::[{}]::[number of resources to tag]::[{}]', log_prefix, region, num_resources)
 
     print('...')
     sleep(.5)
@@ -210,16 +208,21 @@ def tag_resources(context, resources, region):
         resource_arn    = get_resource_arn(resource_id, region, account_id)
         tags_to_save    = get_resource_tags(context, tags)
 
-        context.dlog('[{}]::[tagging]::[{}]::[{}]::[resource]::[{} of {}]::{}'.format(log_prefix, region, resource_arn, i, num_resources, tags))
+        context.dlog('[{}]::[tagging]::[{}]::[{}]::[resource]::[{} of {}]::{}', log_prefix, region, resource_arn, i, num_resources, tags)
         i +=1
 
         if context.dry_run:
             print('[DRY RUN!]::[{}]::[tagging resource arn]::[{}]::{}'.format(region, resource_arn, tags))
         else:
             print('[CREATED TAGGING]::[{}]::[tagging resource arn]::[{}]::{}'.format(region, resource_arn, tags))
-            client.tag_resources(ResourceARNList=[resource_arn], Tags=tags_to_save)
+            response    = client.tag_resources(ResourceARNList=[resource_arn], Tags=tags_to_save)
+            failed      = response.get('FailedResourcesMap', {})
+            if resource_arn in failed:
+                print('[TAGGING FAILED]::[{}]::[tagging resource arn]::[{}]::{}'.format(region, resource_arn, failed[resource_arn]))
+                continue
+            context.write_through(region, tags_set={resource_arn: tags_to_save})
 
-    context.dlog('[{}]::[completed]::[{}]::[number of tagged resources]::[{}]'.format(log_prefix, region, num_resources))
+    context.dlog('[{}]::[completed]::[{}]::[number of tagged resources]::[{}]', log_prefix, region, num_resources)
 
 
 def get_volume_tags(context, region):
@@ -227,14 +230,17 @@ def get_volume_tags(context, region):
     sts_client  = context.get_aws_client('sts')
     account_id  = context.obj['caller_id']['Account']
 
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources_to_tag    = {}
     all_instance_tags   = get_ec2_tags(context, region)
-    volumes             = context.get_from_aws_api(
-        api_namespace='ec2', api_name='describe_volumes', api_response_key='Volumes',
-        api_cache_ttl=1, api_request_config={'PaginationConfig': {'MaxItems': 99999}}, region=region
-    )
+    volumes             = context.get_inventory_resources('volumes', region)
+    if volumes is None:
+        volumes = context.iter_from_aws_api(
+            api_namespace='ec2', api_name='describe_volumes', api_response_key='Volumes',
+            api_cache_ttl=context.cache_ttl, api_request_config={'PaginationConfig': {'MaxItems': 99999}}, region=region,
+            fields=['VolumeId', 'Attachments', 'Tags']
+        )
 
     # try to name the resource first.
     # if the volume doesn't use a required tag, we look to the attached ec2 node tags in it's place.
@@ -256,7 +262,7 @@ def get_volume_tags(context, region):
                 break
 
         if not instance_tags:
-            context.dlog('[tag_volumes]::[no parent tags for]::[{}]::[{}]'.format(volume['VolumeId'], region))
+            context.dlog('[tag_volumes]::[no parent tags for]::[{}]::[{}]', volume['VolumeId'], region)
             continue
 
         for tag_key, tag_config in context.tag_configuration.items():
@@ -271,20 +277,20 @@ def get_volume_tags(context, region):
         if tags_for_resource:
             resources_to_tag[volume['VolumeId']] = tags_for_resource
         else:
-            context.dlog('[tag_volumes]::[no tags updated for]::[{}]'.format(volume['VolumeId'], region))
+            context.dlog('[tag_volumes]::[no tags updated for]::[{}]', volume['VolumeId'], region)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_snapshot_tags(context, region):
     log_prefix  = 'get_snapshot_tags'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources_to_tag    = {}
     all_parent_tags     = get_ec2_tags(context, region, ['volume'])
-    resources           = context.get_from_aws_api(
-        api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots',api_cache_ttl=1,
+    resources           = context.iter_from_aws_api(
+        api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots',api_cache_ttl=context.cache_ttl,
         api_request_config={'OwnerIds': ['self'], 'PaginationConfig': {'MaxItems': 99999}}, region=region
     )
 
@@ -306,13 +312,13 @@ def get_snapshot_tags(context, region):
                     tags_for_resource.append({'Key': 'Name', 'Value': '{}'.format(name_tag)})
 
         if not parent_tags:
-            context.dlog('[{}]::[started]::[no parent tags for]::[{}]::[{}]'.format(log_prefix, resource['SnapshotId'], region))
+            context.dlog('[{}]::[started]::[no parent tags for]::[{}]::[{}]', log_prefix, resource['SnapshotId'], region)
             continue
 
         for tag_key, tag_config in context.tag_configuration.items():
             existing_tag = get_by_key_match(existing_tags, 'Key', tag_config['name'])
             if existing_tag:
-                context.dlog('[tag_snapshots]::[tag already set]::[{}]::[{}]::[{}]'.format(resource['SnapshotId'], region, tag_config['name']))
+                context.dlog('[tag_snapshots]::[tag already set]::[{}]::[{}]::[{}]', resource['SnapshotId'], region, tag_config['name'])
                 continue
 
             parent_tag = get_by_key_match(parent_tags, 'Key', tag_config['name'])
@@ -322,21 +328,21 @@ def get_snapshot_tags(context, region):
         if tags_for_resource:
             resources_to_tag[resource['SnapshotId']] = tags_for_resource
         else:
-            context.dlog('[tag_snapshots]::[no tags updated for]::[{}]'.format(resource['SnapshotId'], region))
+            context.dlog('[tag_snapshots]::[no tags updated for]::[{}]', resource['SnapshotId'], region)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_rds_instance_snapshot_tags(context, region):
     log_prefix  = 'get_rds_instance_snapshot_tags'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources_to_tag    = {}
     all_parent_tags     = get_rds_instance_tags(context, region)
     resources           = context.get_from_aws_api(
         api_namespace='rds', api_name='describe_db_snapshots', api_response_key='DBSnapshots',
-        api_cache_ttl=1, api_request_config={'PaginationConfig': {'MaxItems': 9999}}, region=region
+        api_cache_ttl=context.cache_ttl, api_request_config={'PaginationConfig': {'MaxItems': 9999}}, region=region
     )
 
     for resource in resources:
@@ -357,13 +363,13 @@ def get_rds_instance_snapshot_tags(context, region):
                     tags_for_resource.append({'Key': 'Name', 'Value': '{}'.format(name_tag)})
 
         if not parent_tags:
-            context.dlog('[{}]::[no parent tags for]::[{}]::[{}]'.format(log_prefix, resource['DBSnapshotIdentifier'], region))
+            context.dlog('[{}]::[no parent tags for]::[{}]::[{}]', log_prefix, resource['DBSnapshotIdentifier'], region)
             continue
 
         for tag_key, tag_config in context.tag_configuration.items():
             existing_tag = get_by_key_match(existing_tags, 'Key', tag_config['name'])
             if existing_tag:
-                context.dlog('[{}]::[tag already set]::[{}]::[{}]::[{}]'.format(log_prefix, resource['DBSnapshotIdentifier'], region, tag_config['name']))
+                context.dlog('[{}]::[tag already set]::[{}]::[{}]::[{}]', log_prefix, resource['DBSnapshotIdentifier'], region, tag_config['name'])
                 continue
 
             parent_tag = get_by_key_match(parent_tags, 'Key', tag_config['name'])
@@ -373,21 +379,21 @@ def get_rds_instance_snapshot_tags(context, region):
         if tags_for_resource:
             resources_to_tag[resource['DBSnapshotArn']] = tags_for_resource
         else:
-            context.dlog('[{}]::[no tags updated fo]::[{}]::[{}]'.format(log_prefix, resource['DBSnapshotIdentifier'], region))
+            context.dlog('[{}]::[no tags updated fo]::[{}]::[{}]', log_prefix, resource['DBSnapshotIdentifier'], region)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_rds_cluster_snapshot_tags(context, region):
     log_prefix  = 'get_rds_cluster_snapshot_tags'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources_to_tag    = {}
     all_parent_tags     = get_rds_cluster_tags(context, region)
     resources           = context.get_from_aws_api(
         api_namespace='rds', api_name='describe_db_cluster_snapshots', api_response_key='DBClusterSnapshots',
-        api_cache_ttl=1, api_request_config={'PaginationConfig': {'MaxItems': 99999}}, region=region
+        api_cache_ttl=context.cache_ttl, api_request_config={'PaginationConfig': {'MaxItems': 99999}}, region=region
     )
 
     for resource in resources:
@@ -408,13 +414,13 @@ def get_rds_cluster_snapshot_tags(context, region):
                     tags_for_resource.append({'Key': 'Name', 'Value': '{}'.format(name_tag)})
 
         if not parent_tags:
-            context.dlog('[{}]::[no parent tags for]::[{}]::[{}]'.format(log_prefix, resource['DBClusterSnapshotIdentifier'], region))
+            context.dlog('[{}]::[no parent tags for]::[{}]::[{}]', log_prefix, resource['DBClusterSnapshotIdentifier'], region)
             continue
 
         for tag_key, tag_config in context.tag_configuration.items():
             existing_tag = get_by_key_match(existing_tags, 'Key', tag_config['name'])
             if existing_tag:
-                context.dlog('[{}]::[tag already set]::[{}]::[{}]::[{}]'.format(log_prefix, resource['DBClusterSnapshotIdentifier'], region, tag_config['name']))
+                context.dlog('[{}]::[tag already set]::[{}]::[{}]::[{}]', log_prefix, resource['DBClusterSnapshotIdentifier'], region, tag_config['name'])
                 continue
 
             parent_tag = get_by_key_match(parent_tags, 'Key', tag_config['name'])
@@ -424,9 +430,9 @@ def get_rds_cluster_snapshot_tags(context, region):
         if tags_for_resource:
             resources_to_tag[resource['DBClusterSnapshotArn']] = tags_for_resource
         else:
-            context.dlog('[{}]::[no tags updated fo]::[{}]::[{}]'.format(log_prefix, resource['DBClusterSnapshotIdentifier'], region))
+            context.dlog('[{}]::[no tags updated fo]::[{}]::[{}]', log_prefix, resource['DBClusterSnapshotIdentifier'], region)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
@@ -436,35 +442,51 @@ def tag_inheritable_resources(context):
     account_id  = context.obj['caller_id']['Account']
     dry_run     = context.dry_run
     regions     = context.regions
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, account_id))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, account_id)
 
     if dry_run:
-        context.dlog('[{}]::[dry_run]::[{}]'.format(log_prefix, account_id))
+        context.dlog('[{}]::[dry_run]::[{}]', log_prefix, account_id)
 
-    for region in regions:
-        context.dlog('[{}]::[dry_run]::[{}]::[started region]::[{}]'.format(log_prefix, account_id, region))
+    # discovery only reads from aws, all regions are fetched at once and then tagged one region at a time.
+    inheritable_types   = [
+        ('Volumes', get_volume_tags),
+        ('EC2 Snapshots', get_snapshot_tags),
+        ('RDS Instance Snapshots', get_rds_instance_snapshot_tags),
+        ('RDS Cluster Snapshots', get_rds_cluster_snapshot_tags)
+    ]
 
+    def discover_region(region):
         # order of operations (volumes, snapshots) required to ensure snaps can use volume tags if available.
+        discovered = []
+        for resource_type, get_tags in inheritable_types:
+            try:
+                discovered.append((resource_type, get_tags(context, region)))
+            except Exception as e:
+                # a service missing from the region only skips its own resources, not those of the other services.
+                reason = context.get_unavailable_reason(e)
+                if reason is None:
+                    raise e
+                context.vlog('[{}]::[{}]::[{}]::[skipped]::[{}]::[{}]', log_prefix, region, resource_type, reason, e)
+                discovered.append((resource_type, {}))
+        return discovered
+
+    print('')
+    print('Checking for inheritable resources to tag in {}...'.format(list(regions)))
+    discovered  = context.fan_out_regions(discover_region, regions, log_prefix='[{}]'.format(log_prefix))
+
+    for region in regions:
+        context.dlog('[{}]::[dry_run]::[{}]::[started region]::[{}]', log_prefix, account_id, region)
+        if discovered[region]['error'] is not None:
+            raise discovered[region]['error']
+
         resources_to_tag    = {}
         print('')
         print('==================================================================')
         print('Checking for inheritable resources to tag in [{}]...'.format(region))
 
-        resources   = get_volume_tags(context, region)
-        resources_to_tag.update(resources)
-        print('Found [{}] [Volumes] to tag in [{}]'.format(len(resources), region))
-
-        resources   = get_snapshot_tags(context, region)
-        resources_to_tag.update(resources)
-        print('Found [{}] [EC2 Snapshots] to tag in [{}]'.format(len(resources), region))
-
-        resources   = get_rds_instance_snapshot_tags(context, region)
-        resources_to_tag.update(resources)
-        print('Found [{}] [RDS Instance Snapshots] to tag in [{}]'.format(len(resources), region))
-
-        resources   = get_rds_cluster_snapshot_tags(context, region)
-        resources_to_tag.update(resources)
-        print('Found [{}] [RDS Cluster Snapshots] to tag in [{}]'.format(len(resources), region))
+        for resource_type, resources in discovered[region]['results']:
+            resources_to_tag.update(resources)
+            print('Found [{}] [{}] to tag in [{}]'.format(len(resources), resource_type, region))
 
         num_resources   = len(resources_to_tag)
         print('')
@@ -476,9 +498,9 @@ def tag_inheritable_resources(context):
         else:
             print('Skipping::[inheritable_resources]::[found]::[{}]::[inheritable_resources]'.format(region, num_resources))
 
-        context.dlog('[{}]::[completed region]::[{}]::[started region]::[{}]'.format(log_prefix, account_id, region))
+        context.dlog('[{}]::[completed region]::[{}]::[started region]::[{}]', log_prefix, account_id, region)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, account_id))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, account_id)
 
 
 def ask_tag_value(context, tag_config, current_tag_value = None):
@@ -489,7 +511,7 @@ def ask_tag_value(context, tag_config, current_tag_value = None):
     :return:
     """
     log_prefix  = 'tag_inheritable_resources'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, current_tag_value))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, current_tag_value)
 
     question    = '\nTag Name: [{}] \nPurpose: {}\nExamples: ({})\nEnter a value for ({}) '.format(
         tag_config['name'], tag_config['purpose'], tag_config['examples'], tag_config['name']
@@ -499,7 +521,7 @@ def ask_tag_value(context, tag_config, current_tag_value = None):
         question = 'Enter a value for ({}) '.format(tag_config['name'])
 
     if not 'changed_values' in tag_config:
-        context.dlog('[{}]::[changed_values]::[created]'.format(log_prefix))
+        context.dlog('[{}]::[changed_values]::[created]', log_prefix)
         tag_config['changed_values']    = {}
 
     if tag_config['allowed_values']:
@@ -514,7 +536,7 @@ def ask_tag_value(context, tag_config, current_tag_value = None):
 
         # if there's no existing tag, we'll try to guess by finding the last time this tag was defined.
         elif tag_config['name'] in tag_config['changed_values']:
-            context.dlog('[{}]::[changed_values]::[matched for]::[{}]'.format(log_prefix, current_tag_value))
+            context.dlog('[{}]::[changed_values]::[matched for]::[{}]', log_prefix, current_tag_value)
             current_tag_value   = tag_config['changed_values'][tag_config['name']]
 
         if not context.expert_mode:
@@ -536,7 +558,7 @@ def ask_tag_value(context, tag_config, current_tag_value = None):
         print('ERROR!! Value must not be empty.')
         tag_value = ask_tag_value(context, tag_config, current_tag_value)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, tag_value))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, tag_value)
     return tag_value
 
 
@@ -576,12 +598,12 @@ def get_tag_config(context, tag):
 
 def get_tag_answers(context, resource_tags, service_name = None):
     log_prefix = 'get_tag_answers'
-    context.dlog('[{}]::[started]'.format(log_prefix))
+    context.dlog('[{}]::[started]', log_prefix)
     tags_to_save    = []
 
     for tag_key,tag_config in context.tag_configuration.items():
         if service_name in tag_config['hide_for_services']:
-            context.dlog('[{}]::[{}]::[tag is hidden for this service]::[{}]'.format(log_prefix, tag_config['name'], service_name))
+            context.dlog('[{}]::[{}]::[tag is hidden for this service]::[{}]', log_prefix, tag_config['name'], service_name)
             continue
 
         current_tag_value   = get_by_key_match(resource_tags, 'Key', tag_config['name'], 'Value')
@@ -599,10 +621,10 @@ def get_tag_answers(context, resource_tags, service_name = None):
 
         tag_value = ask_tag_value(context, tag_config, current_tag_value)
         if tag_value:
-            context.dlog('[{}]::[tags_to_save]::[{}]::[{}]'.format(log_prefix, tag_config['name'], tag_value))
+            context.dlog('[{}]::[tags_to_save]::[{}]::[{}]', log_prefix, tag_config['name'], tag_value)
             tags_to_save.append({'Key': tag_config['name'], 'Value': tag_value})
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, tags_to_save))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, tags_to_save)
 
     return tags_to_save
 
@@ -610,7 +632,7 @@ def get_tag_answers(context, resource_tags, service_name = None):
 def get_ecr_resources(context, region):
     log_prefix          = 'get_ecr_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='ecr', api_name='describe_repositories', api_response_key='repositories', api_cache_ttl=1,
@@ -625,14 +647,14 @@ def get_ecr_resources(context, region):
         )
         resources_to_tag[resource['repositoryArn']]   = tags if tags else []
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_efs_resources(context, region):
     log_prefix          = 'get_efs_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='efs', api_name='describe_file_systems', api_response_key='FileSystems', api_cache_ttl=1,
@@ -642,14 +664,14 @@ def get_efs_resources(context, region):
     for resource in resources:
         resources_to_tag[resource['FileSystemArn']]   = resource['Tags'] if 'Tags' in resource else []
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_ec2_asg_resources(context, region):
     log_prefix          = 'get_ec2_asg_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='autoscaling', api_name='describe_auto_scaling_groups', api_response_key='AutoScalingGroups', api_cache_ttl=1,
@@ -659,25 +681,28 @@ def get_ec2_asg_resources(context, region):
     for resource in resources:
         resources_to_tag[resource['AutoScalingGroupARN']]   = resource['Tags'] if 'Tags' in resource else []
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_ec2_resources(context, region):
     log_prefix          = 'get_ec2_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
-
-    resources = context.get_from_aws_api(
-        api_namespace='ec2', api_name='describe_instances', api_response_key='Reservations', api_cache_ttl=1,
-        api_request_config={'PaginationConfig': {'MaxResults': 99999}}, region=region
-    )
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
+
+    resources = context.get_inventory_resources('instances', region)
+    if resources is None:
+        reservations = context.get_from_aws_api(
+            api_namespace='ec2', api_name='describe_instances', api_response_key='Reservations', api_cache_ttl=context.cache_ttl,
+            api_request_config={'PaginationConfig': {'MaxResults': 99999}}, region=region,
+            fields='{Instances: Instances[].{InstanceId: InstanceId, Tags: Tags}}'
+        )
+        resources = [resource for reservation in reservations for resource in reservation['Instances']]
 
-    for reservation in resources:
-        for resource in reservation['Instances']:
-            resources_to_tag[resource['InstanceId']] = resource['Tags'] if 'Tags' in resource else []
+    for resource in resources:
+        resources_to_tag[resource['InstanceId']] = resource.get('Tags') or []
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
@@ -689,11 +714,11 @@ def get_loadbalancer_resources(context, region):
     :return:
     """
     log_prefix          = 'get_elb_resources'
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
     resources_to_tag    = {}
     resources_to_tag.update(get_elb_resources(context, region))
     resources_to_tag.update(get_lb_resources(context, region))
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 def get_normalized_tags(context, resource_tags):
@@ -732,9 +757,11 @@ def get_resource_tags(context, resource_tags):
 
 
 def get_lb_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_lb_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     load_balancers = context.get_from_aws_api(
         api_namespace='elbv2', api_name='describe_load_balancers', api_response_key='LoadBalancers',
@@ -749,19 +776,21 @@ def get_lb_resources(context, region):
             )
             lb_tags = lb_tags[0]['Tags']
         except botocore.exceptions.ClientError as error:
-            context.dlog('[{}]::[resource has no tags]::[{}]::[{}]'.format(log_prefix, region, load_balancer['LoadBalancerArn']))
+            context.dlog('[{}]::[resource has no tags]::[{}]::[{}]', log_prefix, region, load_balancer['LoadBalancerArn'])
             lb_tags = []
 
         resources_to_tag[load_balancer['LoadBalancerArn']] = lb_tags
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_elb_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_elb_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     load_balancers = context.get_from_aws_api(
         api_namespace='elb', api_name='describe_load_balancers', api_response_key='LoadBalancerDescriptions',
@@ -776,21 +805,23 @@ def get_elb_resources(context, region):
             )
             lb_tags = lb_tags[0]['Tags']
         except botocore.exceptions.ClientError as error:
-            context.dlog('[{}]::[resource has no tags]::[{}]'.format(log_prefix, region))
+            context.dlog('[{}]::[resource has no tags]::[{}]', log_prefix, region)
             lb_tags = []
 
         # prefix in order to generate an arn from this later, api doesn't return the arn for some hurtful reason.
         # they also don't return tags either, see how we had to make another api call just for them? :(
         resources_to_tag['elb-{}'.format(load_balancer['LoadBalancerName'])] = lb_tags
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_elastic_search_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_elasticache_tags'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     domains_available = context.get_from_aws_api(
         api_namespace='es', api_name='list_domain_names', api_response_key='DomainNames', api_cache_ttl=3600,
@@ -807,26 +838,28 @@ def get_elastic_search_resources(context, region):
     )
 
     for domain in domains:
-        context.dlog('[{}]::[domain]::[{}]::[{}]'.format(log_prefix, region, domain['DomainName']))
+        context.dlog('[{}]::[domain]::[{}]::[{}]', log_prefix, region, domain['DomainName'])
         try:
             tags_for_resource = context.get_from_aws_api(
                 api_namespace='es', api_name='list_tags', api_response_key='TagList', api_cache_ttl=1,
                 api_request_config={'ARN': domain['ARN']}, region=region
             )
         except botocore.exceptions.ClientError as error:
-            context.dlog('[tag_es]::[resource has no tags]::[{}]'.format(error))
+            context.dlog('[tag_es]::[resource has no tags]::[{}]', error)
             tags_for_resource = []
 
         resources_to_tag[domain['ARN']] = tags_for_resource
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_elasticache_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_elasticache_tags'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
     cache_clusters  = context.get_from_aws_api(
         api_namespace='elasticache',  api_name='describe_cache_clusters', api_response_key='CacheClusters',
         api_cache_ttl=1, api_request_config={'PaginationConfig': {'MaxRecords': 99999}, 'ShowCacheNodeInfo': True},
@@ -834,26 +867,28 @@ def get_elasticache_resources(context, region):
     )
 
     for cache_cluster in cache_clusters:
-        context.dlog('[{}]::[cache_cluster]::[{}]'.format(log_prefix, cache_cluster['CacheClusterId']))
+        context.dlog('[{}]::[cache_cluster]::[{}]', log_prefix, cache_cluster['CacheClusterId'])
         try:
             tags_for_resource = context.get_from_aws_api(
                 api_namespace='elasticache', api_name='list_tags_for_resource', api_response_key='TagList',
                 api_cache_ttl=1, api_request_config={'ResourceName': cache_cluster['ARN']}, region=region
             )
         except botocore.exceptions.ClientError as error:
-            context.dlog('[{}]::[resource has no tags]::[{}]'.format(log_prefix, format(error)))
+            context.dlog('[{}]::[resource has no tags]::[{}]', log_prefix, format(error))
             tags_for_resource = []
 
         resources_to_tag[cache_cluster['ARN']] = tags_for_resource
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_s3_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_s3_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     s3_buckets = context.get_from_aws_api(
         api_namespace='s3', api_name='list_buckets', api_response_key='Buckets', api_cache_ttl=1,
@@ -861,26 +896,28 @@ def get_s3_resources(context, region):
     )
 
     for s3_bucket in s3_buckets:
-        context.dlog('[{}]::[s3_bucket]::[{}]::[{}]'.format(log_prefix, region, s3_bucket['Name']))
+        context.dlog('[{}]::[s3_bucket]::[{}]::[{}]', log_prefix, region, s3_bucket['Name'])
         try:
             tags_for_resource    = context.get_from_aws_api(
                 api_namespace='s3', api_name='get_bucket_tagging', api_response_key='TagSet', api_cache_ttl=1,
                 api_request_config={'Bucket': s3_bucket['Name']}, region=region
             )
         except botocore.exceptions.ClientError as error:
-            context.dlog('[{}]::[s3_bucket has no tags]::[{}]::[{}]'.format(log_prefix, region, error))
+            context.dlog('[{}]::[s3_bucket has no tags]::[{}]::[{}]', log_prefix, region, error)
             tags_for_resource  = []
 
         resources_to_tag['s3-{}'.format(s3_bucket['Name'])] = tags_for_resource
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_rds_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_s3_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     instances = context.get_from_aws_api(
         api_namespace='rds', api_name='describe_db_instances', api_response_key='DBInstances', api_cache_ttl=3600,
@@ -888,7 +925,7 @@ def get_rds_resources(context, region):
     )
 
     for db_instance in instances:
-        context.dlog('[{}]::[instance]::[{}]'.format(log_prefix, db_instance['DBInstanceArn']))
+        context.dlog('[{}]::[instance]::[{}]', log_prefix, db_instance['DBInstanceArn'])
         db_instance_name    = db_instance['DBInstanceIdentifier'] if 'DBInstanceIdentifier' in db_instance else None
         db_instance_arn     = db_instance['DBInstanceArn'] if 'DBInstanceArn' in db_instance else None
         db_cluster_name     = db_instance['DBClusterIdentifier'] if 'DBClusterIdentifier' in db_instance else None
@@ -898,21 +935,21 @@ def get_rds_resources(context, region):
 
         try:
             tags_for_instance = context.get_from_aws_api(
-                api_namespace='rds', api_name='list_tags_for_resource', api_response_key='TagList', api_cache_ttl=1,
+                api_namespace='rds', api_name='list_tags_for_resource', api_response_key='TagList', api_cache_ttl=context.cache_ttl,
                 api_request_config={'ResourceName': db_instance_arn}, region=region
             )
         except botocore.exceptions.ClientError as error:
-            context.dlog('[{}]::[resource has no tags]::[{}]'.format(log_prefix, error))
+            context.dlog('[{}]::[resource has no tags]::[{}]', log_prefix, error)
 
         if db_cluster_name:
             db_cluster_arn = db_instance_arn.replace(':db:' + db_instance_name, ':cluster:' + db_cluster_name)
             try:
                 tags_for_cluster    = context.get_from_aws_api(
-                    api_namespace='rds', api_name='list_tags_for_resource', api_response_key='TagList', api_cache_ttl=1,
+                    api_namespace='rds', api_name='list_tags_for_resource', api_response_key='TagList', api_cache_ttl=context.cache_ttl,
                     api_request_config={'ResourceName': db_cluster_arn}, region=region
                 )
             except botocore.exceptions.ClientError as error:
-                context.dlog('[tag_rds]::[resource has no tags]::[{}]'.format(error))
+                context.dlog('[tag_rds]::[resource has no tags]::[{}]', error)
 
         if db_instance_arn:
             resources_to_tag[db_instance_arn] = tags_for_instance
@@ -920,14 +957,14 @@ def get_rds_resources(context, region):
         if db_cluster_arn:
             resources_to_tag[db_cluster_arn] = tags_for_cluster
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_redshift_resources(context, region):
     log_prefix          = 'get_s3_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='redshift', api_name='describe_clusters', api_response_key='Clusters',
@@ -937,14 +974,16 @@ def get_redshift_resources(context, region):
     for resource in resources:
         resources_to_tag['redshift-{}'.format(resource['ClusterIdentifier'])] = resource['Tags'] if 'Tags' in resource else []
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_lambda_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_lambda_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='lambda', api_name='list_functions', api_response_key='Functions',
@@ -958,19 +997,19 @@ def get_lambda_resources(context, region):
                 api_request_config={'Resource': resource['FunctionArn']}, region=region
             )
         except botocore.exceptions.ClientError as error:
-            context.dlog('[{}]::[resource has no tags]::[{}]'.format(log_prefix, error))
+            context.dlog('[{}]::[resource has no tags]::[{}]', log_prefix, error)
             tags_for_resource = []
 
         resources_to_tag[resource['FunctionArn']] = get_normalized_tags(context, tags_for_resource)
 
-    context.dlog('[{}]::[completed]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[completed]::[{}]', log_prefix, region)
     return resources_to_tag
 
 
 def get_pinpoint_resources(context, region):
     log_prefix          = 'get_pinpoint_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='pinpoint', api_name='get_apps', api_response_key='ApplicationsResponse',
@@ -985,9 +1024,11 @@ def get_pinpoint_resources(context, region):
 
 
 def get_cloudfront_resources(context, region):
+    import botocore.exceptions
+
     log_prefix          = 'get_cloudfront_resources'
     resources_to_tag    = {}
-    context.dlog('[{}]::[started]::[{}]'.format(log_prefix, region))
+    context.dlog('[{}]::[started]::[{}]', log_prefix, region)
 
     resources = context.get_from_aws_api(
         api_namespace='cloudfront', api_name='list_distributions', api_response_key='DistributionList',
@@ -1003,7 +1044,7 @@ def get_cloudfront_resources(context, region):
                 )
                 tags_for_resource   = tags_for_resource['Items'] if 'Items' in tags_for_resource else []
             except botocore.exceptions.ClientError as error:
-                context.dlog('[{}]::[resource has no tags]::[{}]'.format(log_prefix, error))
+                context.dlog('[{}]::[resource has no tags]::[{}]', log_prefix, error)
                 tags_for_resource = []
 
             resources_to_tag[resource['ARN']] = get_normalized_tags(context, tags_for_resource)
@@ -1011,9 +1052,13 @@ def get_cloudfront_resources(context, region):
     return resources_to_tag
 
 
+# boto3 service name of the services that are not named after it.
+SERVICE_CLIENTS = {'ec2:asg': 'autoscaling', 'ecr:repos': 'ecr'}
+
+
 def tag_service_resources(context, service, region):
     log_prefix = 'tag_service_resources_v2'
-    context.dlog('[{}]::[starting]::[{}]::[{}]'.format(log_prefix, service, region))
+    context.dlog('[{}]::[starting]::[{}]::[{}]', log_prefix, service, region)
     resources_to_tag    = {}
     sts_client          = context.get_aws_client('sts')
     account_id          = context.obj['caller_id']['Account']
@@ -1037,7 +1082,7 @@ def tag_service_resources(context, service, region):
 
     # send to legacy service handler.
     if service not in supported_services:
-        context.dlog('[{}]::[ERROR]::[unsupported service]::[{}]::[{}]'.format(log_prefix, service, region))
+        context.dlog('[{}]::[ERROR]::[unsupported service]::[{}]::[{}]', log_prefix, service, region)
         print('Yikes!! "{}" in "{}", is not yet a supported service of this tagging tool, please do not do that again.'.format(service, region))
         return
 
@@ -1073,7 +1118,7 @@ def tag_service_resources(context, service, region):
     else:
         print('Skipping::[{}]::[{}]::[found]::[{}]::[resources]'.format(region, service, num_resources))
 
-    context.dlog('[{}]::[completed]::[{}]::[{}]'.format(log_prefix, service, region))
+    context.dlog('[{}]::[completed]::[{}]::[{}]', log_prefix, service, region)
 
 
 #-{CLI Commands}-------------------------------------------------------------------------------------------------------#
@@ -1083,18 +1128,20 @@ def tag_service_resources(context, service, region):
 @click.option('-v', '--verbose', envvar='VERBOSE', is_flag=True, default=False, help='Enables verbose mode.')
 @click.option('-d', '--debug', envvar='DEBUG', is_flag=True, default=False, help='Enables verbose debug mode.')
 @click.option('-y', '--dry-run', envvar='DRY_RUN', is_flag=True, default=False, help='Enables a Dry run (no changes)')
+@click.option('--cache-ttl', envvar='CACHETTL', default=3600, type=click.INT, help='Optionally set local API cache result ttl of the EC2/RDS listings, kept current as resources are tagged (Default: 3600)')
 @pass_context
-def subcmd(context, profile, verbose, debug, dry_run):
+def subcmd(context, profile, verbose, debug, dry_run, cache_ttl):
     """does stuff for you."""
     context.obj['aws_profile']  = profile
     context.verbose             = verbose
     context.debug               = debug
     context.dry_run             = dry_run
-    context.dlog('[{}].[{}].[{}].[{}]'.format(profile, verbose, debug, dry_run))
+    context.cache_ttl           = cache_ttl
+    context.dlog('[{}].[{}].[{}].[{}].[{}]', profile, verbose, debug, dry_run, cache_ttl)
 
 @subcmd.command()
 @click.option('--services', envvar='services', multiple=True, default=['ec2', 'ec2:asg', 'ecr:repos', 'efs', 'rds', 'es', 'elasticache', 'redshift', 's3', 'elb', 'lambda', 'pinpoint', 'cloudfront'], help='Optionally, define services to tag.')
-@click.option('--regions', envvar='services', multiple=True, default=['us-east-1', 'us-east-2', 'us-west-1', 'us-west-2'], help='Optionally, define specific regions to tag.')
+@click.option('--regions', envvar='services', multiple=True, default=['us-east-1', 'us-east-2', 'us-west-1', 'us-west-2'], help='Optionally, define specific regions to tag, "all" for every enabled region.')
 @click.option('--skip-region-prompts', envvar='SKIP_PROMPT', is_flag=True, default=False, help='Skips the region prompts.')
 @click.option('--skip-inheritable-tagging', envvar='SKIP_INHERITABLE_TAGGING', is_flag=True, default=False, help='Skips the inheritable tagging.')
 @click.option('--skip-service-tagging', envvar='SKIP_SERVICE_TAGGING', is_flag=True, default=False, help='Skips the main service tagging.')
@@ -1113,8 +1160,8 @@ def interactive(context, services, regions, skip_region_prompts, skip_inheritabl
     """
     context.expert_mode = expert_mode
     context.services    = services
-    context.regions     = regions
-    context.dlog('[interactive]::[started]::[]'.format())
+    context.regions     = regions = context.region_map.resolve(regions)
+    context.dlog('[interactive]::[started]::[]')
 
     # can and should we get this data from aws for our required tags?
     # name added for consistency, if it's an issue we can try it as a not required tag or just disable it.
@@ -1166,12 +1213,12 @@ def interactive(context, services, regions, skip_region_prompts, skip_inheritabl
         }
     }
 
-    context.dlog('[interactive]::[regions]::[{}]'.format(regions))
-    context.dlog('[interactive]::[all_services]::[{}]'.format(services))
-    context.dlog('[interactive]::[tag_configuration]::[{}]'.format(context.tag_configuration))
+    context.dlog('[interactive]::[regions]::[{}]', regions)
+    context.dlog('[interactive]::[all_services]::[{}]', services)
+    context.dlog('[interactive]::[tag_configuration]::[{}]', context.tag_configuration)
 
     if context.dry_run:
-        context.dlog('[interactive]::[dry_run]::[{}]'.format(context.dry_run))
+        context.dlog('[interactive]::[dry_run]::[{}]', context.dry_run)
 
     print('\n\n****************************************************')
     print('***  Hi! Lets start tagging your AWS resources!  ***')
@@ -1205,6 +1252,11 @@ def interactive(context, services, regions, skip_region_prompts, skip_inheritabl
                 if service in global_services and service in completed_global_services:
                     continue
 
+                # no prompt for services aws does not deploy to the region.
+                if not context.region_map.is_available(SERVICE_CLIENTS.get(service, service), region):
+                    context.dlog('[interactive]::[service not in region]::[{}]::[{}]', service, region)
+                    continue
+
                 if not skip_region_prompts:
                     ch = get_input(context, 'Tagging [{}] service in [{}]\n[Y]Start or [N]Skip to next region?'.format(service, region))
                     try:
@@ -1232,4 +1284,4 @@ def interactive(context, services, regions, skip_region_prompts, skip_inheritabl
     print('\n\n***  Stay frosty my friend, we are all done now.  ***')
     print("*********************************************************")
 
-    context.dlog('[interactive]::[completed]'.format())
+    context.dlog('[interactive]::[completed]')
@@ -0,0 +1,218 @@
+"""
+Optional asyncio engine for very wide fan-outs (thousands of head_object, get_role, list_tags_for_resource calls).
+
+With aiobotocore installed calls are made on native async clients, otherwise each call runs the sync
+`Context.get_from_aws_api` on a thread pool through `run_in_executor`. Either way results are cached with the same
+namespaces and TTLs as the sync path, so both engines share cache entries, the memory cache and coalescing of identical
+calls. The async clients get the time budget, rate limit and metrics hooks of the pooled clients (`core/pool.py`).
+"""
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from core.projection import compile_projection, project
+from core.deadline import DeadlineExceeded
+
+# asyncio, botocore and aiobotocore are only imported once calls are batched, not to start the cli.
+AIOBOTOCORE_INSTALLED = importlib.util.find_spec('aiobotocore') is not None
+
+ENGINES = ['auto', 'aiobotocore', 'threads']
+
+
+class AsyncEngine(object):
+    """Runs `get_from_aws_api` calls as coroutines, at most `max_concurrency` at once."""
+
+    def __init__(self, context, engine='auto', max_concurrency=64):
+        self.context            = context
+        self.clients            = {}
+        self.session            = None
+        self.executor           = None
+        self.configure(engine, max_concurrency)
+
+    def configure(self, engine='auto', max_concurrency=64):
+        if engine == 'aiobotocore' and not AIOBOTOCORE_INSTALLED:
+            raise Exception('[async_engine]::[aiobotocore is not installed]')
+
+        self.engine             = 'aiobotocore' if engine == 'auto' and AIOBOTOCORE_INSTALLED else engine
+        self.engine             = 'threads' if self.engine == 'auto' else self.engine
+        self.max_concurrency    = max_concurrency
+
+    async def aget_from_aws_api(self, api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl = 0, region = '', stale_ttl = None, fields = None, compact = False, shards = None, negative_ttl = 0, timeout = None):
+        """Same arguments, result and caching as `Context.get_from_aws_api`; sharded, negative cached, timed and --offline calls run on a thread."""
+        import asyncio
+
+        if self.engine == 'threads' or shards or negative_ttl or timeout or self.context.offline:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+            call = partial(self.call_in_scope, self.context.get_deadline(), api_namespace, api_name, api_response_key, api_request_config, api_cache_ttl, region, stale_ttl, fields, compact, shards, negative_ttl, timeout)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+        if not self.context.region_map.is_available(api_namespace, region):
+            self.context.dlog('[aget_from_aws_api]::[{}]::[{}]::[{}]::[service not in region]', api_namespace, api_name, region)
+            return None
+
+        # the sync session owns the session namespace of the cache, and the sync client refreshes stale entries.
+        session     = self.context.get_aws_session()
+        use_cache   = True if api_cache_ttl > 0 else False
+        stale_ttl   = self.context.stale_ttl if stale_ttl is None else stale_ttl
+        projection  = compile_projection(fields, compact)
+        call_ns     = self.context.get_call_namespace(api_namespace, api_name, api_response_key, api_request_config, region, fields, compact)
+        cache_meta  = {'namespace': api_namespace, 'region': region or self.context.obj.get('region', ''), 'api': api_name, 'ttl': api_cache_ttl + stale_ttl}
+        log_prefix  = '[aget_from_aws_api]::[{}]'.format(call_ns)
+        self.context.dlog('{}::[started]::[use_cache]::[{}]', log_prefix, use_cache)
+
+        if use_cache is not True:
+            results = await self.aget_api_results(session, api_namespace, region, api_name, api_response_key, api_request_config, log_prefix, projection)
+            self.context.set_last_call(call_ns, 'live', None, cache_meta, results)
+            self.context.dlog('{}::[completed]', log_prefix)
+            return results
+
+        # identical calls, async or made by other threads, share the result of the first one.
+        flight, leader = self.context.memory_cache.join(call_ns)
+        if not leader:
+            self.context.dlog('{}::[coalesced]', log_prefix)
+            results, source, age = await asyncio.wrap_future(flight)
+            self.context.set_last_call(call_ns, 'cache' if source == 'live' else source, age, cache_meta)
+            return results
+
+        try:
+            client = self.context.get_aws_client(api_namespace, region, lazy=True)
+            cached = self.context.lookup_cache(call_ns, client, api_name, api_response_key, api_request_config, api_cache_ttl, stale_ttl, cache_meta, log_prefix, projection, compact)
+            if cached is None:
+                results = await self.aget_api_results(session, api_namespace, region, api_name, api_response_key, api_request_config, log_prefix, projection)
+                self.context.save_results(call_ns, results, cache_meta)
+                cached  = (results, 'live', None)
+            flight.set_result(cached)
+        except Exception as e:
+            flight.set_exception(e)
+            raise e
+        finally:
+            self.context.memory_cache.leave(call_ns)
+
+        results, source, age = cached
+        self.context.set_last_call(call_ns, source, age, cache_meta, results)
+        self.context.dlog('{}::[completed]::[{}]', log_prefix, source)
+        return results
+
+    async def aget_api_results(self, session, api_namespace, region, api_name, api_response_key, api_request_config, log_prefix, projection = None):
+        """Same as `Context.get_api_results` on the async client of (api_namespace, region)."""
+        import botocore.exceptions
+
+        self.context.check_deadline(log_prefix)
+        client  = await self.get_client(api_namespace, region or session.region_name)
+        results = []
+        try:
+            if 'PaginationConfig' in api_request_config:
+                async for page in client.get_paginator(api_name).paginate(**api_request_config):
+                    items = project(projection, self.get_items(page, api_response_key, api_name, log_prefix))
+                    if type(items) is list:
+                        results.extend(items)
+                    else:
+                        results = items
+            else:
+                response    = await getattr(client, api_name)(**api_request_config)
+                results     = project(projection, self.get_items(response, api_response_key, api_name, log_prefix))
+
+        #  aws may not deploy api's if the service isn't available in a region.
+        except botocore.exceptions.EndpointConnectionError as e:
+            self.context.dlog('{}::[api not available]::[{}]::[{}]', log_prefix, api_name, e)
+            return None
+
+        except DeadlineExceeded as e:
+            self.context.vlog('{}::[timeout]::[partial results]::[{}]', log_prefix, len(results))
+            e.results = results
+            raise e
+
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == "404":
+                return None
+            self.context.dlog('{}::[api error]::[{}]::[{}]::[{}]', log_prefix, api_name, e.response['Error']['Code'], e.response['Error']['Message'])
+            raise e
+
+        return results
+
+    def call_in_scope(self, deadline, *args):
+        """Runs `Context.get_from_aws_api` on an executor thread, under the time budget of the thread that awaits it."""
+        with self.context.deadline_scope(deadline=deadline):
+            return self.context.get_from_aws_api(*args)
+
+    def get_items(self, response, api_response_key, api_name, log_prefix):
+        if not api_response_key:
+            return response
+        if api_response_key not in response:
+            self.context.dlog('{}', response)
+            raise Exception('{}::[response_key]::[{}]::[not in]::[response]::[{}]'.format(log_prefix, api_response_key, api_name))
+        return response[api_response_key]
+
+    async def get_client(self, service, region):
+        import asyncio
+
+        # the task is stored before it is awaited so concurrent calls share a single client.
+        key = (service, region)
+        if key not in self.clients:
+            self.clients[key] = asyncio.ensure_future(self.create_client(service, region))
+        return await self.clients[key]
+
+    async def create_client(self, service, region):
+        """:return: (aiobotocore.client.AioBaseClient) With the time budget, rate limit and metrics hooks of the pooled clients."""
+        from aiobotocore.config import AioConfig
+
+        self.context.dlog('[async_engine]::[create new client]::[{}]::[{}]', service, region)
+        client = await self.get_session().create_client(service, region_name=region, config=AioConfig(**self.context.client_pool.config_options)).__aenter__()
+        self.context.client_pool.register_hooks(client, service, region, aio=True)
+        return client
+
+    def get_session(self):
+        """
+        aiobotocore session of the profile of the command, it resolves and refreshes credentials like the sync session
+        (assumed roles, sso, instance profiles); it shares the botocore loader of the process.
+        :return: (aiobotocore.session.AioSession)
+        """
+        from aiobotocore.session import AioSession
+        from core.pool import get_shared_loader
+
+        if self.session is None:
+            self.session = AioSession(profile=self.context.obj.get('aws_profile') or None)
+            self.session.register_component('data_loader', get_shared_loader(self.session))
+        return self.session
+
+    async def gather(self, calls):
+        """
+        :param calls: (List) Keyword arguments of `get_from_aws_api`, one dict per call.
+        :return: (List) Result of each call in the order given, or the exception it raised.
+        """
+        import asyncio
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(call):
+            async with semaphore:
+                return await self.aget_from_aws_api(**call)
+
+        self.context.vlog('[async_engine]::[{}]::[calls]::[{}]::[max_concurrency]::[{}]', self.engine, len(calls), self.max_concurrency)
+        return await asyncio.gather(*[bounded(call) for call in calls], return_exceptions=True)
+
+    async def aclose(self):
+        """Closes the async clients, they are bound to the event loop they were created in."""
+        clients, self.clients = self.clients, {}
+        # the credentials of the session are refreshed under locks of the event loop they were first used in.
+        self.session = None
+        for client in clients.values():
+            await (await client).__aexit__(None, None, None)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def run(self, calls):
+        """Sync entry point of `gather`, for commands that are not async themselves."""
+        import asyncio
+
+        async def run_all():
+            try:
+                return await self.gather(calls)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(run_all())
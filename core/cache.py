@@ -0,0 +1,836 @@
+"""
+Cache backends used by the cli `Context` to store AWS API responses.
+
+The `sqlite` backend (default) keeps every entry in a single indexed database, in the compressed `typed` format of
+`core.serialize` unless `--cache-format json` is set. The `json` backend is the original one file per call namespace
+layout, plain json files, and is kept available behind the same interface.
+
+Both backends are bounded; expired entries are removed when read and `evict()` enforces the ttl of every entry plus
+a max size/entry count by dropping the least recently used entries first. Audit logs appended by commands (`log.` keys)
+are records, not cached results: they are never evicted, and only purged when their prefix is asked for.
+
+Paged entries are written one page at a time through `open_pages()` and read back the same way by `iter_pages()`,
+so streaming callers never hold more than a page in memory; `get()` on a paged entry returns all pages as one list.
+"""
+import os
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+import click
+
+from core import serialize
+
+# returned by a backend when an entry is absent or expired, cached results may legitimately be None.
+MISSING = object()
+
+STAT_NAMES = ['hits', 'misses', 'expired', 'evicted']
+
+# key prefix of the audit logs, ex: `log.rds.delete_db_cluster_snapshot`, kept out of `evict()` and `purge()`.
+KEPT_PREFIX = 'log.'
+
+
+def remove_legacy_files(cache_dir):
+    """
+    Remove the `{file}-expired_by-{uuid}` files older versions left behind.
+    :return: (Tuple) Number of files and bytes removed.
+    """
+    removed     = 0
+    freed       = 0
+    if not os.path.isdir(cache_dir):
+        return removed, freed
+
+    for entry in os.scandir(cache_dir):
+        if '-expired_by-' in entry.name and entry.is_file():
+            freed   += entry.stat().st_size
+            removed += 1
+            os.remove(entry.path)
+
+    return removed, freed
+
+
+class CacheBackend(object):
+    """Interface every cache backend implements."""
+    name = ''
+
+    def __init__(self, context, cache_dir='data/cache'):
+        self.context    = context
+        self.cache_dir  = cache_dir
+        self.lock       = threading.Lock()
+        self.counters   = {}
+        self.accessed   = {}
+        self.lookups    = threading.local()
+
+    def get(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        """
+        Lookup a cached entry.
+        :param name_space: (String) Cache key, calculated per api call.
+        :param cache_ttl: (Int) Max age, in seconds, of an entry before it's expired.
+        :param rebuild_cache: (Bool) Force the entry to be expired.
+        :param meta: (Dict) Optional entry attributes, used to attribute hit/miss stats.
+        :param stale_ttl: (Int) Seconds past `cache_ttl` an entry is still returned, see `last_lookup()`.
+        :return: cached results or MISSING.
+        """
+        raise NotImplementedError
+
+    def put(self, name_space, results, meta=None):
+        """
+        Save an entry, replacing any existing one.
+        :param name_space: (String) Cache key.
+        :param results: Data to cache; must be json serializable.
+        :param meta: (Dict) Optional entry attributes [namespace, region, api, ttl].
+        """
+        raise NotImplementedError
+
+    def append(self, name_space, results, meta=None):
+        """Append a record to an entry, used for log style entries."""
+        raise NotImplementedError
+
+    def iter_pages(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        """
+        Lookup a cached entry to be read page by page; an entry saved with `put()` is a single page.
+        :return: (Generator) yielding a list of items per page, or MISSING.
+        """
+        raise NotImplementedError
+
+    def open_pages(self, name_space, meta=None):
+        """
+        Start a paged entry; pages are written as they are received and the entry is only visible once committed.
+        :return: (Object) writer with `write(items)`, `commit()` and `abort()`.
+        """
+        raise NotImplementedError
+
+    def delete(self, name_space):
+        raise NotImplementedError
+
+    def patch(self, namespace, region, apis, func):
+        """
+        Rewrites the entries of `apis` cached for a region, keeping their age; used to apply known changes (deleted ids,
+        updated tags) to cached listings instead of expiring them.
+        :param func: (Callable) Takes the cached results, returns them untouched, an updated copy, or MISSING to drop the entry.
+        :return: (Dict) [patched, invalidated]
+        """
+        raise NotImplementedError
+
+    def invalidate(self, namespace, region, apis):
+        """Removes the entries of `apis` cached for a region. :return: (Int) Entries removed."""
+        raise NotImplementedError
+
+    def purge(self, namespace=None):
+        """
+        Remove every entry but the audit logs, or only those matching a namespace (service name or key prefix).
+        :return: (Int) Number of entries removed.
+        """
+        raise NotImplementedError
+
+    def inspect(self, name_space):
+        """:return: (Dict) Entry attributes or None."""
+        raise NotImplementedError
+
+    def entries(self, namespace=None, limit=20):
+        """:return: (List) Entry attributes, largest first."""
+        raise NotImplementedError
+
+    def evict(self, max_bytes=0, max_entries=0):
+        """
+        Remove entries past their own ttl, then least recently used entries until under both limits; audit logs are
+        neither removed nor counted. A limit of zero is unbounded.
+        :return: (Dict) [expired, evicted, bytes_freed]
+        """
+        raise NotImplementedError
+
+    def usage(self):
+        """:return: (Dict) [entries, bytes]"""
+        raise NotImplementedError
+
+    def stats(self):
+        """:return: (Dict) per namespace [entries, bytes, hits, misses, expired, evicted]"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist hit/miss counters and access times collected during this run."""
+        raise NotImplementedError
+
+    def record(self, namespace, stat, value=1):
+        with self.lock:
+            counters = self.counters.setdefault(namespace or '', dict.fromkeys(STAT_NAMES, 0))
+            counters[stat] += value
+
+    def touch(self, name_space):
+        with self.lock:
+            self.accessed[name_space] = time.time()
+
+    def set_lookup(self, name_space, state, age=None, size=None):
+        self.lookups.last = {'key': name_space, 'state': state, 'age': age, 'size': size}
+
+    def last_lookup(self):
+        """
+        :return: (Dict) [key, state, age, size] of the last lookup made by the calling thread; state is hit, stale or
+            miss, size the json size of the entry when the backend knows it.
+        """
+        return getattr(self.lookups, 'last', None)
+
+    def get_lookup_state(self, age, cache_ttl, rebuild_cache, stale_ttl):
+        """:return: (String) hit, stale or expired for an entry of `age` seconds."""
+        if rebuild_cache is True or age > cache_ttl + stale_ttl:
+            return 'expired'
+        return 'stale' if age > cache_ttl else 'hit'
+
+    def drain(self):
+        with self.lock:
+            counters, accessed  = self.counters, self.accessed
+            self.counters       = {}
+            self.accessed       = {}
+        return counters, accessed
+
+
+class JsonFileCacheBackend(CacheBackend):
+    """
+    Original backend, one json file per name space under the cache dir; stats are kept in `_stats.json`.
+    Files carry no attributes, so the key prefix (aws, log, ...) stands in for the namespace.
+    """
+    name        = 'json'
+    stats_file  = '_stats.json'
+
+    def get_cache_file(self, name_space, extension='json'):
+        return os.path.join(self.cache_dir, '{}.{}'.format(name_space, extension))
+
+    def get(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        pages = self.iter_pages(name_space, cache_ttl, rebuild_cache, meta, stale_ttl)
+        if pages is MISSING:
+            return MISSING
+
+        if self.is_paged(name_space):
+            return [item for items in pages for item in items]
+        return next(pages)
+
+    def is_paged(self, name_space):
+        return os.path.exists(self.get_cache_file(name_space, 'jsonl'))
+
+    def iter_pages(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        extension   = 'jsonl' if self.is_paged(name_space) else 'json'
+        cache_file  = self.get_cache_file(name_space, extension)
+        namespace   = name_space.split('.')[0]
+
+        try:
+            fh_stat = os.stat(cache_file)
+            if fh_stat.st_size == 0:
+                os.remove(cache_file)
+                self.record(namespace, 'misses')
+                self.set_lookup(name_space, 'miss')
+                return MISSING
+        except FileNotFoundError:
+            self.context.dlog('[get_cache]::[cache-missed]::[{}]', cache_file)
+            self.record(namespace, 'misses')
+            self.set_lookup(name_space, 'miss')
+            return MISSING
+
+        age     = time.time() - fh_stat.st_mtime
+        state   = self.get_lookup_state(age, cache_ttl, rebuild_cache, stale_ttl)
+        if state == 'expired':
+            self.context.dlog('[get_cache]::[cache-expired]::[{}]::[{:.0f}>{}]', cache_file, age, cache_ttl)
+            self.delete(name_space)
+            self.record(namespace, 'expired')
+            self.record(namespace, 'misses')
+            self.set_lookup(name_space, 'miss', age)
+            return MISSING
+
+        self.context.dlog('[get_cache]::[cache-{}]::[{}]::[{:.0f}<{}]', state, cache_file, age, cache_ttl + stale_ttl)
+        self.record(namespace, 'hits')
+        self.set_lookup(name_space, state, age, fh_stat.st_size)
+        self.touch(name_space)
+        return self.read_pages(cache_file, extension)
+
+    def read_pages(self, cache_file, extension):
+        with click.open_file(cache_file, 'r') as fh:
+            if extension == 'json':
+                yield json.load(fh)
+                return
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+    def open_pages(self, name_space, meta=None):
+        return JsonFilePageWriter(self, name_space)
+
+    def put(self, name_space, results, meta=None):
+        self.write(name_space, results, 'w')
+
+    def append(self, name_space, results, meta=None):
+        self.write(name_space, results, 'a')
+
+    def write(self, name_space, results, fo_mode):
+        cache_file = self.get_cache_file(name_space)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self.is_paged(name_space):
+            os.remove(self.get_cache_file(name_space, 'jsonl'))
+        with click.open_file(cache_file, fo_mode) as fopen:
+            json.dump(results, fopen, default=str)
+            if fo_mode == 'a':
+                fopen.write("\n")
+        self.context.dlog('[put_cache]::[cache-saved]::[{}]', cache_file)
+
+    def delete(self, name_space):
+        for extension in ['json', 'jsonl']:
+            try:
+                os.remove(self.get_cache_file(name_space, extension))
+            except FileNotFoundError:
+                pass
+
+    def get_api_entries(self, namespace, region, apis):
+        """:return: (List) Keys of the entries of `apis` cached for a region, files carry no attributes but the key prefix."""
+        prefixes = tuple(self.context.get_api_prefix(namespace, api, region) for api in apis)
+        return [entry['key'] for entry in self.scan() if entry['key'].startswith(prefixes)]
+
+    def patch(self, namespace, region, apis, func):
+        result = {'patched': 0, 'invalidated': 0}
+        for key in self.get_api_entries(namespace, region, apis):
+            paged       = self.is_paged(key)
+            cache_file  = self.get_cache_file(key, 'jsonl' if paged else 'json')
+            fh_stat     = os.stat(cache_file)
+            pages       = list(self.read_pages(cache_file, 'jsonl' if paged else 'json'))
+            results     = [item for items in pages for item in items] if paged else pages[0]
+            updated     = func(results)
+            if updated is MISSING:
+                self.delete(key)
+                result['invalidated'] += 1
+            elif updated is not results:
+                # the entry keeps its age, the file its modification time.
+                self.write(key, updated, 'w')
+                os.utime(self.get_cache_file(key), (fh_stat.st_atime, fh_stat.st_mtime))
+                result['patched'] += 1
+        return result
+
+    def invalidate(self, namespace, region, apis):
+        keys = self.get_api_entries(namespace, region, apis)
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def scan(self):
+        """:return: (List) attributes of every entry file, access time stands in for last use."""
+        rv = []
+        if not os.path.isdir(self.cache_dir):
+            return rv
+
+        for entry in os.scandir(self.cache_dir):
+            extension = entry.name.rsplit('.', 1)[-1]
+            if extension not in ['json', 'jsonl'] or entry.name.startswith('_') or not entry.is_file():
+                continue
+            fh_stat = entry.stat()
+            rv.append({
+                'key':              entry.name[:-(len(extension) + 1)],
+                'namespace':        entry.name.split('.')[0],
+                'region':           '',
+                'api':              '',
+                'created_at':       fh_stat.st_mtime,
+                'last_accessed':    max(fh_stat.st_atime, fh_stat.st_mtime),
+                'ttl':              0,
+                'size':             fh_stat.st_size,
+            })
+        return rv
+
+    def purge(self, namespace=None):
+        removed = 0
+        for entry in self.scan():
+            if entry['key'].startswith(namespace) if namespace is not None else not entry['key'].startswith(KEPT_PREFIX):
+                self.delete(entry['key'])
+                removed += 1
+        return removed
+
+    def inspect(self, name_space):
+        for entry in self.scan():
+            if entry['key'] == name_space:
+                return entry
+        return None
+
+    def entries(self, namespace=None, limit=20):
+        rv = [entry for entry in self.scan() if namespace is None or entry['key'].startswith(namespace)]
+        rv.sort(key=lambda entry: entry['size'], reverse=True)
+        return rv[:limit]
+
+    def evict(self, max_bytes=0, max_entries=0):
+        result          = {'expired': 0, 'evicted': 0, 'bytes_freed': 0}
+        entries         = sorted((entry for entry in self.scan() if not entry['key'].startswith(KEPT_PREFIX)), key=lambda entry: entry['last_accessed'])
+        total_bytes     = sum(entry['size'] for entry in entries)
+        total_entries   = len(entries)
+
+        # json entries do not keep a ttl, so only the size/count limits apply.
+        for entry in entries:
+            over_bytes      = max_bytes and total_bytes > max_bytes
+            over_entries    = max_entries and total_entries > max_entries
+            if not over_bytes and not over_entries:
+                break
+            self.delete(entry['key'])
+            self.record(entry['namespace'], 'evicted')
+            total_bytes             -= entry['size']
+            total_entries           -= 1
+            result['evicted']       += 1
+            result['bytes_freed']   += entry['size']
+
+        return result
+
+    def usage(self):
+        entries = self.scan()
+        return {'entries': len(entries), 'bytes': sum(entry['size'] for entry in entries)}
+
+    def stats(self):
+        rv = self.load_stats()
+        for entry in self.scan():
+            namespace = rv.setdefault(entry['namespace'], dict.fromkeys(STAT_NAMES, 0))
+            namespace['entries']    = namespace.get('entries', 0) + 1
+            namespace['bytes']      = namespace.get('bytes', 0) + entry['size']
+        for namespace in rv.values():
+            namespace.setdefault('entries', 0)
+            namespace.setdefault('bytes', 0)
+        return rv
+
+    def load_stats(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.stats_file), 'r') as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def flush(self):
+        counters, accessed = self.drain()
+
+        for name_space, accessed_at in accessed.items():
+            cache_file = self.get_cache_file(name_space, 'jsonl' if self.is_paged(name_space) else 'json')
+            try:
+                os.utime(cache_file, (accessed_at, os.stat(cache_file).st_mtime))
+            except FileNotFoundError:
+                pass
+
+        if not counters:
+            return
+
+        rv = self.load_stats()
+        for namespace, values in counters.items():
+            saved = rv.setdefault(namespace, dict.fromkeys(STAT_NAMES, 0))
+            for stat, value in values.items():
+                saved[stat] = saved.get(stat, 0) + value
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, self.stats_file), 'w') as fh:
+            json.dump(rv, fh)
+
+
+class JsonFilePageWriter(object):
+    """Writes pages, one json line each, to a temporary file that replaces `{name_space}.jsonl` on commit."""
+
+    def __init__(self, backend, name_space):
+        self.backend    = backend
+        self.name_space = name_space
+        os.makedirs(backend.cache_dir, exist_ok=True)
+        self.temp_file  = '{}.{}.tmp'.format(backend.get_cache_file(name_space, 'jsonl'), uuid.uuid4().hex)
+        self.fh         = open(self.temp_file, 'w')
+
+    def write(self, items):
+        json.dump(items, self.fh, default=str)
+        self.fh.write("\n")
+
+    def commit(self):
+        self.fh.close()
+        os.replace(self.temp_file, self.backend.get_cache_file(self.name_space, 'jsonl'))
+        try:
+            os.remove(self.backend.get_cache_file(self.name_space))
+        except FileNotFoundError:
+            pass
+        self.backend.context.dlog('[put_cache]::[cache-saved]::[pages]::[{}]', self.name_space)
+
+    def abort(self):
+        self.fh.close()
+        os.remove(self.temp_file)
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    All entries in a single sqlite database; a lookup is one primary key query and every write is a transaction.
+    Connections are kept per thread, sqlite connections can not be shared across threads.
+    Access times and counters are buffered in memory and written once per run by `flush()`.
+    Paged entries keep their pages in `cache_pages`, removed along with the entry by trigger.
+    """
+    name            = 'sqlite'
+    db_name         = 'cache.sqlite3'
+    schema_version  = 3
+    # upserts (`ON CONFLICT ... DO UPDATE`) need SQLite 3.24+, older ones insert missing rows then update them.
+    upsert          = sqlite3.sqlite_version_info >= (3, 24, 0)
+    schema          = [
+        '''CREATE TABLE IF NOT EXISTS cache_entries (
+            key             TEXT PRIMARY KEY,
+            namespace       TEXT NOT NULL DEFAULT '',
+            region          TEXT NOT NULL DEFAULT '',
+            api             TEXT NOT NULL DEFAULT '',
+            created_at      REAL NOT NULL,
+            last_accessed   REAL NOT NULL,
+            ttl             INTEGER NOT NULL DEFAULT 0,
+            size            INTEGER NOT NULL DEFAULT 0,
+            encoding        TEXT NOT NULL DEFAULT 'json',
+            payload         BLOB
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_cache_entries_api ON cache_entries (namespace, region, api)',
+        'CREATE INDEX IF NOT EXISTS idx_cache_entries_last_accessed ON cache_entries (last_accessed)',
+        '''CREATE TABLE IF NOT EXISTS cache_pages (
+            key             TEXT NOT NULL,
+            page_no         INTEGER NOT NULL,
+            created_at      REAL NOT NULL,
+            payload         BLOB,
+            PRIMARY KEY (key, page_no)
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_cache_entries_delete_pages AFTER DELETE ON cache_entries
+            BEGIN DELETE FROM cache_pages WHERE key = old.key; END''',
+        '''CREATE TABLE IF NOT EXISTS cache_stats (
+            namespace       TEXT PRIMARY KEY,
+            hits            INTEGER NOT NULL DEFAULT 0,
+            misses          INTEGER NOT NULL DEFAULT 0,
+            expired         INTEGER NOT NULL DEFAULT 0,
+            evicted         INTEGER NOT NULL DEFAULT 0
+        )''',
+    ]
+
+    def __init__(self, context, cache_dir='data/cache'):
+        CacheBackend.__init__(self, context, cache_dir)
+        self.db_path        = os.path.join(cache_dir, self.db_name)
+        self.local          = threading.local()
+        self.cache_format   = getattr(context, 'cache_format', 'typed')
+
+    def get_connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA recursive_triggers=ON')   # replaced entries also drop their pages.
+
+            # cached data is disposable, an older layout is simply rebuilt.
+            if conn.execute('PRAGMA user_version').fetchone()[0] != self.schema_version:
+                conn.execute('DROP TABLE IF EXISTS cache_entries')
+                conn.execute('DROP TABLE IF EXISTS cache_pages')
+                conn.execute('DROP TABLE IF EXISTS cache_stats')
+                conn.execute('PRAGMA user_version = {}'.format(self.schema_version))
+            for statement in self.schema:
+                conn.execute(statement)
+            self.local.conn = conn
+        return conn
+
+    def get(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        row = self.lookup(name_space, cache_ttl, rebuild_cache, meta, stale_ttl)
+        if row is MISSING:
+            return MISSING
+
+        encoding, payload = row
+        if encoding == 'pages':
+            return [item for items in self.read_pages(name_space) for item in items]
+        return self.decode(encoding, payload)
+
+    def iter_pages(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        row = self.lookup(name_space, cache_ttl, rebuild_cache, meta, stale_ttl)
+        if row is MISSING:
+            return MISSING
+
+        encoding, payload = row
+        if encoding == 'pages':
+            return self.read_pages(name_space)
+        return iter([self.decode(encoding, payload)])
+
+    def read_pages(self, name_space):
+        # one primary key lookup per page, so nothing but the current page is held while the caller works.
+        conn    = self.get_connection()
+        page_no = 0
+        while True:
+            row = conn.execute('SELECT payload FROM cache_pages WHERE key = ? AND page_no = ?', (name_space, page_no)).fetchone()
+            if row is None:
+                return
+            yield serialize.loads(row[0])
+            page_no += 1
+
+    def open_pages(self, name_space, meta=None):
+        return SqlitePageWriter(self, name_space, meta)
+
+    def lookup(self, name_space, cache_ttl=0, rebuild_cache=False, meta=None, stale_ttl=0):
+        conn    = self.get_connection()
+        row     = conn.execute('SELECT created_at, namespace, encoding, payload FROM cache_entries WHERE key = ?', (name_space,)).fetchone()
+
+        if row is None:
+            self.context.dlog('[get_cache]::[cache-missed]::[{}]', name_space)
+            self.record((meta or {}).get('namespace', ''), 'misses')
+            self.set_lookup(name_space, 'miss')
+            return MISSING
+
+        created_at, namespace, encoding, payload = row
+        age     = time.time() - created_at
+        state   = self.get_lookup_state(age, cache_ttl, rebuild_cache, stale_ttl)
+        if state == 'expired':
+            self.context.dlog('[get_cache]::[cache-expired]::[{}]::[{:.0f}>{}]', name_space, age, cache_ttl)
+            self.delete(name_space)
+            self.record(namespace, 'expired')
+            self.record(namespace, 'misses')
+            self.set_lookup(name_space, 'miss', age)
+            return MISSING
+
+        self.context.dlog('[get_cache]::[cache-{}]::[{}]::[{:.0f}<{}]', state, name_space, age, cache_ttl + stale_ttl)
+        self.record(namespace, 'hits')
+        self.set_lookup(name_space, state, age)
+        self.touch(name_space)
+        return encoding, payload
+
+    def put(self, name_space, results, meta=None):
+        self.write(name_space, self.encode(results), self.cache_format, meta)
+        self.context.dlog('[put_cache]::[cache-saved]::[{}]', name_space)
+
+    def append(self, name_space, results, meta=None):
+        # log style entries stay one json document per line.
+        line = json.dumps(results, default=str).encode('utf-8') + b'\n'
+        with self.transaction() as conn:
+            row = conn.execute('SELECT payload FROM cache_entries WHERE key = ?', (name_space,)).fetchone()
+            self.write(name_space, (bytes(row[0]) if row else b'') + line, 'jsonl', meta, conn)
+        self.context.dlog('[put_cache]::[cache-appended]::[{}]', name_space)
+
+    def write(self, name_space, payload, encoding, meta=None, conn=None, size=None):
+        meta        = meta or {}
+        time_now    = time.time()
+        values      = (
+            name_space, meta.get('namespace', ''), meta.get('region', ''), meta.get('api', ''), time_now, time_now,
+            int(meta.get('ttl', 0)), len(payload) if size is None else size, encoding, payload
+        )
+        statement   = 'INSERT OR REPLACE INTO cache_entries ' \
+                      '(key, namespace, region, api, created_at, last_accessed, ttl, size, encoding, payload) ' \
+                      'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+        if conn is not None:
+            conn.execute(statement, values)
+        else:
+            with self.transaction() as conn:
+                conn.execute(statement, values)
+
+    def delete(self, name_space):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM cache_entries WHERE key = ?', (name_space,))
+
+    def patch(self, namespace, region, apis, func):
+        result  = {'patched': 0, 'invalidated': 0}
+        where   = 'namespace = ? AND region = ? AND api IN ({})'.format(', '.join('?' * len(apis)))
+        with self.transaction() as conn:
+            rows = conn.execute('SELECT key, encoding, payload FROM cache_entries WHERE ' + where, [namespace, region] + list(apis)).fetchall()
+            for key, encoding, payload in rows:
+                if encoding == 'pages':
+                    results = [item for items in self.read_pages(key) for item in items]
+                else:
+                    results = self.decode(encoding, payload)
+
+                updated = func(results)
+                if updated is MISSING:
+                    conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+                    result['invalidated'] += 1
+                elif updated is not results:
+                    payload = self.encode(updated)
+                    conn.execute('UPDATE cache_entries SET encoding = ?, payload = ?, size = ? WHERE key = ?',
+                                 (self.cache_format, payload, len(payload), key))
+                    conn.execute('DELETE FROM cache_pages WHERE key = ?', (key,))
+                    result['patched'] += 1
+        return result
+
+    def invalidate(self, namespace, region, apis):
+        with self.transaction() as conn:
+            return conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND region = ? AND api IN ({})'.format(', '.join('?' * len(apis))),
+                [namespace, region] + list(apis)
+            ).rowcount
+
+    def purge(self, namespace=None):
+        with self.transaction() as conn:
+            if namespace is None:
+                cursor = conn.execute('DELETE FROM cache_entries WHERE substr(key, 1, ?) != ?', (len(KEPT_PREFIX), KEPT_PREFIX))
+            else:
+                cursor = conn.execute(
+                    'DELETE FROM cache_entries WHERE namespace = ? OR substr(key, 1, ?) = ?',
+                    (namespace, len(namespace), namespace)
+                )
+            return cursor.rowcount
+
+    def inspect(self, name_space):
+        rv = self.entries_query('WHERE key = ?', (name_space,), 1)
+        return rv[0] if rv else None
+
+    def entries(self, namespace=None, limit=20):
+        if namespace is None:
+            return self.entries_query('ORDER BY size DESC LIMIT ?', (limit,), limit)
+        return self.entries_query(
+            'WHERE namespace = ? OR substr(key, 1, ?) = ? ORDER BY size DESC LIMIT ?',
+            (namespace, len(namespace), namespace, limit), limit
+        )
+
+    def entries_query(self, where, params, limit):
+        columns = ['key', 'namespace', 'region', 'api', 'created_at', 'last_accessed', 'ttl', 'size', 'encoding']
+        rows    = self.get_connection().execute(
+            'SELECT {} FROM cache_entries {}'.format(', '.join(columns), where), params
+        ).fetchmany(limit)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def evict(self, max_bytes=0, max_entries=0):
+        result = {'expired': 0, 'evicted': 0, 'bytes_freed': 0}
+
+        with self.transaction() as conn:
+            expired = conn.execute(
+                'SELECT key, namespace, size FROM cache_entries WHERE ttl > 0 AND created_at + ttl < ?', (time.time(),)
+            ).fetchall()
+            for key, namespace, size in expired:
+                self.record(namespace, 'expired')
+                result['bytes_freed'] += size
+            conn.executemany('DELETE FROM cache_entries WHERE key = ?', [(row[0],) for row in expired])
+            result['expired'] = len(expired)
+
+            # pages of writers that never committed, allowing an hour for any still in progress.
+            conn.execute(
+                'DELETE FROM cache_pages WHERE created_at < ? AND key NOT IN (SELECT key FROM cache_entries)',
+                (time.time() - 3600,)
+            )
+
+            kept                        = 'substr(key, 1, {}) != {!r}'.format(len(KEPT_PREFIX), KEPT_PREFIX)
+            total_entries, total_bytes  = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE ' + kept).fetchone()
+            over_bytes      = max_bytes and total_bytes > max_bytes
+            over_entries    = max_entries and total_entries > max_entries
+            if over_bytes or over_entries:
+                evicted = []
+                for key, namespace, size in conn.execute('SELECT key, namespace, size FROM cache_entries WHERE {} ORDER BY last_accessed ASC'.format(kept)):
+                    if not (max_bytes and total_bytes > max_bytes) and not (max_entries and total_entries > max_entries):
+                        break
+                    evicted.append((key,))
+                    self.record(namespace, 'evicted')
+                    total_bytes             -= size
+                    total_entries           -= 1
+                    result['bytes_freed']   += size
+                conn.executemany('DELETE FROM cache_entries WHERE key = ?', evicted)
+                result['evicted'] = len(evicted)
+
+        return result
+
+    def vacuum(self):
+        self.get_connection().execute('VACUUM')
+
+    def usage(self):
+        total_entries, total_bytes = self.get_connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries'
+        ).fetchone()
+        return {'entries': total_entries, 'bytes': total_bytes}
+
+    def disk_usage(self):
+        """:return: (Int) Bytes used by the database files, including the write ahead log."""
+        rv = 0
+        for suffix in ['', '-wal', '-shm']:
+            try:
+                rv += os.path.getsize(self.db_path + suffix)
+            except OSError:
+                pass
+        return rv
+
+    def stats(self):
+        conn    = self.get_connection()
+        rv      = {}
+        for row in conn.execute('SELECT namespace, {} FROM cache_stats'.format(', '.join(STAT_NAMES))):
+            rv[row[0]] = dict(zip(STAT_NAMES, row[1:]))
+        for namespace, entries, size in conn.execute('SELECT namespace, COUNT(*), SUM(size) FROM cache_entries GROUP BY namespace'):
+            rv.setdefault(namespace, dict.fromkeys(STAT_NAMES, 0)).update({'entries': entries, 'bytes': size})
+        for namespace in rv.values():
+            namespace.setdefault('entries', 0)
+            namespace.setdefault('bytes', 0)
+        return rv
+
+    def flush(self):
+        counters, accessed = self.drain()
+        if not counters and not accessed:
+            return
+
+        with self.transaction() as conn:
+            conn.executemany(
+                'UPDATE cache_entries SET last_accessed = ? WHERE key = ?',
+                [(accessed_at, name_space) for name_space, accessed_at in accessed.items()]
+            )
+            if self.upsert:
+                conn.executemany(
+                    'INSERT INTO cache_stats (namespace, {0}) VALUES (?, ?, ?, ?, ?) ON CONFLICT(namespace) DO UPDATE SET {1}'.format(
+                        ', '.join(STAT_NAMES), ', '.join('{0} = {0} + excluded.{0}'.format(stat) for stat in STAT_NAMES)
+                    ),
+                    [[namespace] + [values[stat] for stat in STAT_NAMES] for namespace, values in counters.items()]
+                )
+            else:
+                conn.executemany('INSERT OR IGNORE INTO cache_stats (namespace) VALUES (?)', [[namespace] for namespace in counters])
+                conn.executemany(
+                    'UPDATE cache_stats SET {} WHERE namespace = ?'.format(', '.join('{0} = {0} + ?'.format(stat) for stat in STAT_NAMES)),
+                    [[values[stat] for stat in STAT_NAMES] + [namespace] for namespace, values in counters.items()]
+                )
+
+    def transaction(self):
+        return SqliteTransaction(self.get_connection())
+
+    def encode(self, results):
+        return serialize.dumps(results, self.cache_format)
+
+    def decode(self, encoding, payload):
+        if encoding == 'jsonl':
+            return [json.loads(line) for line in bytes(payload).splitlines() if line]
+        return serialize.loads(payload)
+
+
+class SqlitePageWriter(object):
+    """Writes pages under a temporary key, renamed to the entry key on commit so readers never see a partial entry."""
+
+    def __init__(self, backend, name_space, meta=None):
+        self.backend    = backend
+        self.name_space = name_space
+        self.meta       = meta
+        self.temp_key   = '{}#{}'.format(name_space, uuid.uuid4().hex)
+        self.page_no    = 0
+        self.size       = 0
+
+    def write(self, items):
+        payload = self.backend.encode(items)
+        with self.backend.transaction() as conn:
+            conn.execute(
+                'INSERT INTO cache_pages (key, page_no, created_at, payload) VALUES (?, ?, ?, ?)',
+                (self.temp_key, self.page_no, time.time(), payload)
+            )
+        self.page_no    += 1
+        self.size       += len(payload)
+
+    def commit(self):
+        with self.backend.transaction() as conn:
+            conn.execute('DELETE FROM cache_entries WHERE key = ?', (self.name_space,))
+            conn.execute('UPDATE cache_pages SET key = ? WHERE key = ?', (self.name_space, self.temp_key))
+            self.backend.write(self.name_space, b'', 'pages', self.meta, conn, self.size)
+        self.backend.context.dlog('[put_cache]::[cache-saved]::[pages]::[{}]::[{}]', self.name_space, self.page_no)
+
+    def abort(self):
+        with self.backend.transaction() as conn:
+            conn.execute('DELETE FROM cache_pages WHERE key = ?', (self.temp_key,))
+
+
+class SqliteTransaction(object):
+    """Immediate write transaction, rolled back when the block raises."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+CACHE_BACKENDS = {
+    SqliteCacheBackend.name:    SqliteCacheBackend,
+    JsonFileCacheBackend.name:  JsonFileCacheBackend,
+}
+
+
+def get_cache_backend(name, context, cache_dir='data/cache'):
+    if name not in CACHE_BACKENDS:
+        raise Exception('[get_cache_backend]::[unsupported backend]::[{}]::[{}]'.format(name, ', '.join(CACHE_BACKENDS)))
+    return CACHE_BACKENDS[name](context, cache_dir)
@@ -0,0 +1,67 @@
+"""
+Compact representation of large inventories (`compact=True` of `Context.get_from_aws_api`).
+
+Every string is interned, so tag keys, AZ names, owner ids and states repeated across thousands of resources are a
+single object, and `Tags` lists become tuples of (key, value) pairs instead of one dict per tag. Compact results are
+read only and the `Tags` shape differs from boto3: read them with `get_tag` or `dict(item['Tags'])`.
+"""
+import sys
+
+TAG_LISTS = ['Tags', 'TagSet', 'TagList']
+
+
+def compact(value):
+    """:return: Compact copy of `value`; compacting a compact value (or one read back from a json cache) is safe."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {
+            sys.intern(key) if isinstance(key, str) else key: compact_tags(item) if key in TAG_LISTS else compact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    return value
+
+
+def compact_tags(tags):
+    if not isinstance(tags, (list, tuple)):
+        return compact(tags)
+
+    rv = []
+    for tag in tags:
+        if isinstance(tag, dict) and 'Key' in tag:
+            rv.append((sys.intern(tag['Key']), compact(tag.get('Value', ''))))
+        elif isinstance(tag, (list, tuple)) and len(tag) == 2:
+            rv.append((compact(tag[0]), compact(tag[1])))
+        else:
+            return compact(tags)
+    return tuple(rv)
+
+
+def get_tag(tags, key, default=None):
+    """:return: Value of the tag `key` from either tag shape, boto3 dicts or compact pairs."""
+    for tag in tags or ():
+        if isinstance(tag, dict):
+            if tag.get('Key') == key:
+                return tag.get('Value', default)
+        elif tag[0] == key:
+            return tag[1]
+    return default
+
+
+def set_tags(tags, tags_set=None, tags_removed=None):
+    """
+    :param tags_set: (Dict) Tags added or updated, key => value.
+    :param tags_removed: (List) Keys of the tags removed.
+    :return: Updated copy of `tags`, in the same shape: boto3 dicts or compact pairs.
+    """
+    tags_set        = tags_set or {}
+    tags_removed    = set(tags_removed or []) | set(tags_set)
+    compact_shape   = isinstance(tags, tuple)
+    pairs           = [tag if not isinstance(tag, dict) else (tag.get('Key'), tag.get('Value')) for tag in tags or ()]
+    pairs           = [pair for pair in pairs if pair[0] not in tags_removed] + list(tags_set.items())
+
+    if compact_shape:
+        return tuple((compact(key), compact(value)) for key, value in pairs)
+    return [{'Key': key, 'Value': value} for key, value in pairs]
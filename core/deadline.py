@@ -0,0 +1,57 @@
+"""
+Time budgets of AWS calls: per command (`--time-budget`), per fan-out and per call (`timeout` of `get_from_aws_api`).
+
+The budget of the calling thread is checked before every request attempt, so between pages and between retries, and
+raises `DeadlineExceeded` once it is spent or cancelled; paginated calls attach the items received so far. Budgets nest:
+a call made in a fan-out of a command stops at the earliest of the three, and cancelling a budget cancels every budget
+nested in it. A request already sent is not interrupted, it ends within `--read-timeout`.
+"""
+import threading
+import time
+
+import click
+
+
+class DeadlineExceeded(click.ClickException):
+    """A time budget was spent or cancelled; `results` holds the items received before it, None when there were none."""
+
+    def __init__(self, message, results=None):
+        click.ClickException.__init__(self, message)
+        self.results = results
+
+
+class Deadline(object):
+    """A time budget, optionally nested in a parent budget."""
+
+    def __init__(self, seconds=0, parent=None):
+        """
+        :param seconds: (Float) Budget from now, zero for no limit of its own.
+        :param parent: (Deadline) Budget this one is nested in.
+        """
+        self.expires_at = time.time() + seconds if seconds else None
+        self.parent     = parent
+        self.cancelled  = threading.Event()
+
+    def remaining(self):
+        """:return: (Float) Seconds left in this budget and its parents, None when none of them has a limit."""
+        remaining   = [self.expires_at - time.time()] if self.expires_at is not None else []
+        parent      = self.parent.remaining() if self.parent is not None else None
+        if parent is not None:
+            remaining.append(parent)
+        return min(remaining) if remaining else None
+
+    def cancel(self):
+        """Stops the calls running under this budget, or any budget nested in it, at their next request attempt."""
+        self.cancelled.set()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set() or (self.parent is not None and self.parent.is_cancelled())
+
+    def expired(self):
+        remaining = self.remaining()
+        return self.is_cancelled() or (remaining is not None and remaining <= 0)
+
+    def check(self, log_prefix=''):
+        """:raises DeadlineExceeded: The budget is spent or cancelled."""
+        if self.expired():
+            raise DeadlineExceeded('{}::[{}]'.format(log_prefix, 'cancelled' if self.is_cancelled() else 'time budget exceeded'))
@@ -0,0 +1,462 @@
+"""
+Incremental updates of the inventory and the API cache from CloudTrail and EventBridge events (`inventory ingest`).
+
+Each event is read into a `Delta`: resources created or changed (described again by id), resources deleted, and tags
+set or removed. Deletes and tag changes are applied in place, to the inventory and to the cached `describe_*`
+listings of the region (`patch_cache`); cached listings that may be missing a created resource are invalidated. RDS
+events other than tag changes only invalidate the cached RDS listings, RDS resources are not kept in the inventory.
+`Context.write_through` applies the changes made by the commands themselves the same way.
+
+Accepted documents: CloudTrail log files (`{"Records": [...]}`), single CloudTrail records, EventBridge events
+("AWS API Call via CloudTrail" and the native EC2/EBS notifications), and SNS/SQS records wrapping any of those.
+"""
+import json
+from collections import OrderedDict
+
+from core.cache import MISSING
+from core.compact import set_tags
+from core.inventory import RESOURCE_TYPES
+
+# resource id prefix => inventory type.
+ID_PREFIXES = OrderedDict([('i-', 'instances'), ('vol-', 'volumes'), ('snap-', 'snapshots'), ('ami-', 'images')])
+
+# filter used to describe resources of a type by id, missing ids are simply absent from the response.
+ID_FILTERS = {'instances': 'instance-id', 'volumes': 'volume-id', 'snapshots': 'snapshot-id', 'images': 'image-id'}
+
+RDS_APIS = ['describe_db_instances', 'describe_db_clusters', 'describe_db_snapshots', 'describe_db_cluster_snapshots', 'list_tags_for_resource']
+
+# cached listings patched in place after deletes and tag changes: api => (namespace, id key, tags key).
+LISTINGS = OrderedDict([
+    ('describe_instances',              ('ec2', 'InstanceId', 'Tags')),
+    ('describe_volumes',                ('ec2', 'VolumeId', 'Tags')),
+    ('describe_snapshots',              ('ec2', 'SnapshotId', 'Tags')),
+    ('describe_images',                 ('ec2', 'ImageId', 'Tags')),
+    ('describe_tags',                   ('ec2', 'ResourceId', 'Key')),  # one row per tag, see patch_tag_rows.
+    ('describe_db_instances',           ('rds', 'DBInstanceArn', 'TagList')),
+    ('describe_db_clusters',            ('rds', 'DBClusterArn', 'TagList')),
+    ('describe_db_snapshots',           ('rds', 'DBSnapshotArn', 'TagList')),
+    ('describe_db_cluster_snapshots',   ('rds', 'DBClusterSnapshotArn', 'TagList')),
+    ('get_resources',                   ('resourcegroupstaggingapi', 'ResourceARN', 'Tags')),
+])
+
+# RDS ARN resource type (`arn:aws:rds:<region>:<account>:<type>:<name>`) => api listing it.
+RDS_LISTINGS = {'db': 'describe_db_instances', 'cluster': 'describe_db_clusters', 'snapshot': 'describe_db_snapshots', 'cluster-snapshot': 'describe_db_cluster_snapshots'}
+
+# `describe_tags` ResourceType of each inventory type.
+TAG_ROW_TYPES = {'instances': 'instance', 'volumes': 'volume', 'snapshots': 'snapshot', 'images': 'image'}
+
+# tags looked up one resource at a time, invalidated on tag changes.
+TAG_LOOKUPS = {'rds': ['list_tags_for_resource']}
+
+
+def get_resource_type(resource_id):
+    for prefix, resource_type in ID_PREFIXES.items():
+        if resource_id.startswith(prefix):
+            return resource_type
+    return None
+
+
+def get_arn_id(arn):
+    """:return: (String) Resource id of an ARN, `arn:aws:ec2:us-east-1:123456789012:volume/vol-1` => `vol-1`."""
+    return arn.split(':', 5)[-1].split('/')[-1]
+
+
+def get_set_items(value, key):
+    """:return: (List) `key` of each item of a CloudTrail `{"items": [...]}` set."""
+    return [item[key] for item in (value or {}).get('items', []) if key in item]
+
+
+class Delta(object):
+    """Changes read from one event."""
+
+    def __init__(self, event_name, account, region):
+        self.event_name     = event_name
+        self.account        = account
+        self.region         = region
+        self.refreshed      = set()
+        self.deleted        = set()
+        self.tags_set       = {}
+        self.tags_removed   = {}
+        self.invalidated    = []
+
+    def refresh(self, *resource_ids):
+        self.refreshed.update(resource_id for resource_id in resource_ids if resource_id)
+
+    def delete(self, *resource_ids):
+        self.deleted.update(resource_id for resource_id in resource_ids if resource_id)
+
+    def set_tags(self, resource_id, tags):
+        self.tags_set.setdefault(resource_id, {}).update(tags)
+
+    def remove_tags(self, resource_id, keys):
+        self.tags_removed.setdefault(resource_id, []).extend(keys)
+
+    def invalidate(self, namespace, apis):
+        self.invalidated.append((namespace, apis))
+
+    def resource_types(self):
+        resource_ids = self.refreshed | self.deleted | set(self.tags_set) | set(self.tags_removed)
+        return sorted({get_resource_type(resource_id) for resource_id in resource_ids} - {None})
+
+    def is_empty(self):
+        return not (self.refreshed or self.deleted or self.tags_set or self.tags_removed or self.invalidated)
+
+    def __str__(self):
+        return '[event]::[{}]::[{}]::[{}]::[refreshed]::[{}]::[deleted]::[{}]::[tags_set]::[{}]::[tags_removed]::[{}]::[invalidated]::[{}]'.format(
+            self.event_name, self.account, self.region, ','.join(sorted(self.refreshed)), ','.join(sorted(self.deleted)),
+            json.dumps(self.tags_set, sort_keys=True), json.dumps(self.tags_removed, sort_keys=True),
+            ','.join('{}.{}'.format(namespace, api) for namespace, apis in self.invalidated for api in apis)
+        )
+
+
+def get_records(document):
+    """:return: (Generator) Records of any accepted document, as dicts [name, account, region, request, response, detail, resources]."""
+    if isinstance(document, list):
+        for item in document:
+            yield from get_records(item)
+        return
+
+    if not isinstance(document, dict):
+        return
+
+    if 'Records' in document:
+        yield from get_records(document['Records'])
+    elif 'Sns' in document:
+        yield from get_records(json.loads(document['Sns']['Message']))
+    elif 'body' in document and 'eventSource' in document and document['eventSource'] == 'aws:sqs':
+        yield from get_records(json.loads(document['body']))
+    elif 'detail-type' in document:
+        detail = document.get('detail') or {}
+        if document['detail-type'] == 'AWS API Call via CloudTrail':
+            yield from get_records(dict(detail, recipientAccountId=detail.get('recipientAccountId', document.get('account')),
+                                        awsRegion=detail.get('awsRegion', document.get('region'))))
+        else:
+            yield {
+                'name': document['detail-type'], 'account': document.get('account', ''), 'region': document.get('region', ''),
+                'request': {}, 'response': {}, 'detail': detail, 'resources': document.get('resources', []),
+            }
+    elif 'eventName' in document:
+        if document.get('errorCode'):
+            return
+        yield {
+            'name': document['eventName'], 'account': document.get('recipientAccountId', ''), 'region': document.get('awsRegion', ''),
+            'request': document.get('requestParameters') or {}, 'response': document.get('responseElements') or {},
+            'detail': {}, 'resources': [],
+        }
+
+
+def on_instances_created(delta, record):
+    delta.refresh(*get_set_items(record['response'].get('instancesSet'), 'instanceId'))
+
+
+def on_instances_changed(delta, record):
+    delta.refresh(*get_set_items(record['request'].get('instancesSet'), 'instanceId'))
+
+
+def on_volume_created(delta, record):
+    delta.refresh(record['response'].get('volumeId'))
+
+
+def on_volume_changed(delta, record):
+    delta.refresh(record['request'].get('volumeId'))
+
+
+def on_volume_deleted(delta, record):
+    delta.delete(record['request'].get('volumeId'))
+
+
+def on_snapshot_created(delta, record):
+    delta.refresh(record['response'].get('snapshotId'))
+    delta.refresh(*get_set_items(record['response'].get('snapshotSet'), 'snapshotId'))
+
+
+def on_snapshot_deleted(delta, record):
+    delta.delete(record['request'].get('snapshotId'))
+
+
+def on_image_created(delta, record):
+    delta.refresh(record['response'].get('imageId'))
+
+
+def on_image_deleted(delta, record):
+    delta.delete(record['request'].get('imageId'))
+
+
+def on_tags_created(delta, record):
+    tags = {tag['key']: tag.get('value', '') for tag in record['request'].get('tagSet', {}).get('items', [])}
+    for resource_id in get_set_items(record['request'].get('resourcesSet'), 'resourceId'):
+        delta.set_tags(resource_id, tags)
+
+
+def on_tags_deleted(delta, record):
+    keys = get_set_items(record['request'].get('tagSet'), 'key')
+    for resource_id in get_set_items(record['request'].get('resourcesSet'), 'resourceId'):
+        delta.remove_tags(resource_id, keys)
+
+
+def on_resources_tagged(delta, record):
+    for arn in record['request'].get('resourceARNList', []):
+        if record['name'] == 'TagResources':
+            delta.set_tags(get_listing_id(arn), record['request'].get('tags', {}))
+        else:
+            delta.remove_tags(get_listing_id(arn), record['request'].get('tagKeys', []))
+
+
+def on_rds_changed(delta, record):
+    delta.invalidate('rds', RDS_APIS)
+
+
+def on_instance_state_change(delta, record):
+    delta.refresh(record['detail'].get('instance-id'))
+
+
+def on_ebs_notification(delta, record):
+    if record['detail'].get('result') == 'failed':
+        return
+    resource_ids = [get_arn_id(arn) for arn in record['resources']]
+    if record['detail'].get('snapshot_id'):
+        resource_ids.append(get_arn_id(record['detail']['snapshot_id']))
+    if record['detail'].get('event') == 'deleteVolume':
+        delta.delete(*resource_ids)
+    else:
+        delta.refresh(*[resource_id for resource_id in resource_ids if get_resource_type(resource_id)])
+
+
+EVENT_HANDLERS = {
+    'RunInstances':                             on_instances_created,
+    'StartInstances':                           on_instances_changed,
+    'StopInstances':                            on_instances_changed,
+    'TerminateInstances':                       on_instances_changed,
+    'CreateVolume':                             on_volume_created,
+    'AttachVolume':                             on_volume_changed,
+    'DetachVolume':                             on_volume_changed,
+    'DeleteVolume':                             on_volume_deleted,
+    'CreateSnapshot':                           on_snapshot_created,
+    'CreateSnapshots':                          on_snapshot_created,
+    'CopySnapshot':                             on_snapshot_created,
+    'DeleteSnapshot':                           on_snapshot_deleted,
+    'CreateImage':                              on_image_created,
+    'CopyImage':                                on_image_created,
+    'RegisterImage':                            on_image_created,
+    'DeregisterImage':                          on_image_deleted,
+    'CreateTags':                               on_tags_created,
+    'DeleteTags':                               on_tags_deleted,
+    'TagResources':                             on_resources_tagged,
+    'UntagResources':                           on_resources_tagged,
+    'CreateDBInstance':                         on_rds_changed,
+    'DeleteDBInstance':                         on_rds_changed,
+    'CreateDBCluster':                          on_rds_changed,
+    'DeleteDBCluster':                          on_rds_changed,
+    'CreateDBSnapshot':                         on_rds_changed,
+    'CopyDBSnapshot':                           on_rds_changed,
+    'DeleteDBSnapshot':                         on_rds_changed,
+    'CreateDBClusterSnapshot':                  on_rds_changed,
+    'CopyDBClusterSnapshot':                    on_rds_changed,
+    'DeleteDBClusterSnapshot':                  on_rds_changed,
+    'AddTagsToResource':                        on_rds_changed,
+    'RemoveTagsFromResource':                   on_rds_changed,
+    'EC2 Instance State-change Notification':   on_instance_state_change,
+    'EBS Snapshot Notification':                on_ebs_notification,
+    'EBS Volume Notification':                  on_ebs_notification,
+}
+
+
+def get_deltas(document):
+    """:return: (List) Delta of every supported event of a document, events of other apis are skipped."""
+    rv = []
+    for record in get_records(document):
+        handler = EVENT_HANDLERS.get(record['name'])
+        if handler is None:
+            continue
+        delta = Delta(record['name'], record['account'], record['region'])
+        handler(delta, record)
+        if not delta.is_empty():
+            rv.append(delta)
+    return rv
+
+
+def get_listing_id(resource_id):
+    """:return: (String) Id of a resource as cached listings key it: EC2 ARNs become ids, other ARNs are kept."""
+    if resource_id.startswith('arn:') and resource_id.split(':')[2] == 'ec2':
+        return get_arn_id(resource_id)
+    return resource_id
+
+
+def get_listing_apis(resource_id):
+    """:return: (List) Apis whose cached listings may hold a resource, given by `get_listing_id`."""
+    resource_type = get_resource_type(resource_id)
+    if resource_type:
+        return [RESOURCE_TYPES[resource_type]['api_name'], 'describe_tags', 'get_resources']
+
+    parts = resource_id.split(':')
+    if len(parts) > 6 and parts[2] == 'rds' and parts[5] in RDS_LISTINGS:
+        return [RDS_LISTINGS[parts[5]], 'get_resources']
+    return ['get_resources'] if resource_id.startswith('arn:') else []
+
+
+def patch_items(items, id_key, tags_key, deleted, tags_set, tags_removed):
+    """:return: (List) Copy of a cached listing without the deleted resources and with their tags updated, None when nothing changed."""
+    rv      = []
+    changed = False
+    for item in items:
+        if isinstance(item, dict) and id_key == 'InstanceId' and isinstance(item.get('Instances'), list):
+            # instances are listed in their reservations.
+            instances = patch_items(item['Instances'], id_key, tags_key, deleted, tags_set, tags_removed)
+            if instances is not None:
+                changed = True
+                if instances:
+                    rv.append(dict(item, Instances=instances))
+                continue
+
+        item_id = get_listing_id(item[id_key]) if isinstance(item, dict) and isinstance(item.get(id_key), str) else None
+        if item_id in deleted:
+            changed = True
+            continue
+        if item_id in tags_set or item_id in tags_removed:
+            item    = dict(item, **{tags_key: set_tags(item.get(tags_key), tags_set.get(item_id), tags_removed.get(item_id))})
+            changed = True
+        rv.append(item)
+    return rv if changed else None
+
+
+def patch_tag_rows(rows, deleted, tags_set, tags_removed):
+    """
+    `describe_tags` listings hold one row per tag, rows of a newly tagged resource are added next to its other rows.
+    :return: (List) Patched copy, None when nothing changed, MISSING when a resource of a type the listing holds was
+        tagged without having rows: whether the listing filters would hold it is unknown.
+    """
+    if not all(isinstance(row, dict) and 'ResourceId' in row and 'Key' in row for row in rows):
+        return None
+
+    rv      = []
+    changed = False
+    listed  = {}
+    for row in rows:
+        resource_id = row['ResourceId']
+        listed.setdefault(resource_id, row)
+        if resource_id in deleted or row['Key'] in tags_removed.get(resource_id, ()) or row['Key'] in tags_set.get(resource_id, {}):
+            changed = True
+            continue
+        rv.append(row)
+
+    listed_types = {row.get('ResourceType') for row in rows}
+    for resource_id, tags in tags_set.items():
+        if not tags:
+            continue
+        if resource_id not in listed:
+            if TAG_ROW_TYPES.get(get_resource_type(resource_id)) in listed_types:
+                return MISSING
+            continue
+        rv.extend(dict(listed[resource_id], Key=key, Value=value) for key, value in tags.items())
+        changed = True
+    return rv if changed else None
+
+
+def get_patch(api_name, deleted, tags_set, tags_removed):
+    """:return: (Callable) Patch of the cached listings of an api, see `CacheBackend.patch`."""
+    namespace, id_key, tags_key = LISTINGS[api_name]
+
+    def patch(results):
+        if not isinstance(results, list):
+            return results
+        if api_name == 'describe_tags':
+            patched = patch_tag_rows(results, deleted, tags_set, tags_removed)
+        else:
+            patched = patch_items(results, id_key, tags_key, deleted, tags_set, tags_removed)
+        return results if patched is None else patched
+
+    return patch
+
+
+def invalidate_cache(context, namespace, region, apis):
+    """Removes the entries of `apis` cached for a region, in memory and in the cache backend. :return: (Int) Entries removed."""
+    context.memory_cache.invalidate(namespace, region, apis)
+    return context.get_cache_backend().invalidate(namespace, region, apis)
+
+
+def patch_cache(context, region, deleted=(), tags_set=None, tags_removed=None):
+    """
+    Applies deleted resources and tag changes to the listings cached for a region, in memory and in the cache backend.
+    :param deleted: (List) Ids or ARNs of the resources deleted.
+    :param tags_set: (Dict) Id or ARN => tags set, key => value.
+    :param tags_removed: (Dict) Id or ARN => keys of the tags removed.
+    :return: (Dict) [patched, invalidated]
+    """
+    deleted         = {get_listing_id(resource_id) for resource_id in deleted}
+    tags_set        = {get_listing_id(resource_id): tags for resource_id, tags in (tags_set or {}).items()}
+    tags_removed    = {get_listing_id(resource_id): keys for resource_id, keys in (tags_removed or {}).items()}
+    listings        = OrderedDict()
+    for resource_id in sorted(deleted | set(tags_set) | set(tags_removed)):
+        for api_name in get_listing_apis(resource_id):
+            listings.setdefault(api_name, set()).add(resource_id)
+
+    result = {'patched': 0, 'invalidated': 0}
+    for api_name, resource_ids in listings.items():
+        # only the changes of resources the api lists, a change unrelated to a listing leaves it as it is.
+        patch = get_patch(api_name, deleted & resource_ids, {k: v for k, v in tags_set.items() if k in resource_ids},
+                          {k: v for k, v in tags_removed.items() if k in resource_ids})
+        namespace = LISTINGS[api_name][0]
+        context.memory_cache.patch(namespace, region, [api_name], patch)
+        patched                 = context.get_cache_backend().patch(namespace, region, [api_name], patch)
+        result['patched']       += patched['patched']
+        result['invalidated']   += patched['invalidated']
+
+    # per resource tag lookups are cached by request, they hold no id to patch.
+    for namespace in sorted({LISTINGS[api_name][0] for api_name in listings} & set(TAG_LOOKUPS)):
+        if tags_set or tags_removed:
+            result['invalidated'] += invalidate_cache(context, namespace, region, TAG_LOOKUPS[namespace])
+
+    context.dlog('[patch_cache]::[{}]::[{}]', region, result)
+    return result
+
+
+def apply_delta(context, delta, describe=True):
+    """
+    Applies a delta to the inventory and the cache entries of its region.
+    :param describe: (Boolean) Describe created/changed resources by id; when False their cached listings are only invalidated.
+    :return: (Dict) [described, deleted, tagged, patched, invalidated]
+    """
+    store   = context.get_inventory()
+    result  = {'described': 0, 'deleted': 0, 'tagged': 0, 'patched': 0, 'invalidated': 0}
+
+    result['deleted'] = store.delete(delta.account, delta.region, delta.deleted)
+    for resource_id in set(delta.tags_set) | set(delta.tags_removed):
+        if store.update_tags(delta.account, delta.region, resource_id, delta.tags_set.get(resource_id), delta.tags_removed.get(resource_id)):
+            result['tagged'] += 1
+
+    # the current credentials can only describe resources of their own account, the session knows which one.
+    if describe:
+        context.get_aws_session()
+    can_describe    = describe and delta.account == context.obj['caller_id']['Account']
+    deleted         = set(delta.deleted)
+    refreshed       = []
+    for resource_type in delta.resource_types():
+        spec            = RESOURCE_TYPES[resource_type]
+        resource_ids    = sorted(resource_id for resource_id in delta.refreshed if get_resource_type(resource_id) == resource_type)
+        if not resource_ids:
+            continue
+
+        if can_describe:
+            request = dict(spec['api_request_config'], Filters=[{'Name': ID_FILTERS[resource_type], 'Values': resource_ids}])
+            results = context.get_from_aws_api(
+                api_namespace=spec['api_namespace'], api_name=spec['api_name'], api_response_key=spec['api_response_key'],
+                api_request_config=request, region=delta.region
+            ) or []
+            items   = spec['items'](results) if spec['items'] else results
+            found   = {item[spec['id']] for item in items}
+            result['described'] += store.put(delta.account, delta.region, resource_type, items)
+            result['deleted']   += store.delete(delta.account, delta.region, set(resource_ids) - found)
+            deleted             |= set(resource_ids) - found
+
+        # a created resource is missing from every cached listing that should hold it.
+        refreshed.append((spec['api_namespace'], [spec['api_name']]))
+
+    patched                 = patch_cache(context, delta.region, deleted, delta.tags_set, delta.tags_removed)
+    result['patched']       += patched['patched']
+    result['invalidated']   += patched['invalidated']
+    for namespace, apis in refreshed + delta.invalidated:
+        result['invalidated'] += invalidate_cache(context, namespace, delta.region, apis)
+
+    store.touch(delta.account, delta.region, delta.resource_types())
+    context.dlog('[apply_delta]::[{}]::[{}]', delta.event_name, result)
+    return result
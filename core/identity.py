@@ -0,0 +1,90 @@
+"""
+Caller identity resolution for AWS sessions.
+
+`sts.get_caller_identity()` is only called once per (profile, credentials fingerprint); the result is kept in memory
+and in the API cache until the credentials expire, so repeated session and client creation costs no STS round trips.
+The identity of the last session of each profile is also kept without expiry, `--offline` runs resolve their cache
+namespace from it without any credentials.
+"""
+import hashlib
+import threading
+import time
+
+# identities of long term credentials carry no expiry, they are re-checked after this many seconds.
+STATIC_CREDENTIALS_TTL = 43200
+
+# the last identity of a profile is kept until replaced.
+LAST_IDENTITY_TTL = 9999999999
+
+
+def get_credentials_fingerprint(credentials):
+    """
+    Fingerprint of the credentials a session resolved to; the secret key is never part of it.
+    :return: (String) sha256 hex digest, empty if the session has no credentials.
+    """
+    if credentials is None:
+        return ''
+    frozen = credentials.get_frozen_credentials()
+    return hashlib.sha256('{}.{}'.format(frozen.access_key, frozen.token or '').encode('utf-8')).hexdigest()
+
+
+def get_credentials_expiry(credentials):
+    """:return: (Float) Epoch time the credentials expire, static credentials expire after STATIC_CREDENTIALS_TTL."""
+    expiry_time = getattr(credentials, '_expiry_time', None)
+    if expiry_time is not None:
+        return expiry_time.timestamp()
+    return time.time() + STATIC_CREDENTIALS_TTL
+
+
+class IdentityCache(object):
+    """Caller identities keyed by (profile, credentials fingerprint), with a count of the STS calls made."""
+
+    def __init__(self, context):
+        self.context    = context
+        self.lock       = threading.Lock()
+        self.identities = {}
+        self.sts_calls  = 0
+
+    def get_identity(self, session, profile=''):
+        """
+        :param session: (boto3.session.Session)
+        :param profile: (String) Named profile the session was started with.
+        :return: (Dict) get_caller_identity response without the ResponseMetadata.
+        """
+        credentials = session.get_credentials()
+        fingerprint = get_credentials_fingerprint(credentials)
+        key         = 'identity.{}'.format(hashlib.md5('{}.{}'.format(profile, fingerprint).encode('utf-8')).hexdigest())
+
+        with self.lock:
+            identity = self.identities.get(key)
+            if identity is None or identity['expires_at'] <= time.time():
+                identity = self.context.get_cache(key, None, STATIC_CREDENTIALS_TTL)
+                if identity is None or identity['expires_at'] <= time.time():
+                    identity = self.fetch_identity(session, credentials)
+                    self.context.put_cache(key, identity, cache_meta={'namespace': 'sts', 'api': 'get_caller_identity', 'ttl': STATIC_CREDENTIALS_TTL})
+                else:
+                    self.context.dlog('[get_identity]::[cached identity]::[{}]', key)
+                self.identities[key] = identity
+
+        return identity['caller_id']
+
+    def fetch_identity(self, session, credentials):
+        self.context.dlog('[get_identity]::[sts:get_caller_identity]')
+        caller_id = session.client('sts').get_caller_identity()
+        caller_id.pop('ResponseMetadata', None)
+        self.sts_calls += 1
+
+        return {'caller_id': caller_id, 'expires_at': get_credentials_expiry(credentials)}
+
+    def get_last_identity_key(self, profile=''):
+        return 'identity.last.{}'.format(hashlib.md5(profile.encode('utf-8')).hexdigest())
+
+    def remember(self, profile, caller_id):
+        """Keeps the identity (with the region) of the last session started with a profile, see `get_last_identity`."""
+        key = self.get_last_identity_key(profile)
+        if self.context.get_cache(key, None, LAST_IDENTITY_TTL) != caller_id:
+            self.context.put_cache(key, caller_id, cache_meta={'namespace': 'sts', 'api': 'get_caller_identity', 'ttl': 0})
+
+    def get_last_identity(self, profile=''):
+        """:return: (Dict) Identity of the last session started with a profile, None if it never ran online."""
+        return self.context.get_cache(self.get_last_identity_key(profile), None, LAST_IDENTITY_TTL)
@@ -0,0 +1,284 @@
+"""
+Local inventory of AWS resources, kept in `{--data-dir}/inventory/inventory.sqlite3` by `inventory sync`.
+
+One row per resource keyed by (account, region, type, id), with indexed tags, parent ids (volume of a snapshot,
+attachments of a volume, ...) and state, so commands can query the store instead of describing every resource again.
+A sync only writes the resources whose content changed and removes the ones that are gone; EC2 has no "changed
+since" listing, so every sync is still a full listing of each type. Between syncs, `inventory ingest` applies the
+changes read from CloudTrail/EventBridge events (`core/events.py`).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from core import serialize
+from core.cache import SqliteTransaction
+from core.compact import set_tags
+
+
+def get_instance_parents(item):
+    return [('image', item.get('ImageId')), ('vpc', item.get('VpcId')), ('subnet', item.get('SubnetId'))]
+
+
+def get_volume_parents(item):
+    return [('instance', a.get('InstanceId')) for a in item.get('Attachments', [])] + [('snapshot', item.get('SnapshotId'))]
+
+
+def get_snapshot_parents(item):
+    return [('volume', item.get('VolumeId'))]
+
+
+def get_image_parents(item):
+    return [('snapshot', m['Ebs'].get('SnapshotId')) for m in item.get('BlockDeviceMappings', []) if 'Ebs' in m]
+
+
+def get_reservation_items(results):
+    return [instance for reservation in results for instance in reservation['Instances']]
+
+
+# type => how it is listed and indexed; `items` flattens the api results into resources when set.
+RESOURCE_TYPES = OrderedDict([
+    ('instances', {
+        'api_namespace': 'ec2', 'api_name': 'describe_instances', 'api_response_key': 'Reservations',
+        'api_request_config': {'PaginationConfig': {}}, 'id': 'InstanceId', 'items': get_reservation_items,
+        'state': lambda item: item.get('State', {}).get('Name'), 'parents': get_instance_parents,
+    }),
+    ('volumes', {
+        'api_namespace': 'ec2', 'api_name': 'describe_volumes', 'api_response_key': 'Volumes',
+        'api_request_config': {'PaginationConfig': {}}, 'id': 'VolumeId', 'items': None,
+        'state': lambda item: item.get('State'), 'parents': get_volume_parents,
+    }),
+    ('snapshots', {
+        'api_namespace': 'ec2', 'api_name': 'describe_snapshots', 'api_response_key': 'Snapshots',
+        'api_request_config': {'OwnerIds': ['self'], 'PaginationConfig': {}}, 'id': 'SnapshotId', 'items': None,
+        'state': lambda item: item.get('State'), 'parents': get_snapshot_parents,
+    }),
+    ('images', {
+        'api_namespace': 'ec2', 'api_name': 'describe_images', 'api_response_key': 'Images',
+        'api_request_config': {'Owners': ['self']}, 'id': 'ImageId', 'items': None,
+        'state': lambda item: item.get('State'), 'parents': get_image_parents,
+    }),
+])
+
+
+def get_digest(item):
+    return hashlib.md5(json.dumps(item, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class InventoryStore(object):
+    """SQLite store of resources, one connection per thread like the sqlite cache backend."""
+    db_name         = 'inventory.sqlite3'
+    schema_version  = 1
+    schema          = [
+        '''CREATE TABLE IF NOT EXISTS resources (
+            account         TEXT NOT NULL,
+            region          TEXT NOT NULL,
+            resource_type   TEXT NOT NULL,
+            resource_id     TEXT NOT NULL,
+            state           TEXT,
+            digest          TEXT NOT NULL,
+            updated_at      REAL NOT NULL,
+            payload         BLOB,
+            PRIMARY KEY (account, region, resource_type, resource_id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_resources_id ON resources (resource_id)',
+        'CREATE INDEX IF NOT EXISTS idx_resources_state ON resources (account, region, resource_type, state)',
+        '''CREATE TABLE IF NOT EXISTS resource_tags (
+            account         TEXT NOT NULL,
+            region          TEXT NOT NULL,
+            resource_id     TEXT NOT NULL,
+            key             TEXT NOT NULL,
+            value           TEXT,
+            PRIMARY KEY (account, region, resource_id, key)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_resource_tags_key ON resource_tags (key, value)',
+        '''CREATE TABLE IF NOT EXISTS resource_parents (
+            account         TEXT NOT NULL,
+            region          TEXT NOT NULL,
+            resource_id     TEXT NOT NULL,
+            parent_type     TEXT NOT NULL,
+            parent_id       TEXT NOT NULL,
+            PRIMARY KEY (account, region, resource_id, parent_type, parent_id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_resource_parents_parent ON resource_parents (parent_id)',
+        '''CREATE TRIGGER IF NOT EXISTS trg_resources_delete AFTER DELETE ON resources BEGIN
+            DELETE FROM resource_tags WHERE account = old.account AND region = old.region AND resource_id = old.resource_id;
+            DELETE FROM resource_parents WHERE account = old.account AND region = old.region AND resource_id = old.resource_id;
+        END''',
+        '''CREATE TABLE IF NOT EXISTS syncs (
+            account         TEXT NOT NULL,
+            region          TEXT NOT NULL,
+            resource_type   TEXT NOT NULL,
+            synced_at       REAL NOT NULL,
+            items           INTEGER NOT NULL,
+            PRIMARY KEY (account, region, resource_type)
+        )''',
+    ]
+
+    def __init__(self, context, inventory_dir='data/inventory'):
+        self.context        = context
+        self.inventory_dir  = inventory_dir
+        self.db_path        = os.path.join(inventory_dir, self.db_name)
+        self.local          = threading.local()
+
+    def get_connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.inventory_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA recursive_triggers=ON')   # replaced resources also drop their tags and parents.
+            if conn.execute('PRAGMA user_version').fetchone()[0] != self.schema_version:
+                for table in ['resources', 'resource_tags', 'resource_parents', 'syncs']:
+                    conn.execute('DROP TABLE IF EXISTS {}'.format(table))
+                conn.execute('PRAGMA user_version = {}'.format(self.schema_version))
+            for statement in self.schema:
+                conn.execute(statement)
+            self.local.conn = conn
+        return conn
+
+    def transaction(self):
+        return SqliteTransaction(self.get_connection())
+
+    def sync(self, account, region, resource_type, items):
+        """
+        Replaces the resources of a type in a region with `items`, writing only those that changed.
+        :return: (Dict) [added, updated, removed, unchanged]
+        """
+        spec    = RESOURCE_TYPES[resource_type]
+        result  = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+        with self.transaction() as conn:
+            digests = dict(conn.execute(
+                'SELECT resource_id, digest FROM resources WHERE account = ? AND region = ? AND resource_type = ?',
+                (account, region, resource_type)
+            ))
+            for item in items:
+                resource_id = item[spec['id']]
+                digest      = get_digest(item)
+                previous    = digests.pop(resource_id, None)
+                if previous == digest:
+                    result['unchanged'] += 1
+                    continue
+                self.write(conn, account, region, resource_type, item, digest)
+                result['updated' if previous else 'added'] += 1
+
+            conn.executemany(
+                'DELETE FROM resources WHERE account = ? AND region = ? AND resource_type = ? AND resource_id = ?',
+                [(account, region, resource_type, resource_id) for resource_id in digests]
+            )
+            result['removed'] = len(digests)
+            conn.execute(
+                'INSERT OR REPLACE INTO syncs (account, region, resource_type, synced_at, items) VALUES (?, ?, ?, ?, ?)',
+                (account, region, resource_type, time.time(), result['added'] + result['updated'] + result['unchanged'])
+            )
+        return result
+
+    def write(self, conn, account, region, resource_type, item, digest=None):
+        spec        = RESOURCE_TYPES[resource_type]
+        resource_id = item[spec['id']]
+        conn.execute(
+            'INSERT OR REPLACE INTO resources (account, region, resource_type, resource_id, state, digest, updated_at, payload) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (account, region, resource_type, resource_id, spec['state'](item), digest or get_digest(item), time.time(),
+             serialize.dumps(item))
+        )
+        # INSERT OR REPLACE is a delete and an insert, the trigger already dropped the previous tags and parents.
+        conn.executemany(
+            'INSERT OR REPLACE INTO resource_tags (account, region, resource_id, key, value) VALUES (?, ?, ?, ?, ?)',
+            [(account, region, resource_id, tag['Key'], tag.get('Value')) for tag in item.get('Tags') or []]
+        )
+        conn.executemany(
+            'INSERT OR IGNORE INTO resource_parents (account, region, resource_id, parent_type, parent_id) VALUES (?, ?, ?, ?, ?)',
+            [(account, region, resource_id, parent_type, parent_id) for parent_type, parent_id in spec['parents'](item) if parent_id]
+        )
+
+    def put(self, account, region, resource_type, items):
+        """Saves resources, leaving the others of the type in place. :return: (Int) Resources that changed."""
+        spec    = RESOURCE_TYPES[resource_type]
+        rv      = 0
+        with self.transaction() as conn:
+            for item in items:
+                digest  = get_digest(item)
+                row     = conn.execute(
+                    'SELECT digest FROM resources WHERE account = ? AND region = ? AND resource_type = ? AND resource_id = ?',
+                    (account, region, resource_type, item[spec['id']])
+                ).fetchone()
+                if row is None or row[0] != digest:
+                    self.write(conn, account, region, resource_type, item, digest)
+                    rv += 1
+        return rv
+
+    def delete(self, account, region, resource_ids):
+        """:return: (Int) Resources removed."""
+        with self.transaction() as conn:
+            return conn.executemany(
+                'DELETE FROM resources WHERE account = ? AND region = ? AND resource_id = ?',
+                [(account, region, resource_id) for resource_id in resource_ids]
+            ).rowcount
+
+    def update_tags(self, account, region, resource_id, tags_set=None, tags_removed=None):
+        """Updates the tags of a resource in place. :return: (Boolean) False when the resource is not in the store."""
+        with self.transaction() as conn:
+            row = conn.execute(
+                'SELECT resource_type, payload FROM resources WHERE account = ? AND region = ? AND resource_id = ?',
+                (account, region, resource_id)
+            ).fetchone()
+            if row is None:
+                return False
+            item            = serialize.loads(row[1])
+            item['Tags']    = set_tags(item.get('Tags'), tags_set, tags_removed)
+            self.write(conn, account, region, row[0], item)
+        return True
+
+    def touch(self, account, region, resource_types):
+        """Marks types already synced in a region as current, once the changes of newer events are applied."""
+        with self.transaction() as conn:
+            conn.executemany(
+                'UPDATE syncs SET synced_at = ? WHERE account = ? AND region = ? AND resource_type = ?',
+                [(time.time(), account, region, resource_type) for resource_type in resource_types]
+            )
+
+    def get_resources(self, account, region, resource_type, state=None, tag_key=None, tag_value=None, parent_id=None):
+        """:return: (List) Stored resources of a type in a region, as returned by the describe api."""
+        where   = ['r.account = ?', 'r.region = ?', 'r.resource_type = ?']
+        params  = [account, region, resource_type]
+        if state is not None:
+            where.append('r.state = ?')
+            params.append(state)
+        if tag_key is not None:
+            where.append('EXISTS (SELECT 1 FROM resource_tags t WHERE t.account = r.account AND t.region = r.region '
+                         'AND t.resource_id = r.resource_id AND t.key = ?{})'.format('' if tag_value is None else ' AND t.value = ?'))
+            params.extend([tag_key] if tag_value is None else [tag_key, tag_value])
+        if parent_id is not None:
+            where.append('EXISTS (SELECT 1 FROM resource_parents p WHERE p.account = r.account AND p.region = r.region '
+                         'AND p.resource_id = r.resource_id AND p.parent_id = ?)')
+            params.append(parent_id)
+
+        rows = self.get_connection().execute(
+            'SELECT r.payload FROM resources r WHERE {} ORDER BY r.resource_id'.format(' AND '.join(where)), params
+        )
+        return [serialize.loads(row[0]) for row in rows]
+
+    def get_last_sync(self, account, region, resource_type):
+        """:return: (Float) Time of the last sync, or events applied, of a type in a region; None if never synced."""
+        row = self.get_connection().execute(
+            'SELECT synced_at FROM syncs WHERE account = ? AND region = ? AND resource_type = ?', (account, region, resource_type)
+        ).fetchone()
+        return row[0] if row else None
+
+    def stats(self):
+        """:return: (List) [account, region, resource_type, items, synced_at] of every sync."""
+        columns = ['account', 'region', 'resource_type', 'items', 'synced_at']
+        rows    = self.get_connection().execute(
+            'SELECT s.account, s.region, s.resource_type, COUNT(r.resource_id), s.synced_at FROM syncs s '
+            'LEFT JOIN resources r ON r.account = s.account AND r.region = s.region AND r.resource_type = s.resource_type '
+            'GROUP BY s.account, s.region, s.resource_type ORDER BY s.account, s.region, s.resource_type'
+        )
+        return [dict(zip(columns, row)) for row in rows]
+
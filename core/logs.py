@@ -0,0 +1,61 @@
+"""
+Log lines of `Context.log`, `vlog` and `dlog`, written to stderr as text (Default) or json lines (`--log-format json`).
+
+Messages are formatted only once their level is enabled: `dlog('{}::[page]::[{}]', log_prefix, page_no)` formats the
+arguments with `str.format`, and a callable message (`dlog(lambda: ...)`) is only called then. A debug line in a hot
+loop costs a flag check when `-d` is off, never the `format` of a whole response. Keyword arguments are fields of the
+line (`region=`, `api=`, `duration=`, ...), only written in json lines, next to the run uuid, level and command.
+"""
+import json
+import sys
+import time
+
+import click
+
+LOG_FORMATS = ['text', 'json']
+
+
+def format_message(msg, args):
+    """:return: (String) `msg` called when it is a callable, formatted with `args` when there are any."""
+    if callable(msg):
+        msg = msg()
+    if args:
+        return msg.format(*args)
+    return '{}'.format(msg)
+
+
+class Logger(object):
+    """Writes the log lines of a run; the timestamp is formatted once per second, not once per line."""
+
+    def __init__(self, uuid, log_format='text'):
+        self.uuid       = uuid
+        self.log_format = log_format
+        self.command    = ''
+        self.stamp      = (None, '')
+
+    def configure(self, log_format='text', command=''):
+        self.log_format = log_format
+        self.command    = command
+
+    def get_timestamp(self, now):
+        second = int(now)
+        stamp  = self.stamp
+        if stamp[0] != second:
+            stamp = self.stamp = (second, time.strftime('%Y/%m/%d %H:%M:%S UTC', time.gmtime(second)))
+        return stamp[1]
+
+    def emit(self, level, msg, args = (), fields = None):
+        """
+        :param level: (String) info, verbose or debug; the caller already checked it is enabled.
+        :param msg: (String|Callable) Message, or a callable returning it.
+        :param args: (Tuple) Arguments of `msg.format`.
+        :param fields: (Dict) Fields of the json line, ex: `{'region': 'us-east-1', 'duration': 0.25}`.
+        """
+        now     = time.time()
+        message = format_message(msg, args)
+        if self.log_format == 'json':
+            line = {'time': self.get_timestamp(now), 'uuid': self.uuid, 'level': level, 'command': self.command, 'message': message}
+            line.update(fields or {})
+            click.echo(json.dumps(line, default=str), file=sys.stderr)
+        else:
+            click.echo('[{}]::[{}]::{}'.format(self.uuid, self.get_timestamp(now), message), file=sys.stderr)
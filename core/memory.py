@@ -0,0 +1,140 @@
+"""
+In-process (L1) cache in front of the disk cache backends, plus coalescing of concurrent identical calls.
+
+Entries are kept decoded, keyed by call namespace, and bounded by their estimated json size; the least recently
+used entries are dropped first. Results are shared between callers and must be treated as read only.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from core.cache import MISSING
+
+# items of a listing sized to estimate the size of the whole listing.
+SIZE_SAMPLE = 32
+
+
+def estimate_size(results):
+    """
+    :return: (Integer) Approximate json size of results; long lists are sized from a sample of their items, so a put
+        costs the same for any listing size.
+    """
+    if isinstance(results, list) and len(results) > SIZE_SAMPLE:
+        step    = len(results) / SIZE_SAMPLE
+        sample  = [results[int(i * step)] for i in range(SIZE_SAMPLE)]
+        return len(json.dumps(sample, default=str)) * len(results) // SIZE_SAMPLE
+    return len(json.dumps(results, default=str))
+
+
+class MemoryCache(object):
+    """Byte bounded LRU of decoded results, with single flight coalescing of identical calls."""
+
+    def __init__(self, context, max_bytes=67108864):
+        """
+        :param context: (cli.Context)
+        :param max_bytes: (Integer) Approximate size of the results kept in memory, zero disables the L1 cache.
+        """
+        self.context    = context
+        self.max_bytes  = max_bytes
+        self.lock       = threading.Lock()
+        self.entries    = OrderedDict()
+        self.flights    = {}
+        self.bytes      = 0
+        self.stats      = {'hits': 0, 'misses': 0, 'evicted': 0, 'coalesced': 0}
+
+    def get(self, name_space, cache_ttl=0, stale_ttl=0):
+        """:return: (Tuple) (results, state, age) with state hit or stale, or MISSING."""
+        with self.lock:
+            entry = self.entries.get(name_space)
+            if entry is None:
+                self.stats['misses'] += 1
+                return MISSING
+
+            results, size, created_at, meta = entry
+            age = time.time() - created_at
+            if age > cache_ttl + stale_ttl:
+                self.remove(name_space)
+                self.stats['misses'] += 1
+                return MISSING
+
+            self.entries.move_to_end(name_space)
+            self.stats['hits'] += 1
+            return results, 'stale' if age > cache_ttl else 'hit', age
+
+    def put(self, name_space, results, age=0, meta=None, size=None):
+        """
+        Keeps `results`, cached `age` seconds ago, unless they are larger than the whole cache.
+        :param meta: (Dict) Attributes of the entry [namespace, region, api], used by `patch` and `invalidate`.
+        :param size: (Integer) Json size of the results when known, estimated otherwise.
+        """
+        if not self.max_bytes:
+            return
+
+        size = estimate_size(results) if size is None else size
+        with self.lock:
+            self.remove(name_space)
+            if size > self.max_bytes:
+                return
+
+            self.entries[name_space]    = (results, size, time.time() - age, meta or {})
+            self.bytes                  += size
+            while self.bytes > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.stats['evicted'] += 1
+
+    def remove(self, name_space):
+        entry = self.entries.pop(name_space, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def get_matching(self, namespace, region, apis):
+        return [
+            name_space for name_space, entry in self.entries.items()
+            if entry[3].get('namespace') == namespace and entry[3].get('region') == region and entry[3].get('api') in apis
+        ]
+
+    def patch(self, namespace, region, apis, func):
+        """Same as `CacheBackend.patch`, for the entries held in memory. :return: (Dict) [patched, invalidated]"""
+        result = {'patched': 0, 'invalidated': 0}
+        with self.lock:
+            for name_space in self.get_matching(namespace, region, apis):
+                results, size, created_at, meta = self.entries[name_space]
+                updated = func(results)
+                if updated is MISSING:
+                    self.remove(name_space)
+                    result['invalidated'] += 1
+                elif updated is not results:
+                    self.entries[name_space]    = (updated, size, created_at, meta)
+                    result['patched']           += 1
+        return result
+
+    def invalidate(self, namespace, region, apis):
+        """:return: (Int) Entries removed."""
+        with self.lock:
+            matching = self.get_matching(namespace, region, apis)
+            for name_space in matching:
+                self.remove(name_space)
+            return len(matching)
+
+    def join(self, name_space):
+        """
+        Single flight: the first caller of a name space leads and must `leave()` once its future is resolved, others
+        wait on the same future.
+        :return: (Tuple) (Future, Boolean leader)
+        """
+        with self.lock:
+            if name_space in self.flights:
+                self.stats['coalesced'] += 1
+                return self.flights[name_space], False
+            self.flights[name_space] = Future()
+            return self.flights[name_space], True
+
+    def leave(self, name_space):
+        with self.lock:
+            self.flights.pop(name_space, None)
+
+    def hit_ratio(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return 100.0 * self.stats['hits'] / lookups if lookups else 0.0
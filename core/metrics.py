@@ -0,0 +1,264 @@
+"""
+Metrics of the AWS calls of a run, per (service, api, region).
+
+Two layers are recorded:
+* calls of `get_from_aws_api` / `iter_from_aws_api` (and the async calls), by source: `cache`, `stale`, `live` or
+  `missing` (a cached not found result), with the items received from AWS;
+* requests sent by the pooled clients, direct (ex: mutating) calls included: requests (one per page), response bytes,
+  a latency histogram, throttles, retries and errors.
+
+`--metrics` prints them as a table on stderr once the command completes, `--metrics-file` writes them as json or
+OpenMetrics text (`--metrics-format`). Nothing is recorded, and no client handler registered, without either option.
+"""
+import bisect
+import json
+import sys
+import threading
+import time
+
+import click
+
+from core.throttle import THROTTLE_ERRORS, get_error_code
+
+METRICS_FORMATS = ['json', 'openmetrics']
+
+# sources of a call, see `Context.last_call`.
+CALL_SOURCES = ['cache', 'stale', 'live', 'missing']
+
+# upper bounds of the request latency histogram buckets, in seconds.
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# prefix of the OpenMetrics metric names.
+METRIC_PREFIX = 'ops_cli_aws'
+
+
+class ApiMetrics(object):
+    """Counters and request latency histogram of one (service, api, region)."""
+
+    def __init__(self):
+        self.sources        = dict.fromkeys(CALL_SOURCES, 0)
+        self.requests       = 0
+        self.items          = 0
+        self.bytes          = 0
+        self.throttles      = 0
+        self.retries        = 0
+        self.errors         = 0
+        self.latency        = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum    = 0.0
+        self.latency_max    = 0.0
+
+    def calls(self):
+        return sum(self.sources.values())
+
+    def observe(self, seconds):
+        self.latency[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency_sum += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+    def percentile(self, ratio):
+        """:return: (Float) Upper bound of the histogram bucket holding the `ratio` percentile, at most the max latency."""
+        count = sum(self.latency)
+        seen  = 0
+        for bound, observed in zip(LATENCY_BUCKETS + [self.latency_max], self.latency):
+            seen += observed
+            if count and seen >= ratio * count:
+                return min(bound, self.latency_max)
+        return 0.0
+
+    def to_dict(self):
+        cumulative = 0
+        buckets    = {}
+        for bound, observed in zip(LATENCY_BUCKETS + ['+Inf'], self.latency):
+            cumulative          += observed
+            buckets[str(bound)] = cumulative
+        return {
+            'calls': self.calls(), 'sources': dict(self.sources), 'requests': self.requests, 'items': self.items,
+            'bytes': self.bytes, 'throttles': self.throttles, 'retries': self.retries, 'errors': self.errors,
+            'latency': {'buckets': buckets, 'count': cumulative, 'sum': self.latency_sum, 'max': self.latency_max,
+                        'p50': self.percentile(0.5), 'p95': self.percentile(0.95)},
+        }
+
+
+class MetricsRecorder(object):
+    """ApiMetrics keyed by (service, api, region), shared by every thread of a command."""
+
+    def __init__(self, context):
+        self.context    = context
+        self.lock       = threading.Lock()
+        self.metrics    = {}
+        self.started_at = time.time()
+        self.configure()
+
+    def configure(self, show=False, path=None, metrics_format='json'):
+        """
+        :param show: (Boolean) Print the summary table once the command completes.
+        :param path: (String) File the metrics are written to once the command completes.
+        :param metrics_format: (String) One of METRICS_FORMATS, format of `path`.
+        """
+        self.show           = show
+        self.path           = path
+        self.metrics_format = metrics_format
+        self.enabled        = bool(show or path)
+
+    def get(self, service, api, region):
+        """Callers hold the lock."""
+        key = (service, api, region)
+        if key not in self.metrics:
+            self.metrics[key] = ApiMetrics()
+        return self.metrics[key]
+
+    def record_call(self, cache_meta, source, results = None):
+        """
+        A `get_from_aws_api` call completed.
+        :param cache_meta: (Dict) namespace (service), api and region of the call.
+        :param source: (String) One of CALL_SOURCES.
+        :param results: Result of a live call, its items are counted.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            metrics = self.get(cache_meta['namespace'], cache_meta['api'], cache_meta['region'])
+            metrics.sources[source] = metrics.sources.get(source, 0) + 1
+            if source == 'live' and results is not None:
+                metrics.items += len(results) if type(results) is list else 1
+
+    def record_items(self, cache_meta, count):
+        """Items of a live `iter_from_aws_api` call, counted once they were all received."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.get(cache_meta['namespace'], cache_meta['api'], cache_meta['region']).items += count
+
+    def register(self, client, service, region, aio=False):
+        """
+        Records every request sent by `client`, from the `before-call` to the `after-call` event of each page.
+        :param aio: (Boolean) `client` is an aiobotocore client, the content of its responses is awaited.
+        """
+        if not self.enabled:
+            return
+
+        from botocore import xform_name
+
+        def before_call(context=None, **kwargs):
+            context['metrics_started_at'] = time.monotonic()
+
+        def after_call(http_response=None, model=None, context=None, **kwargs):
+            if model.has_streaming_output:
+                size = int(http_response.headers.get('content-length') or 0)
+            else:
+                size = len(http_response.content or b'')
+            record_call(http_response, model, context, size)
+
+        async def aafter_call(http_response=None, model=None, context=None, **kwargs):
+            if model.has_streaming_output:
+                size = int(http_response.headers.get('content-length') or 0)
+            else:
+                size = len(await http_response.content or b'')
+            record_call(http_response, model, context, size)
+
+        def record_call(http_response, model, context, size):
+            elapsed = time.monotonic() - context.get('metrics_started_at', time.monotonic())
+            with self.lock:
+                metrics = self.get(service, xform_name(model.name), region)
+                metrics.requests    += 1
+                metrics.bytes       += size
+                metrics.errors      += 1 if http_response.status_code >= 300 else 0
+                metrics.observe(elapsed)
+
+        def after_call_error(model=None, context=None, **kwargs):
+            elapsed = time.monotonic() - context.get('metrics_started_at', time.monotonic())
+            with self.lock:
+                metrics = self.get(service, xform_name(model.name), region)
+                metrics.requests    += 1
+                metrics.errors      += 1
+                metrics.observe(elapsed)
+
+        def response_received(parsed_response=None, context=None, event_name='', **kwargs):
+            throttled   = get_error_code(parsed_response) in THROTTLE_ERRORS
+            retried     = context is not None and context.get('retries', {}).get('attempt', 1) > 1
+            if throttled or retried:
+                with self.lock:
+                    metrics = self.get(service, xform_name(event_name.split('.')[-1]), region)
+                    metrics.throttles   += 1 if throttled else 0
+                    metrics.retries     += 1 if retried else 0
+
+        client.meta.events.register('before-call', before_call)
+        client.meta.events.register('after-call', aafter_call if aio else after_call)
+        client.meta.events.register('after-call-error', after_call_error)
+        client.meta.events.register('response-received', response_received)
+
+    def snapshot(self):
+        """:return: (List) (service, api, region, ApiMetrics dict) sorted by service, api and region."""
+        with self.lock:
+            return [key + (self.metrics[key].to_dict(),) for key in sorted(self.metrics)]
+
+    def to_json(self):
+        return json.dumps({
+            'uuid': self.context.uuid, 'command': self.context.logger.command, 'started_at': self.started_at,
+            'duration': time.time() - self.started_at,
+            'apis': [dict(service=service, api=api, region=region, **metrics) for service, api, region, metrics in self.snapshot()],
+        }, indent=2)
+
+    def to_openmetrics(self):
+        """:return: (String) OpenMetrics text exposition of the counters and the latency histogram."""
+        counters    = [('calls', 'get_from_aws_api calls by source.'), ('requests', 'Requests sent to AWS, one per page.'),
+                       ('items', 'Items received from AWS.'), ('response_bytes', 'Bytes of the AWS responses.'),
+                       ('throttles', 'Throttled request attempts.'), ('retries', 'Retried request attempts.'),
+                       ('errors', 'Requests that failed.')]
+        snapshot    = self.snapshot()
+        lines       = []
+        for name, help_text in counters:
+            lines.extend(['# TYPE {}_{} counter'.format(METRIC_PREFIX, name), '# HELP {}_{} {}'.format(METRIC_PREFIX, name, help_text)])
+            for service, api, region, metrics in snapshot:
+                labels = 'command="{}",service="{}",api="{}",region="{}"'.format(self.context.logger.command, service, api, region)
+                if name == 'calls':
+                    for source in CALL_SOURCES:
+                        lines.append('{}_calls_total{{{},source="{}"}} {}'.format(METRIC_PREFIX, labels, source, metrics['sources'][source]))
+                else:
+                    lines.append('{}_{}_total{{{}}} {}'.format(METRIC_PREFIX, name, labels, metrics['bytes' if name == 'response_bytes' else name]))
+
+        name = '{}_request_latency_seconds'.format(METRIC_PREFIX)
+        lines.extend(['# TYPE {} histogram'.format(name), '# HELP {} Latency of the requests sent to AWS, retries included.'.format(name)])
+        for service, api, region, metrics in snapshot:
+            labels = 'command="{}",service="{}",api="{}",region="{}"'.format(self.context.logger.command, service, api, region)
+            for bound, count in metrics['latency']['buckets'].items():
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, count))
+            lines.append('{}_count{{{}}} {}'.format(name, labels, metrics['latency']['count']))
+            lines.append('{}_sum{{{}}} {}'.format(name, labels, metrics['latency']['sum']))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def print_summary(self):
+        row = '{:<44}{:<16}{:>7}{:>7}{:>7}{:>7}{:>7}{:>9}{:>9}{:>10}{:>9}{:>9}{:>9}{:>7}{:>7}{:>7}'
+        click.echo(row.format('Api', 'Region', 'Calls', 'Hits', 'Stale', 'Miss', 'Neg', 'Requests', 'Items', 'Bytes',
+                              'p50', 'p95', 'Max', 'Thr', 'Retry', 'Error'), file=sys.stderr)
+        for service, api, region, metrics in self.snapshot():
+            latency = metrics['latency']
+            click.echo(row.format(
+                '{}:{}'.format(service, api), region, metrics['calls'], metrics['sources']['cache'], metrics['sources']['stale'],
+                metrics['sources']['live'], metrics['sources']['missing'], metrics['requests'], metrics['items'],
+                format_bytes(metrics['bytes']), format_seconds(latency['p50']), format_seconds(latency['p95']),
+                format_seconds(latency['max']), metrics['throttles'], metrics['retries'], metrics['errors']
+            ), file=sys.stderr)
+
+    def report(self):
+        """Called once the command completes: prints the summary table and writes the metrics file."""
+        if self.show:
+            self.print_summary()
+        if self.path:
+            with open(self.path, 'w') as f:
+                f.write(self.to_openmetrics() if self.metrics_format == 'openmetrics' else self.to_json())
+            self.context.vlog('[metrics]::[saved]::[{}]::[{}]', self.metrics_format, self.path)
+
+
+def format_bytes(num_bytes):
+    """:return: (String) Human readable size, ex: `1.5MB`."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return '{:.0f}{}'.format(num_bytes, unit) if unit == 'B' else '{:.1f}{}'.format(num_bytes, unit)
+        num_bytes /= 1024
+    return '{:.1f}TB'.format(num_bytes)
+
+
+def format_seconds(seconds):
+    return '{:.0f}ms'.format(seconds * 1000) if seconds < 10 else '{:.1f}s'.format(seconds)
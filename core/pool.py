@@ -0,0 +1,194 @@
+"""
+Client pool shared by every thread of a command.
+
+boto3 sessions are not thread safe but the clients they create are, so sessions and clients are only ever created
+under the pool lock and each client is then shared by all threads asking for the same (profile, service, region).
+Each client is built with the botocore `Config` given on the command line, is rate limited by `core.throttle`, checks
+the time budget of the calling thread before each request attempt (`core.deadline`) and reports how many requests it
+had in flight at once, to size `max_pool_connections`; with `--metrics` its requests are recorded by `core.metrics`.
+The async clients of `core.aio` get the same hooks through `register_hooks`.
+
+Sessions made by `create_session` share one botocore loader for the whole process, so the service models, paginators and
+endpoint data parsed for one session are reused by every other session and region instead of being loaded again.
+"""
+import threading
+from functools import partial
+
+RETRY_MODES = ['legacy', 'standard', 'adaptive']
+
+# botocore loaders shared by the sessions of the process, one per data path (AWS_DATA_PATH).
+LOADERS     = {}
+LOADER_LOCK = threading.Lock()
+
+
+def get_shared_loader(botocore_session):
+    """:return: (botocore.loaders.Loader) Loader of the process for the data path of `botocore_session`."""
+    from botocore.loaders import create_loader
+
+    data_path = botocore_session.get_config_variable('data_path')
+    with LOADER_LOCK:
+        if data_path not in LOADERS:
+            LOADERS[data_path] = create_loader(data_path)
+        return LOADERS[data_path]
+
+
+def create_session(profile_name=None, region_name=None):
+    """
+    Same as `boto3.session.Session(profile_name, region_name)`, with the loader shared by every session of the process.
+    :return: (boto3.session.Session)
+    """
+    # boto3 is the slowest import of the cli, it is only imported by the first session of a run.
+    import boto3.session
+    import botocore.session
+
+    botocore_session    = botocore.session.Session()
+    loader              = get_shared_loader(botocore_session)
+    botocore_session.register_component('data_loader', loader)
+    session             = boto3.session.Session(botocore_session=botocore_session, profile_name=profile_name, region_name=region_name)
+
+    # each boto3 session adds its own data path to the loader, keep it once.
+    with LOADER_LOCK:
+        loader.search_paths[:] = list(dict.fromkeys(loader.search_paths))
+    return session
+
+
+class LazyClient(object):
+    """Stands in for a pooled client, which is only created (and its service model loaded) on first use."""
+
+    def __init__(self, pool, service, region=None, profile=''):
+        self._pool      = pool
+        self._args      = (service, region, profile)
+        self._client    = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = self._pool.get_client(*self._args)
+        return getattr(self._client, name)
+
+
+class ClientStats(object):
+    """Requests sent through one pooled client and the most it had in flight at once."""
+
+    def __init__(self, max_pool_connections):
+        self.lock                   = threading.Lock()
+        self.max_pool_connections   = max_pool_connections
+        self.requests               = 0
+        self.in_flight              = 0
+        self.peak_in_flight         = 0
+        self.saturated              = 0
+
+    def on_send(self, **kwargs):
+        with self.lock:
+            self.requests       += 1
+            self.in_flight      += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight > self.max_pool_connections:
+                self.saturated += 1
+
+    def on_response(self, **kwargs):
+        with self.lock:
+            self.in_flight -= 1
+
+    def utilization(self):
+        return 100.0 * self.peak_in_flight / self.max_pool_connections if self.max_pool_connections else 0.0
+
+
+class ClientPool(object):
+    """Clients keyed by (profile, service, region), created once and shared across threads."""
+
+    def __init__(self, context, max_pool_connections=10, connect_timeout=60, read_timeout=60, tcp_keepalive=False,
+                 retry_mode='legacy', max_attempts=0):
+        """
+        :param context: (cli.Context) Owns the session the clients are created from.
+        :param max_pool_connections: (Integer) Max HTTP connections kept open per client.
+        :param connect_timeout: (Integer) Seconds to wait for a connection.
+        :param read_timeout: (Integer) Seconds to wait for a response.
+        :param tcp_keepalive: (Boolean) Enable TCP keep-alive on the connections.
+        :param retry_mode: (String) One of RETRY_MODES.
+        :param max_attempts: (Integer) Max attempts per call, zero keeps the default of the retry mode.
+        """
+        self.context    = context
+        self.lock       = threading.RLock()
+        self.clients    = {}
+        self.stats      = {}
+        self.configure(max_pool_connections, connect_timeout, read_timeout, tcp_keepalive, retry_mode, max_attempts)
+
+    def configure(self, max_pool_connections=10, connect_timeout=60, read_timeout=60, tcp_keepalive=False,
+                  retry_mode='legacy', max_attempts=0):
+        retries = {'mode': retry_mode}
+        if max_attempts:
+            retries['max_attempts'] = max_attempts
+
+        with self.lock:
+            self.max_pool_connections   = max_pool_connections
+            self.config_options         = {
+                'max_pool_connections': max_pool_connections,
+                'connect_timeout':      connect_timeout,
+                'read_timeout':         read_timeout,
+                'tcp_keepalive':        tcp_keepalive,
+                'retries':              retries,
+            }
+            self.config                 = None
+
+    def get_client(self, service, region=None, profile=''):
+        """
+        :param service: (String) Service name as understood by boto3 (ec2, rds, ...).
+        :param region: (String) Region name; the session region when not set.
+        :param profile: (String) Named profile the session was started with.
+        :return: (botocore.client.BaseClient)
+        """
+        requested   = (profile, service, region)
+        client      = self.clients.get(requested)
+        if client is not None:
+            return client
+
+        with self.lock:
+            session = self.context.get_aws_session(region)
+            key     = (profile, service, region or session.region_name)
+            if key not in self.clients:
+                self.context.dlog('[get_client]::[create new client]::[{}]', '::'.join(map(str, key)))
+                client          = session.client(service, key[2], config=self.get_config())
+                self.register_hooks(client, service, key[2])
+                stats           = ClientStats(self.max_pool_connections)
+                client.meta.events.register('before-send', stats.on_send)
+                client.meta.events.register('response-received', stats.on_response)
+                self.stats[key] = stats
+                self.clients[key] = client
+            # calls without a region share the client of the session region.
+            self.clients[requested] = self.clients[key]
+
+        return self.clients[key]
+
+    def register_hooks(self, client, service, region, aio=False):
+        """
+        Time budget check, rate limit and metrics of every request sent by `client`, pooled or made by the async engine.
+        :param aio: (Boolean) `client` is an aiobotocore client, its handlers may be coroutines.
+        """
+        account = self.context.obj.get('caller_id', {}).get('Account', '')
+        # the time budget is checked first, before waiting on the rate limit.
+        client.meta.events.register('before-send', partial(self.check_deadline, '[{}]::[{}]'.format(service, region)))
+        self.context.rate_limiter.register(client, account, region, service, aio)
+        self.context.metrics.register(client, service, region, aio)
+
+    def get_config(self):
+        """:return: (botocore.config.Config) Built on the first client, botocore is not imported before."""
+        from botocore.config import Config
+
+        with self.lock:
+            if self.config is None:
+                self.config = Config(**self.config_options)
+            return self.config
+
+    def get_lazy_client(self, service, region=None, profile=''):
+        """:return: (LazyClient) The client of `get_client`, created when first used; a cache hit never creates it."""
+        client = self.clients.get((profile, service, region))
+        return client if client is not None else LazyClient(self, service, region, profile)
+
+    def check_deadline(self, log_prefix, event_name='', **kwargs):
+        """before-send handler, raises `DeadlineExceeded` instead of sending a request once the time budget is spent."""
+        self.context.check_deadline('{}::[{}]'.format(log_prefix, event_name.split('.')[-1]))
+
+    def utilization(self):
+        """:return: (List) (profile, service, region, ClientStats) for every client created."""
+        with self.lock:
+            return [key + (stats,) for key, stats in sorted(self.stats.items(), key=lambda item: tuple(map(str, item[0])))]
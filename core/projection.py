@@ -0,0 +1,36 @@
+"""
+Field projection of API results, so callers that only read a few fields of each item only hold (and cache) those.
+
+`fields` is either a list of top level keys kept from each item, missing keys are left out, or a JMESPath expression
+evaluated against each item, where missing values come back as None. Items are the values under `api_response_key`,
+or the whole response when a call has no response key. Compact results (see `core/compact.py`) are compacted after
+the projection, still item by item.
+"""
+from core.compact import compact as compact_item
+
+
+def compile_projection(fields, compact=False):
+    """:return: (Callable) Projects, then compacts, a single item; None when there is nothing to do."""
+    if not fields:
+        return compact_item if compact else None
+
+    if isinstance(fields, str):
+        # jmespath is only imported by calls projecting with an expression, not to start the cli.
+        import jmespath
+        projection = jmespath.compile(fields).search
+    else:
+        fields      = list(fields)
+        projection  = lambda item: {key: item[key] for key in fields if key in item}
+
+    if compact:
+        return lambda item: compact_item(projection(item))
+    return projection
+
+
+def project(projection, items):
+    """:return: `items` projected one by one when a list, as a whole otherwise."""
+    if projection is None:
+        return items
+    if type(items) is list:
+        return [projection(item) for item in items]
+    return projection(items)
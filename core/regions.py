@@ -0,0 +1,97 @@
+"""
+Region map: the regions enabled for the account and the regions each service is deployed to.
+
+Enabled regions come from `ec2.describe_regions` (with their opt-in status), cached for REGIONS_CACHE_TTL. The regions of
+a service come from the endpoint data bundled with botocore, so a call to a service in a region it is not deployed to is
+skipped without a connection attempt. Services and regions the bundled data does not know about (global services, new
+regions) are always assumed to be available.
+"""
+import threading
+
+# describe_regions results are cached for a day, regions are rarely enabled or disabled.
+REGIONS_CACHE_TTL = 86400
+
+# OptInStatus of the regions that can be called.
+ENABLED_STATUSES = ['opt-in-not-required', 'opted-in']
+
+# `--regions all` expands to the enabled regions.
+ALL_REGIONS = 'all'
+
+
+class RegionMap(object):
+    """Enabled regions of the account and regions of each service, both loaded once per run."""
+
+    def __init__(self, context):
+        self.context    = context
+        self.lock       = threading.Lock()
+        self.enabled    = None
+        self.services   = {}
+        self.known      = None
+
+    def get_regions(self):
+        """:return: (Dict) region name => opt-in status, for every region of the session partition."""
+        with self.lock:
+            if self.enabled is None:
+                regions = self.context.get_from_aws_api(
+                    api_namespace='ec2', api_name='describe_regions', api_response_key='Regions',
+                    api_request_config={'AllRegions': True}, api_cache_ttl=REGIONS_CACHE_TTL, fields=['RegionName', 'OptInStatus']
+                ) or []
+                self.enabled = {region['RegionName']: region.get('OptInStatus', 'opt-in-not-required') for region in regions}
+                self.context.dlog('[region_map]::[regions]::[{}]::[enabled]::[{}]', len(self.enabled), sum(status in ENABLED_STATUSES for status in self.enabled.values()))
+        return self.enabled
+
+    def get_enabled_regions(self, service = None):
+        """
+        :param service: (String) boto3 service name, only the enabled regions the service is deployed to when set.
+        :return: (List) Sorted region names.
+        """
+        regions = self.get_regions()
+        return sorted(
+            region for region, status in regions.items()
+            if status in ENABLED_STATUSES and (service is None or self.has_service(service, region))
+        )
+
+    def get_service_regions(self, service):
+        """:return: (Set) Regions of every partition the bundled endpoint data lists for `service`, empty if unknown."""
+        with self.lock:
+            if service not in self.services:
+                session = self.context.get_aws_session()
+                regions = set()
+                for partition in session.get_available_partitions():
+                    regions.update(session.get_available_regions(service, partition_name=partition))
+                self.services[service] = regions
+            return self.services[service]
+
+    def is_known_region(self, region):
+        if self.known is None:
+            self.known = self.get_service_regions('ec2')
+        return region in self.known
+
+    def has_service(self, service, region):
+        """:return: (Boolean) False only when the endpoint data lists `service` and `region`, but not the pair."""
+        service_regions = self.get_service_regions(service)
+        return not service_regions or region in service_regions or not self.is_known_region(region)
+
+    def is_available(self, service, region = ''):
+        """
+        Whether a call to `service` in `region` can succeed, never makes a call: regions known to be disabled only once
+        the enabled regions were loaded (ex: by `resolve`). The session region is always available.
+        """
+        if not region or region == self.context.obj.get('region'):
+            return True
+        if self.enabled is not None and region in self.enabled and self.enabled[region] not in ENABLED_STATUSES:
+            return False
+        return self.has_service(service, region)
+
+    def resolve(self, regions, service = None):
+        """
+        :param regions: (List) Region names, `all` is expanded to the enabled regions.
+        :param service: (String) boto3 service name, regions it is not deployed to are dropped when set.
+        :return: (List) Region names without duplicates, in the order given.
+        """
+        rv = []
+        for region in regions:
+            for name in self.get_enabled_regions(service) if region == ALL_REGIONS else [region]:
+                if name not in rv and (service is None or self.is_available(service, name)):
+                    rv.append(name)
+        return rv
@@ -0,0 +1,73 @@
+"""
+Serialization of cached API results.
+
+The `typed` format keeps the python types boto3 returns (datetime, bytes, Decimal, ...) so cached results are the
+same as live ones, and is compressed with zstd when `zstandard` is installed, zlib otherwise. Payloads start with a
+header naming their codec, anything else is read as the original `json` format, so entries written by older versions
+stay readable. Only the types in `SAFE_TYPES` can be loaded back, any other object in a payload is refused.
+"""
+import io
+import json
+import pickle
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS         = ['typed', 'json']
+HEADER_ZLIB     = b'TPZ1'
+HEADER_ZSTD     = b'TPS1'
+ZLIB_LEVEL      = 1
+ZSTD_LEVEL      = 3
+
+SAFE_TYPES = {
+    ('datetime', 'datetime'), ('datetime', 'date'), ('datetime', 'time'), ('datetime', 'timedelta'),
+    ('datetime', 'timezone'), ('decimal', 'Decimal'), ('builtins', 'set'), ('builtins', 'frozenset'),
+    ('builtins', 'bytearray'), ('dateutil.tz.tz', 'tzutc'), ('dateutil.tz.tz', 'tzlocal'), ('dateutil.tz.tz', 'tzoffset'),
+}
+
+
+class SafeUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) not in SAFE_TYPES:
+            raise pickle.UnpicklingError('[cache]::[type not allowed]::[{}.{}]'.format(module, name))
+        return pickle.Unpickler.find_class(self, module, name)
+
+
+def get_codec():
+    """:return: (String) Compression used by the typed format, zstd or zlib."""
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def dumps(results, cache_format='typed'):
+    """
+    :param results: Data to cache.
+    :param cache_format: (String) One of FORMATS.
+    :return: (Bytes) Payload.
+    """
+    if cache_format == 'typed':
+        try:
+            raw = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # objects that can not be pickled (streaming bodies, ...) are stored as json strings, as before.
+            return json.dumps(results, default=str).encode('utf-8')
+        if zstandard is not None:
+            return HEADER_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+        return HEADER_ZLIB + zlib.compress(raw, ZLIB_LEVEL)
+
+    return json.dumps(results, default=str).encode('utf-8')
+
+
+def loads(payload):
+    """:return: Data read back from a payload of any format."""
+    payload = bytes(payload)
+    header  = payload[:4]
+    if header == HEADER_ZLIB:
+        return SafeUnpickler(io.BytesIO(zlib.decompress(payload[4:]))).load()
+    if header == HEADER_ZSTD:
+        if zstandard is None:
+            raise Exception('[cache]::[zstandard is not installed]')
+        return SafeUnpickler(io.BytesIO(zstandard.ZstdDecompressor().decompress(payload[4:]))).load()
+    return json.loads(payload)
@@ -0,0 +1,102 @@
+"""
+Sharded scans: one logical listing split into several filtered listings that are paginated at the same time.
+
+Token chained pagination is sequential, a full `describe_snapshots` is one page after the other. Each shard adds
+filters to the request so the shards partition the listing, they are paginated concurrently and merged back, items
+seen in more than one shard are only kept once. A strategy must cover every item, `benchmark sharded-scan` checks a
+strategy against the unsharded listing.
+"""
+import itertools
+import json
+
+# strategy => api => (filter name, values); every item matches exactly one of the values.
+SHARD_STRATEGIES = {
+    'status': {
+        'describe_snapshots':   ('status', ['pending', 'completed', 'error', 'recoverable', 'recovering']),
+        'describe_volumes':     ('status', ['creating', 'available', 'in-use', 'deleting', 'deleted', 'error']),
+        'describe_instances':   ('instance-state-name', ['pending', 'running', 'shutting-down', 'terminated', 'stopping', 'stopped']),
+    },
+    'encrypted': {
+        'describe_snapshots':   ('encrypted', ['true', 'false']),
+        'describe_volumes':     ('encrypted', ['true', 'false']),
+    },
+}
+
+# identifier of the items of each api, used to drop duplicates.
+SHARD_KEYS = {
+    'describe_snapshots':   'SnapshotId',
+    'describe_volumes':     'VolumeId',
+    'describe_instances':   'ReservationId',
+}
+
+# items listed inside the items of an api: api => (list key, identifier). A reservation is split across the shards of
+# the states of its instances, its copies are merged back into one.
+SHARD_NESTED_KEYS = {
+    'describe_instances':   ('Instances', 'InstanceId'),
+}
+
+
+def get_shard_filters(api_name, shards):
+    """
+    :param shards: (String|List) A strategy of SHARD_STRATEGIES, a list of strategies whose shards are crossed, or a
+        list of shards given as lists of filters (ex: `[[{'Name': 'tag-key', 'Values': ['Name']}], ...]`).
+    :return: (List) Filters added by each shard.
+    """
+    if isinstance(shards, str):
+        shards = [shards]
+
+    if all(isinstance(shard, str) for shard in shards):
+        dimensions = []
+        for strategy in shards:
+            if api_name not in SHARD_STRATEGIES.get(strategy, {}):
+                raise Exception('[shards]::[unsupported strategy]::[{}]::[{}]'.format(strategy, api_name))
+            name, values = SHARD_STRATEGIES[strategy][api_name]
+            dimensions.append([{'Name': name, 'Values': [value]} for value in values])
+        return [list(filters) for filters in itertools.product(*dimensions)]
+
+    return [list(filters) for filters in shards]
+
+
+def get_shard_configs(api_name, api_request_config, shards):
+    """
+    :return: (List) Request config of each shard. Shard filters are intersected with filters of the same name already
+        in the request, shards left without any value are dropped.
+    """
+    configs = []
+    for shard_filters in get_shard_filters(api_name, shards):
+        filters = [dict(f) for f in api_request_config.get('Filters', [])]
+        empty   = False
+        for shard_filter in shard_filters:
+            existing = [f for f in filters if f['Name'] == shard_filter['Name']]
+            if existing:
+                existing[0]['Values'] = [value for value in existing[0]['Values'] if value in shard_filter['Values']]
+                empty = empty or not existing[0]['Values']
+            else:
+                filters.append(dict(shard_filter))
+        if not empty:
+            configs.append(dict(api_request_config, Filters=filters))
+    return configs
+
+
+def merge_shards(api_name, shard_results):
+    """
+    :return: (List) Items of every shard in order, without the items already seen in a previous shard. Items holding
+        nested items (reservations) seen in several shards are kept once, with the nested items of every shard.
+    """
+    key                     = SHARD_KEYS.get(api_name)
+    nested_key, nested_id   = SHARD_NESTED_KEYS.get(api_name, (None, None))
+    seen                    = {}
+    rv                      = []
+    for results in shard_results:
+        for item in results or []:
+            item_id = item.get(key) if key and isinstance(item, dict) else json.dumps(item, sort_keys=True, default=str)
+            if item_id not in seen:
+                if nested_key and isinstance(item.get(nested_key), list):
+                    item = dict(item, **{nested_key: list(item[nested_key])})
+                seen[item_id] = item
+                rv.append(item)
+            elif nested_key and isinstance(item.get(nested_key), list):
+                merged  = seen[item_id][nested_key]
+                known   = {nested.get(nested_id) for nested in merged}
+                merged.extend(nested for nested in item[nested_key] if nested.get(nested_id) not in known)
+    return rv
@@ -0,0 +1,159 @@
+"""
+Client side rate limiting shared by every thread of a command.
+
+Every request attempt takes a token from the bucket of its (account, region, service) before it is sent. The refill
+rate follows AIMD: it is halved each time AWS throttles a request and grows by a small step after each request that
+succeeds, so parallel commands settle on the highest rate the account allows. Throttled requests are retried with
+backoff after botocore gives up, up to `max_attempts`.
+"""
+import random
+import threading
+import time
+
+THROTTLE_ERRORS = [
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException', 'TooManyRequestsException',
+    'RequestLimitExceeded', 'ProvisionedThroughputExceededException', 'TransactionInProgressException',
+    'RequestThrottled', 'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException', 'BandwidthLimitExceeded',
+]
+
+MIN_RATE            = 0.5
+DECREASE_FACTOR     = 0.5
+INCREASE_STEP       = 0.1
+MAX_BACKOFF         = 20.0
+
+
+def get_error_code(response):
+    """:return: (String) Error code of a parsed botocore response, None for a successful one."""
+    if not response:
+        return None
+    return response.get('Error', {}).get('Code')
+
+
+class TokenBucket(object):
+    """Token bucket with an AIMD refill rate; `acquire` blocks until a token is available, `aacquire` awaits it."""
+
+    def __init__(self, rate, max_rate):
+        self.lock       = threading.Lock()
+        self.rate       = float(rate)
+        self.max_rate   = float(max_rate)
+        self.tokens     = max(1.0, self.rate)
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self):
+        """:return: (Float) Zero once a token is taken, otherwise seconds to wait before trying again."""
+        with self.lock:
+            now             = time.monotonic()
+            self.tokens     = min(max(1.0, self.rate), self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """:return: (Float) Seconds spent waiting for the token."""
+        waited  = 0.0
+        delay   = self.try_acquire()
+        while delay:
+            time.sleep(delay)
+            waited  += delay
+            delay   = self.try_acquire()
+        return waited
+
+    async def aacquire(self):
+        """Same as `acquire` for aiobotocore clients, the event loop keeps running the other calls while it waits."""
+        import asyncio
+
+        waited  = 0.0
+        delay   = self.try_acquire()
+        while delay:
+            await asyncio.sleep(delay)
+            waited  += delay
+            delay   = self.try_acquire()
+        return waited
+
+    def on_throttle(self):
+        with self.lock:
+            self.rate   = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+            self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+
+
+class RateLimiter(object):
+    """Token buckets and metrics keyed by (account, region, service)."""
+
+    def __init__(self, context, rate=20.0, max_rate=100.0, max_attempts=10):
+        """
+        :param context: (cli.Context)
+        :param rate: (Float) Requests per second each bucket starts at, zero disables the limiter.
+        :param max_rate: (Float) Requests per second a bucket may grow to.
+        :param max_attempts: (Integer) Attempts of a throttled request, including those made by botocore.
+        """
+        self.context        = context
+        self.lock           = threading.Lock()
+        self.buckets        = {}
+        self.metrics        = {}
+        self.configure(rate, max_rate, max_attempts)
+
+    def configure(self, rate=20.0, max_rate=100.0, max_attempts=10):
+        self.rate           = rate
+        self.max_rate       = max(rate, max_rate)
+        self.max_attempts   = max_attempts
+
+    def get_bucket(self, key):
+        with self.lock:
+            if key not in self.buckets:
+                self.buckets[key] = TokenBucket(self.rate, self.max_rate)
+                self.metrics[key] = {'requests': 0, 'throttles': 0, 'retries': 0, 'wait_time': 0.0}
+            return self.buckets[key], self.metrics[key]
+
+    def register(self, client, account, region, service, aio=False):
+        """
+        Rate limits every request sent by `client` with the bucket of (account, region, service).
+        :param aio: (Boolean) `client` is an aiobotocore client, the token is awaited instead of slept for.
+        """
+        if not self.rate:
+            return
+
+        key             = (account, region, service)
+        bucket, metrics = self.get_bucket(key)
+
+        def record_send(waited):
+            with self.lock:
+                metrics['requests']     += 1
+                metrics['wait_time']    += waited
+
+        def before_send(**kwargs):
+            record_send(bucket.acquire())
+
+        async def abefore_send(**kwargs):
+            record_send(await bucket.aacquire())
+
+        def response_received(parsed_response=None, context=None, **kwargs):
+            throttled = get_error_code(parsed_response) in THROTTLE_ERRORS
+            bucket.on_throttle() if throttled else bucket.on_success()
+            with self.lock:
+                if throttled:
+                    metrics['throttles'] += 1
+                if context and context.get('retries', {}).get('attempt', 1) > 1:
+                    metrics['retries'] += 1
+            if throttled:
+                self.context.dlog('[rate_limiter]::[throttled]::[{}]::[rate]::[{:.2f}/s]', '::'.join(key), bucket.rate)
+
+        def needs_retry(response=None, attempts=1, **kwargs):
+            # only used once botocore stops retrying, the first non None delay returned wins.
+            if response is None or get_error_code(response[1]) not in THROTTLE_ERRORS or attempts >= self.max_attempts:
+                return None
+            return min(MAX_BACKOFF, random.uniform(0, 2 ** attempts))
+
+        client.meta.events.register('before-send', abefore_send if aio else before_send)
+        client.meta.events.register('response-received', response_received)
+        client.meta.events.register('needs-retry', needs_retry)
+
+    def report(self):
+        """:return: (List) (account, region, service, metrics, current rate) of every bucket."""
+        with self.lock:
+            return [key + (dict(self.metrics[key]), self.buckets[key].rate) for key in sorted(self.buckets)]
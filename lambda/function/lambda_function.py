@@ -1,16 +1,27 @@
 """
 This is the entry point for lambda interface to call the cli.
 
-
+Events from AWS (EventBridge rules, CloudTrail/SNS/SQS records) are applied to the inventory and cache with
+`inventory ingest`, any other event is a command config.
+Commands get the remaining time of the invocation as their time budget (`--time-budget`), less TIME_BUDGET_MARGIN,
+so a slow AWS call ends the command with partial results instead of a Lambda timeout.
 """
 import logging
 import json
+import os
 import boto3
 import subprocess
 
 logger = logging.getLogger()
 logger.setLevel(logging.ERROR)
 
+# seconds kept to print the results and exit once the time budget is spent.
+TIME_BUDGET_MARGIN = 10
+
+# the deployment package is read only, the cache and the inventory are kept in DATA_DIR (`--data-dir`): the mount path
+# of an EFS file system shared with the cli hosts, or /tmp, lost once the container is recycled, when not set.
+DATA_DIR = os.environ.get('DATA_DIR', '/tmp/ops-cli')
+
 def get_command(path, config):
     logger.debug('[{}]::[begin]'.format('get_command_as_args'))
     command_args = []
@@ -44,13 +55,25 @@ def get_command(path, config):
 
     return command_args
 
-def run_command(path, config):
+def is_aws_event(event):
+    return 'detail-type' in event or 'Records' in event
+
+def get_time_budget(context):
+    """:return: (Integer) Seconds the command may spend on aws calls, zero (no limit) outside of Lambda."""
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return 0
+    return max(1, int(context.get_remaining_time_in_millis() / 1000) - TIME_BUDGET_MARGIN)
+
+def run_command(path, config, stdin=None, time_budget=0):
     try:
         logger.debug('[{}]::[begin]::[{}]'.format('run_command', config))
         command_list    = get_command(path, config)
         command_str     = ' '.join(command_list)
         logger.info('[{}]::[command]::[{}]'.format('run_command', command_str))
-        p = subprocess.run(command_str, stdout=subprocess.PIPE, shell=True)
+        env = dict(os.environ, DATA_DIR=DATA_DIR)
+        if time_budget:
+            env['TIME_BUDGET'] = str(time_budget)
+        p = subprocess.run(command_str, stdout=subprocess.PIPE, shell=True, input=stdin, env=env)
         logger.debug('[{}]::[completed]::[{}]'.format('run_command', p.stdout))
         print(p.stdout.decode('UTF-8'))
     except Exception as e:
@@ -73,7 +96,15 @@ def lambda_handler(event, context):
       ],
       "function_options": {}
     }
+    or an EventBridge/CloudTrail event, passed on stdin to `inventory ingest -`.
     :param context:
     :return:
     """
-    return run_command('/opt/ops-cli.deploy/bin/cli.lambda.py', event)
+    if is_aws_event(event):
+        config = {
+            'command': 'inventory', 'command_options': {}, 'command_arguments': [],
+            'function': 'ingest', 'function_arguments': ['-'], 'function_options': {},
+        }
+        return run_command('/opt/ops-cli.deploy/bin/cli.lambda.py', config, stdin=json.dumps(event).encode('UTF-8'), time_budget=get_time_budget(context))
+
+    return run_command('/opt/ops-cli.deploy/bin/cli.lambda.py', event, time_budget=get_time_budget(context))
@@ -0,0 +1,131 @@
+"""
+Offline tests of the cli internals: AWS is never called, api calls are answered by `fake_aws`.
+
+Run from the repository root: `python -m pytest -q tests`
+"""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qsl
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cli  # noqa: E402
+
+ACCOUNT     = '123456789012'
+CALLER_ID   = {'UserId': 'AIDATEST', 'Account': ACCOUNT, 'Arn': 'arn:aws:iam::{}:user/test'.format(ACCOUNT)}
+
+CALLER_ID_XML = (
+    '<GetCallerIdentityResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><GetCallerIdentityResult>'
+    '<Arn>{Arn}</Arn><UserId>{UserId}</UserId><Account>{Account}</Account></GetCallerIdentityResult>'
+    '<ResponseMetadata><RequestId>1</RequestId></ResponseMetadata></GetCallerIdentityResponse>'
+).format(**CALLER_ID)
+
+
+def error_xml(code, message='error'):
+    """:return: (Tuple) (status, body) of an `aws_endpoint` error response."""
+    return 400, '<Response><Errors><Error><Code>{}</Code><Message>{}</Message></Error></Errors><RequestID>1</RequestID></Response>'.format(code, message)
+
+
+def snapshots_xml(snapshots, next_token=None):
+    """:return: (String) DescribeSnapshots response body of `aws_endpoint` for items of SnapshotId and VolumeId."""
+    items = ''.join('<item><snapshotId>{SnapshotId}</snapshotId><volumeId>{VolumeId}</volumeId></item>'.format(**s) for s in snapshots)
+    token = '<nextToken>{}</nextToken>'.format(next_token) if next_token else ''
+    return ('<DescribeSnapshotsResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/"><requestId>1</requestId>'
+            '<snapshotSet>{}</snapshotSet>{}</DescribeSnapshotsResponse>').format(items, token)
+
+
+@pytest.fixture
+def context(tmp_path, monkeypatch):
+    """A fresh Context, as a command gets it, with its cache in a temporary directory and fake credentials."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    monkeypatch.delenv('AWS_PROFILE', raising=False)
+
+    rv = new_context()
+    yield rv
+    rv.async_engine.shutdown()
+
+
+def new_context():
+    """:return: (cli.Context) A Context as a command gets it, also the next run of a test in the same directory."""
+    rv      = cli.Context()
+    rv.obj  = {'aws_profile': ''}
+    rv.rate_limiter.configure(0)
+    return rv
+
+
+@pytest.fixture
+def fake_aws():
+    """
+    Answers api calls from `responses`: operation name (DescribeSnapshots) => response dict, or callable of the params.
+    `calls` lists the (operation, params) sent; GetCallerIdentity is answered unless given.
+    """
+    class FakeAws(object):
+        def __init__(self):
+            self.responses  = {'GetCallerIdentity': dict(CALLER_ID)}
+            self.calls      = []
+
+        def make_api_call(self, client, operation_name, params):
+            self.calls.append((operation_name, params))
+            if operation_name not in self.responses:
+                raise AssertionError('[fake_aws]::[unexpected call]::[{}]'.format(operation_name))
+            response = self.responses[operation_name]
+            return response(params) if callable(response) else response
+
+        def operations(self):
+            return [operation for operation, _ in self.calls if operation != 'GetCallerIdentity']
+
+    rv = FakeAws()
+    with mock.patch('botocore.client.BaseClient._make_api_call', lambda client, name, params: rv.make_api_call(client, name, params)):
+        yield rv
+
+
+@pytest.fixture
+def aws_endpoint(monkeypatch):
+    """
+    Local http endpoint of every service (AWS_ENDPOINT_URL) for the query protocol apis (ec2, sts, ...), so requests go
+    through the client handlers (time budget, rate limit, metrics) that `fake_aws` skips. `responses` maps an action
+    (DescribeSnapshots) to the xml body of the response, a (status, body) tuple (see `error_xml`), or a callable of the
+    form params returning either; GetCallerIdentity is answered unless given. `requests` lists the form params received.
+    """
+    class AwsEndpoint(object):
+        def __init__(self):
+            self.responses  = {'GetCallerIdentity': CALLER_ID_XML}
+            self.requests   = []
+
+        def actions(self):
+            return [params['Action'] for params in self.requests if params['Action'] != 'GetCallerIdentity']
+
+    rv = AwsEndpoint()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            params = dict(parse_qsl(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')))
+            rv.requests.append(params)
+            response = rv.responses.get(params['Action']) or error_xml('InvalidAction', params['Action'])
+            response = response(params) if callable(response) else response
+            status, body = response if isinstance(response, tuple) else (200, response)
+            body         = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/xml')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    monkeypatch.setenv('AWS_ENDPOINT_URL', 'http://127.0.0.1:{}'.format(server.server_address[1]))
+    yield rv
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import ACCOUNT, snapshots_xml
+from core.deadline import DeadlineExceeded
+
+SNAPSHOTS = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}, {'SnapshotId': 'snap-2', 'VolumeId': 'vol-2'}]
+CALL      = dict(api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots',
+                 api_request_config={'OwnerIds': ['self']}, api_cache_ttl=60)
+
+
+def test_threads_engine_shares_the_cache_of_the_sync_calls(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+    context.async_engine.configure('threads')
+
+    assert context.gather_from_aws_api([CALL, dict(CALL, region='us-west-2')]) == [SNAPSHOTS, SNAPSHOTS]
+    assert context.get_from_aws_api(**CALL) == SNAPSHOTS
+    assert context.last_call()['source'] == 'cache'
+    assert fake_aws.operations() == ['DescribeSnapshots', 'DescribeSnapshots']
+
+
+def test_aiobotocore_calls_are_coalesced_rate_limited_and_recorded(context, aws_endpoint):
+    pytest.importorskip('aiobotocore')
+    aws_endpoint.responses['DescribeSnapshots'] = snapshots_xml(SNAPSHOTS)
+    context.async_engine.configure('aiobotocore')
+    context.rate_limiter.configure(100)
+    context.metrics.configure(show=True)
+
+    assert context.gather_from_aws_api([CALL, CALL]) == [SNAPSHOTS, SNAPSHOTS]
+    assert aws_endpoint.actions() == ['DescribeSnapshots']
+    assert context.memory_cache.stats['coalesced'] == 1
+
+    [(account, region, service, metrics, rate)] = [row for row in context.rate_limiter.report() if row[2] == 'ec2']
+    assert (account, region, metrics['requests']) == (ACCOUNT, 'us-east-1', 1)
+    [api] = [row[3] for row in context.metrics.snapshot() if row[:2] == ('ec2', 'describe_snapshots')]
+    assert api['requests'] == 1 and api['bytes'] > 0 and api['sources']['live'] == 1
+
+    # the sync path reads the entry cached by the async call.
+    assert context.get_from_aws_api(**CALL) == SNAPSHOTS
+    assert context.last_call()['source'] == 'cache'
+
+
+def test_aiobotocore_deadline_is_checked_between_pages(context, aws_endpoint):
+    pytest.importorskip('aiobotocore')
+
+    def pages(params):
+        if 'NextToken' in params:
+            return snapshots_xml(SNAPSHOTS[1:])
+        context.cancel()
+        return snapshots_xml(SNAPSHOTS[:1], next_token='page-2')
+
+    aws_endpoint.responses['DescribeSnapshots'] = pages
+    context.async_engine.configure('aiobotocore')
+
+    [error] = context.gather_from_aws_api([dict(CALL, api_request_config={'PaginationConfig': {'PageSize': 1}})])
+    assert isinstance(error, DeadlineExceeded)
+    assert error.results == SNAPSHOTS[:1]
+    assert aws_endpoint.actions() == ['DescribeSnapshots']
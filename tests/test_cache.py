@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+from core.cache import MISSING, SqliteCacheBackend, get_cache_backend, remove_legacy_files
+
+META = {'namespace': 'ec2', 'region': 'us-east-1', 'api': 'describe_snapshots', 'ttl': 60}
+
+
+@pytest.fixture(params=['sqlite', 'json'])
+def backend(request, context):
+    return get_cache_backend(request.param, context)
+
+
+def age(backend, name_space, seconds):
+    """Makes an entry `seconds` older."""
+    if backend.name == 'json':
+        cache_file = backend.get_cache_file(name_space, 'jsonl' if backend.is_paged(name_space) else 'json')
+        os.utime(cache_file, (time.time() - seconds, time.time() - seconds))
+    else:
+        with backend.transaction() as conn:
+            conn.execute('UPDATE cache_entries SET created_at = created_at - ? WHERE key = ?', (seconds, name_space))
+
+
+def test_put_and_get(backend):
+    assert backend.get('aws.a', 60) is MISSING
+    backend.put('aws.a', [{'SnapshotId': 'snap-1'}], META)
+
+    assert backend.get('aws.a', 60) == [{'SnapshotId': 'snap-1'}]
+    assert backend.last_lookup()['state'] == 'hit'
+    assert backend.get('aws.a', 60, rebuild_cache=True) is MISSING
+    assert backend.usage()['entries'] == 0
+
+
+def test_expired_entries_are_removed(backend):
+    backend.put('aws.a', [1], META)
+    age(backend, 'aws.a', 120)
+
+    assert backend.get('aws.a', 60, stale_ttl=100) == [1]
+    assert backend.last_lookup()['state'] == 'stale'
+    assert backend.get('aws.a', 60) is MISSING
+    assert backend.get('aws.a', 600) is MISSING
+
+
+def test_paged_entries(backend):
+    writer = backend.open_pages('aws.a', META)
+    writer.write([1, 2])
+    assert backend.get('aws.a', 60) is MISSING
+    writer.write([3])
+    writer.commit()
+
+    assert list(backend.iter_pages('aws.a', 60)) == [[1, 2], [3]]
+    assert backend.get('aws.a', 60) == [1, 2, 3]
+
+    writer = backend.open_pages('aws.a', META)
+    writer.write([4])
+    writer.abort()
+    assert backend.get('aws.a', 60) == [1, 2, 3]
+
+
+def test_purge_and_evict(backend):
+    for key in ['aws.a', 'aws.b', 'aws.c', 'log.a']:
+        backend.put(key, [key], META)
+        age(backend, key, 10)
+    backend.get('aws.a', 60)
+    backend.flush()
+
+    # the audit log is the least recently used entry, it is neither evicted nor counted.
+    assert backend.evict(max_entries=2)['evicted'] == 1
+    assert backend.get('aws.a', 60) == ['aws.a']
+    assert backend.get('aws.b', 60) is MISSING
+    assert backend.purge() == 2
+    assert backend.purge('log.') == 1
+    assert backend.usage()['entries'] == 0
+
+
+def test_audit_log_survives_the_eviction_of_a_run(context):
+    context.cache_max_entries = 1
+    context.put_cache('log.rds.delete_db_cluster_snapshot', {'DBClusterSnapshotIdentifier': 'snap-1'}, 'a')
+    for key in ['aws.a', 'aws.b']:
+        context.put_cache(key, [key], cache_meta=META)
+    context.close()
+
+    keys = [entry['key'] for entry in context.get_cache_backend().entries()]
+    assert 'log.rds.delete_db_cluster_snapshot' in keys and len(keys) == 2
+
+
+@pytest.mark.parametrize('upsert', [True, False])
+def test_sqlite_stats_add_up_across_flushes(context, monkeypatch, upsert):
+    backend = SqliteCacheBackend(context)
+    monkeypatch.setattr(backend, 'upsert', upsert)
+    backend.put('aws.a', [1], META)
+    for _ in range(2):
+        backend.get('aws.a', 60, meta=META)
+        backend.get('aws.b', 60, meta=META)
+        backend.flush()
+
+    assert backend.stats()['ec2']['hits'] == 2
+    assert backend.stats()['ec2']['misses'] == 2
+
+
+def test_legacy_files_are_removed(tmp_path):
+    (tmp_path / 'aws.a.json-expired_by-1234').write_text('[]')
+    (tmp_path / 'aws.b.json').write_text('[]')
+
+    assert remove_legacy_files(str(tmp_path)) == (1, 2)
+    assert os.listdir(str(tmp_path)) == ['aws.b.json']
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+ENTRY_POINTS = ['cli.py', 'cli.lambda.py']
+
+
+def run(entry_point, *args, python_args = ()):
+    return subprocess.run([sys.executable] + list(python_args) + [os.path.join(ROOT, entry_point)] + list(args),
+                          cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+@pytest.mark.parametrize('entry_point', ENTRY_POINTS)
+def test_help_lists_commands_without_importing_them(entry_point):
+    process = run(entry_point, '--help', python_args=['-X', 'importtime'])
+    assert process.returncode == 0, process.stderr
+    assert 'example' in process.stdout and 'does stuff for you.' in process.stdout
+
+    imported = [line.rsplit('|', 1)[-1].strip() for line in process.stderr.splitlines() if line.startswith('import time:')]
+    assert not [name for name in imported if name.startswith('command.cmd_')]
+    assert 'boto3' not in imported and 'botocore' not in imported and 'jmespath' not in imported
+
+
+@pytest.mark.parametrize('module', ['command.cmd_ec2', 'command.cmd_ec2_encrypt', 'command.cmd_tag_resources'])
+def test_command_module_imports_aws_lazily(module):
+    process = subprocess.run([sys.executable, '-W', 'ignore', '-c', 'import sys, {0}; print(sorted(set(sys.modules) & {{"boto3", "botocore", "jmespath"}}))'.format(module)],
+                             cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.strip() == '[]'
+
+
+@pytest.mark.parametrize('entry_point', ENTRY_POINTS)
+def test_command_runs(entry_point):
+    process = run(entry_point, 'example', 'hello', 'world')
+    assert process.returncode == 0, process.stderr
+    assert '[hello]::[world]' in process.stderr
+
+
+@pytest.mark.parametrize('entry_point', ENTRY_POINTS)
+def test_unknown_command(entry_point):
+    process = run(entry_point, 'no-such-command')
+    assert process.returncode != 0
+    assert 'No such command' in process.stderr
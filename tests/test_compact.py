@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import new_context
+from core.compact import compact, get_tag, set_tags
+
+INSTANCES = [
+    {'InstanceId': 'i-1', 'Placement': {'AvailabilityZone': 'us-east-1a'}, 'Tags': [{'Key': 'Name', 'Value': 'web'}, {'Key': 'env', 'Value': 'prod'}]},
+    {'InstanceId': 'i-2', 'Placement': {'AvailabilityZone': 'us-east-1a'}, 'Tags': [{'Key': 'env', 'Value': 'prod'}]},
+]
+
+
+def test_tags_become_pairs_and_strings_are_interned():
+    compacted = compact(INSTANCES)
+
+    assert compacted[0]['Tags'] == (('Name', 'web'), ('env', 'prod'))
+    assert compacted[0]['Placement']['AvailabilityZone'] is compacted[1]['Placement']['AvailabilityZone']
+    assert compact(compacted) == compacted
+
+
+def test_tags_are_read_and_updated_in_both_shapes():
+    for tags in [INSTANCES[0]['Tags'], compact(INSTANCES[0])['Tags']]:
+        assert get_tag(tags, 'env') == 'prod' and get_tag(tags, 'owner', '-') == '-'
+        updated = set_tags(tags, tags_set={'env': 'dev'}, tags_removed=['Name'])
+        assert type(updated) is type(tags)
+        assert get_tag(updated, 'env') == 'dev' and get_tag(updated, 'Name') is None
+
+
+@pytest.mark.parametrize('cache_backend', ['sqlite', 'json'])
+def test_compact_results_round_trip_through_the_cache(context, fake_aws, cache_backend):
+    fake_aws.responses['DescribeInstances'] = {'Reservations': [{'Instances': INSTANCES}]}
+    context.cache_backend_name = cache_backend
+    call = dict(api_namespace='ec2', api_name='describe_instances', api_response_key='Reservations', api_request_config={}, api_cache_ttl=60, compact=True)
+
+    live = context.get_from_aws_api(**call)
+    assert live[0]['Instances'][0]['Tags'] == (('Name', 'web'), ('env', 'prod'))
+
+    second                      = new_context()
+    second.cache_backend_name   = cache_backend
+    assert second.get_from_aws_api(**call) == live
+    assert second.last_call()['source'] == 'cache'
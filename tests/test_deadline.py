@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from conftest import snapshots_xml
+from core.deadline import Deadline, DeadlineExceeded
+
+SNAPSHOTS   = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}, {'SnapshotId': 'snap-2', 'VolumeId': 'vol-2'}]
+PAGED       = dict(api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots', api_request_config={'PaginationConfig': {'PageSize': 1}}, api_cache_ttl=60)
+
+
+def test_budgets_nest():
+    command = Deadline(60)
+    call    = Deadline(0.01, command)
+    assert command.remaining() > 59 and call.remaining() <= 0.01
+
+    time.sleep(0.02)
+    assert call.expired() and not command.expired()
+    with pytest.raises(DeadlineExceeded, match='time budget exceeded'):
+        call.check('[test]')
+
+    nested = Deadline(60, command)
+    command.cancel()
+    assert nested.is_cancelled()
+
+
+def test_deadline_raises_between_pages_with_the_items_received(context, aws_endpoint):
+    def pages(params):
+        if 'NextToken' in params:
+            return snapshots_xml(SNAPSHOTS[1:])
+        context.cancel()
+        return snapshots_xml(SNAPSHOTS[:1], next_token='page-2')
+
+    aws_endpoint.responses['DescribeSnapshots'] = pages
+
+    with pytest.raises(DeadlineExceeded) as e:
+        context.get_from_aws_api(**PAGED)
+    assert e.value.results == SNAPSHOTS[:1]
+    assert aws_endpoint.actions() == ['DescribeSnapshots']
+    # nothing partial is cached.
+    assert context.get_cache(context.get_call_namespace('ec2', 'describe_snapshots', 'Snapshots', PAGED['api_request_config']), None, 60) is None
+
+
+def test_fan_out_timeout_cancels_the_regions_not_started(context, aws_endpoint):
+    def slow(params):
+        time.sleep(0.6)
+        return snapshots_xml(SNAPSHOTS)
+
+    aws_endpoint.responses['DescribeSnapshots'] = slow
+    # the client and its paginator, and the models they load, are created before the budget starts.
+    context.get_aws_client('ec2', 'us-east-1').get_paginator('describe_snapshots')
+    outcomes = context.fan_out('ec2', 'describe_snapshots', 'Snapshots', {}, regions=['us-east-1', 'eu-west-1', 'us-west-2'], max_workers=1, timeout=0.3)
+
+    assert [outcome['status'] for outcome in outcomes.values()] == ['ok', 'cancelled', 'cancelled']
+    assert aws_endpoint.actions() == ['DescribeSnapshots']
+
+
+def test_cancelled_command_sends_no_request(context, aws_endpoint):
+    context.deadline.cancel()
+    with pytest.raises(DeadlineExceeded, match='cancelled'):
+        context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {}, timeout=30)
+    assert aws_endpoint.actions() == []
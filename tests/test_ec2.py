@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import ACCOUNT
+from command.cmd_ec2 import describeInstances, get_inventory_filters
+
+INSTANCES = [
+    {'InstanceId': 'i-1', 'State': {'Name': 'running'}, 'VpcId': 'vpc-1', 'Tags': [{'Key': 'Name', 'Value': 'web'}]},
+    {'InstanceId': 'i-2', 'State': {'Name': 'stopped'}, 'VpcId': 'vpc-1', 'Tags': [{'Key': 'Name', 'Value': 'db'}]},
+]
+
+
+@pytest.mark.parametrize('filters, expected', [
+    (None, {}),
+    ([{'Name': 'instance-state-name', 'Values': ['running']}, {'Name': 'tag:Name', 'Values': ['web']}], {'state': 'running', 'tag_key': 'Name', 'tag_value': 'web'}),
+    ([{'Name': 'vpc-id', 'Values': ['vpc-1']}], {'parent_id': 'vpc-1'}),
+    ([{'Name': 'instance-state-name', 'Values': ['running', 'stopped']}], None),
+    ([{'Name': 'tag:Name', 'Values': ['web*']}], None),
+    ([{'Name': 'vpc-id', 'Values': ['vpc-1']}, {'Name': 'subnet-id', 'Values': ['subnet-1']}], None),
+    ([{'Name': 'instance-type', 'Values': ['t3.micro']}], None),
+])
+def test_inventory_filters(filters, expected):
+    assert get_inventory_filters(filters) == expected
+
+
+@pytest.fixture
+def synced(context, fake_aws):
+    context.inventory_max_age = 3600
+    context.get_aws_session()
+    context.get_inventory().sync(ACCOUNT, 'us-east-1', 'instances', INSTANCES)
+    return context
+
+
+def test_instances_are_read_from_the_inventory(synced, fake_aws):
+    instances = describeInstances(synced, 1000, [{'Name': 'tag:Name', 'Values': ['web']}])
+
+    assert [instance['InstanceId'] for instance in instances] == ['i-1']
+    assert fake_aws.operations() == []
+
+
+def test_filters_the_inventory_cannot_answer_call_the_api(synced, fake_aws):
+    fake_aws.responses['DescribeInstances'] = {'Reservations': [{'ReservationId': 'r-1', 'Instances': INSTANCES[:1]}]}
+
+    instances = describeInstances(synced, 1000, [{'Name': 'instance-type', 'Values': ['t3.micro']}])
+    assert [instance['InstanceId'] for instance in instances] == ['i-1']
+    assert fake_aws.operations() == ['DescribeInstances']
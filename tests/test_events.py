@@ -0,0 +1,75 @@
+import glob
+import json
+import os
+
+import pytest
+
+from conftest import ROOT, ACCOUNT
+from core.events import apply_delta, get_deltas
+
+EVENT_FILES = sorted(glob.glob(os.path.join(ROOT, 'data', 'events', '*.json')))
+
+# describe api => (response key, id filter, item of an id).
+DESCRIBE = {
+    'DescribeInstances':    ('Reservations', lambda ids: [{'ReservationId': 'r-1', 'Instances': [{'InstanceId': i, 'State': {'Name': 'running'}} for i in ids]}]),
+    'DescribeVolumes':      ('Volumes', lambda ids: [{'VolumeId': i, 'State': 'available'} for i in ids]),
+    'DescribeSnapshots':    ('Snapshots', lambda ids: [{'SnapshotId': i, 'State': 'completed'} for i in ids]),
+    'DescribeImages':       ('Images', lambda ids: [{'ImageId': i, 'State': 'available'} for i in ids]),
+}
+
+
+@pytest.fixture
+def describe_by_id(fake_aws):
+    """Describe calls by id return one item per id asked for."""
+    def respond(key, items):
+        return lambda params: {key: items([value for f in params.get('Filters', []) for value in f['Values']])}
+
+    for operation, (key, items) in DESCRIBE.items():
+        fake_aws.responses[operation] = respond(key, items)
+    return fake_aws
+
+
+@pytest.mark.parametrize('event_file', EVENT_FILES, ids=os.path.basename)
+def test_replay_sample_events(context, describe_by_id, event_file):
+    """`inventory ingest` with the default --describe, on a fresh context."""
+    with open(event_file) as f:
+        deltas = get_deltas(json.load(f))
+    assert deltas
+
+    for delta in deltas:
+        result = apply_delta(context, delta, describe=True)
+        assert result['described'] == len(delta.refreshed)
+
+
+def test_created_instance_is_described_into_the_inventory(context, describe_by_id):
+    with open(os.path.join(ROOT, 'data', 'events', 'cloudtrail-run-instances.json')) as f:
+        delta = get_deltas(json.load(f))[0]
+
+    apply_delta(context, delta)
+    assert 'DescribeInstances' in describe_by_id.operations()
+    stored = context.get_inventory().get_resources(ACCOUNT, delta.region, 'instances')
+    assert [item['InstanceId'] for item in stored] == sorted(delta.refreshed)
+
+
+def test_other_account_is_not_described(context, describe_by_id):
+    with open(os.path.join(ROOT, 'data', 'events', 'eventbridge-instance-state.json')) as f:
+        delta = get_deltas(json.load(f))[0]
+    delta.account = '210987654321'
+
+    assert apply_delta(context, delta)['described'] == 0
+    assert describe_by_id.operations() == []
+
+
+def test_inventory_and_cache_are_kept_in_the_data_dir(context, describe_by_id, tmp_path):
+    """The Lambda handler points `--data-dir` to a writable store, nothing is written to `data/`."""
+    context.data_dir = str(tmp_path / 'store')
+    with open(os.path.join(ROOT, 'data', 'events', 'cloudtrail-run-instances.json')) as f:
+        delta = get_deltas(json.load(f))[0]
+
+    apply_delta(context, delta)
+    context.get_from_aws_api(api_namespace='ec2', api_name='describe_volumes', api_response_key='Volumes', api_request_config={}, api_cache_ttl=60)
+    context.close()
+
+    assert os.path.isfile(str(tmp_path / 'store' / 'inventory' / 'inventory.sqlite3'))
+    assert os.path.isfile(str(tmp_path / 'store' / 'cache' / 'cache.sqlite3'))
+    assert not os.path.exists(str(tmp_path / 'data'))
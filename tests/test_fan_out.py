@@ -0,0 +1,62 @@
+import botocore.exceptions
+import pytest
+
+from conftest import ACCOUNT
+
+SNAPSHOTS = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}]
+
+
+def endpoint_error(params):
+    raise botocore.exceptions.EndpointConnectionError(endpoint_url='https://rds.ap-east-1.amazonaws.com')
+
+
+def region_not_enabled(params):
+    raise botocore.exceptions.ClientError({'Error': {'Code': 'OptInRequired', 'Message': 'not enabled'}}, 'DescribeSnapshots')
+
+
+def test_fan_out_calls_every_region(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+
+    outcomes = context.fan_out('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, 60, regions=['us-east-1', 'eu-west-1'])
+    assert list(outcomes) == ['us-east-1', 'eu-west-1']
+    assert [outcome['results'] for outcome in outcomes.values()] == [SNAPSHOTS, SNAPSHOTS]
+    assert {outcome['status'] for outcome in outcomes.values()} == {'ok'}
+    assert fake_aws.operations() == ['DescribeSnapshots', 'DescribeSnapshots']
+
+
+@pytest.mark.parametrize('response', [endpoint_error, region_not_enabled])
+def test_unavailable_region_has_empty_results(context, fake_aws, response):
+    fake_aws.responses['DescribeSnapshots'] = response
+
+    outcome = context.fan_out('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, regions=['us-east-1'])['us-east-1']
+    assert (outcome['results'], outcome['error'], outcome['status']) == ([], None, 'ok')
+
+
+def test_other_errors_are_returned(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = lambda params: {}
+
+    outcome = context.fan_out('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, regions=['us-east-1'])['us-east-1']
+    assert outcome['status'] == 'error' and 'response_key' in str(outcome['error'])
+
+
+def test_unavailable_service_only_skips_its_resource_type(context, fake_aws, capsys):
+    """An rds endpoint missing from a region must not drop the ec2 resources discovered in that region."""
+    from command import cmd_tag_resources
+
+    for operation, key in [('DescribeTags', 'Tags'), ('DescribeInstances', 'Reservations'), ('DescribeVolumes', 'Volumes'),
+                           ('DescribeSnapshots', 'Snapshots'), ('DescribeDBClusters', 'DBClusters'),
+                           ('DescribeDBClusterSnapshots', 'DBClusterSnapshots')]:
+        fake_aws.responses[operation] = {key: []}
+    fake_aws.responses['DescribeDBInstances'] = endpoint_error
+    context.get_aws_session()
+    context.regions             = ['us-east-1']
+    context.dry_run             = True
+    context.cache_ttl           = 60
+    context.tag_configuration   = {}
+
+    cmd_tag_resources.tag_inheritable_resources(context)
+    output = capsys.readouterr().out
+    for resource_type in ['Volumes', 'EC2 Snapshots', 'RDS Instance Snapshots', 'RDS Cluster Snapshots']:
+        assert 'Found [0] [{}] to tag in [us-east-1]'.format(resource_type) in output
+    assert 'DescribeDBClusterSnapshots' in fake_aws.operations()
+    assert context.obj['caller_id']['Account'] == ACCOUNT
@@ -0,0 +1,26 @@
+SNAPSHOTS = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1', 'State': 'completed'}, {'SnapshotId': 'snap-2', 'VolumeId': 'vol-2', 'State': 'completed'}]
+
+
+def test_first_call_of_a_fresh_context(context, fake_aws):
+    """The client is lazy, the call must still start the session that owns the cache namespace."""
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+
+    assert context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, 60) == SNAPSHOTS
+    assert context.obj['caller_id']['Account'] == '123456789012'
+    assert context.last_call()['source'] == 'live'
+
+
+def test_cached_call_does_not_call_aws(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+
+    context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, 60)
+    assert context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, 60) == SNAPSHOTS
+    assert fake_aws.operations() == ['DescribeSnapshots']
+    assert context.last_call()['source'] == 'cache'
+
+
+def test_first_iter_of_a_fresh_context(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+
+    items = list(context.iter_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {'PaginationConfig': {'PageSize': 100}}, 60))
+    assert items == SNAPSHOTS
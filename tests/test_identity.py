@@ -0,0 +1,36 @@
+from conftest import ACCOUNT, new_context
+
+
+def sts_calls(fake_aws):
+    return [operation for operation, _ in fake_aws.calls].count('GetCallerIdentity')
+
+
+def test_identity_is_fetched_once_per_credentials(context, fake_aws):
+    context.get_aws_session()
+    assert context.obj['caller_id']['Account'] == ACCOUNT
+
+    # the next run with the same credentials reads the identity, and so the cache namespace, from the cache.
+    second = new_context()
+    second.get_aws_session()
+    assert second.identity_cache.sts_calls == 0
+    assert second.obj['session_namespace'] == context.obj['session_namespace']
+    assert sts_calls(fake_aws) == 1
+
+
+def test_new_credentials_are_identified_again(context, fake_aws, monkeypatch):
+    context.get_aws_session()
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'rotated')
+
+    second = new_context()
+    second.get_aws_session()
+    assert second.identity_cache.sts_calls == 1
+    assert sts_calls(fake_aws) == 2
+
+
+def test_identity_is_shared_by_the_clients_of_a_run(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': []}
+    for region in ['us-east-1', 'eu-west-1', 'ap-southeast-2']:
+        context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {}, region=region)
+    context.get_aws_client('rds')
+
+    assert sts_calls(fake_aws) == 1
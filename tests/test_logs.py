@@ -0,0 +1,52 @@
+import json
+
+from core.logs import Logger, format_message
+
+
+class Response(object):
+    """Stands in for a large response: formatting it must not happen when the level is off."""
+    formatted = 0
+
+    def __format__(self, spec):
+        Response.formatted += 1
+        return '<response>'
+
+
+def test_disabled_levels_never_format_their_arguments(context, capsys):
+    Response.formatted = 0
+    called             = []
+    context.debug      = False
+    context.verbose    = False
+
+    context.dlog('[test]::[{}]', Response())
+    context.vlog(lambda: called.append(True) or 'message')
+    assert Response.formatted == 0 and called == []
+    assert capsys.readouterr().err == ''
+
+    context.debug = True
+    context.dlog('[test]::[{}]', Response())
+    assert Response.formatted == 1
+    assert capsys.readouterr().err.endswith('::[test]::[<response>]\n')
+
+
+def test_callable_and_plain_messages():
+    assert format_message(lambda: 'built', ()) == 'built'
+    assert format_message('{}::[{}]', ('[a]', 1)) == '[a]::[1]'
+    assert format_message({'not': 'a format'}, ()) == "{'not': 'a format'}"
+
+
+def test_json_lines_carry_the_fields(capsys):
+    logger = Logger('run-1', 'json')
+    logger.configure('json', command='ec2')
+    logger.emit('verbose', '[get_from_aws_api]::[{}]', ('completed',), {'region': 'us-east-1', 'duration': 0.25})
+
+    line = json.loads(capsys.readouterr().err)
+    assert (line['uuid'], line['level'], line['command'], line['message']) == ('run-1', 'verbose', 'ec2', '[get_from_aws_api]::[completed]')
+    assert (line['region'], line['duration']) == ('us-east-1', 0.25)
+
+
+def test_text_lines_leave_the_fields_out(capsys):
+    Logger('run-1').emit('info', '[cache]::[{}]', ('hit',), {'region': 'us-east-1'})
+
+    err = capsys.readouterr().err
+    assert err.startswith('[run-1]::[') and err.endswith('::[cache]::[hit]\n') and 'us-east-1' not in err
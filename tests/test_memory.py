@@ -0,0 +1,31 @@
+import json
+
+from core.cache import MISSING
+from core.memory import MemoryCache, estimate_size
+
+VOLUMES = [{'VolumeId': 'vol-{}'.format(i), 'Size': i % 7, 'Tags': [{'Key': 'Name', 'Value': 'volume {}'.format(i)}]} for i in range(1000)]
+
+
+def test_estimate_size_is_close_to_the_json_size():
+    size = len(json.dumps(VOLUMES))
+    assert abs(estimate_size(VOLUMES) - size) < size * .05
+    assert estimate_size({'a': 1}) == len(json.dumps({'a': 1}))
+
+
+def test_entries_are_bounded_by_size(context):
+    cache = MemoryCache(context, max_bytes=estimate_size(VOLUMES) * 2)
+    for name_space in ['aws.a', 'aws.b', 'aws.c']:
+        cache.put(name_space, VOLUMES)
+
+    assert cache.get('aws.a') is MISSING
+    assert cache.get('aws.c', 60)[0] is VOLUMES
+    assert cache.stats['evicted'] == 1
+
+
+def test_known_size_is_used(context):
+    cache = MemoryCache(context, max_bytes=100)
+    cache.put('aws.a', VOLUMES, size=10)
+    assert cache.bytes == 10
+
+    cache.put('aws.b', [], size=1000)
+    assert cache.get('aws.b') is MISSING
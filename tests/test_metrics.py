@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from conftest import snapshots_xml
+from core.metrics import format_bytes, format_seconds
+
+
+@pytest.mark.parametrize('num_bytes, expected', [(0, '0B'), (512, '512B'), (1536, '1.5KB'), (3 * 1024 ** 3, '3.0GB'), (2 * 1024 ** 4, '2.0TB')])
+def test_format_bytes(num_bytes, expected):
+    assert format_bytes(num_bytes) == expected
+
+
+def test_format_seconds():
+    assert format_seconds(0.25) == '250ms'
+    assert format_seconds(12.34) == '12.3s'
+
+
+SNAPSHOTS   = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}, {'SnapshotId': 'snap-2', 'VolumeId': 'vol-2'}]
+LABELS      = 'command="ec2",service="ec2",api="describe_snapshots",region="us-east-1"'
+
+
+@pytest.fixture
+def recorded(context, aws_endpoint):
+    """One live call, through the client hooks, and one cache hit of DescribeSnapshots."""
+    aws_endpoint.responses['DescribeSnapshots'] = snapshots_xml(SNAPSHOTS)
+    context.logger.configure(command='ec2')
+    context.metrics.configure(show=True)
+    for _ in range(2):
+        assert context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, 60) == SNAPSHOTS
+    return context
+
+
+def test_json_metrics_of_a_call(recorded, tmp_path):
+    recorded.metrics.configure(path=str(tmp_path / 'metrics.json'))
+    recorded.metrics.report()
+
+    with open(str(tmp_path / 'metrics.json')) as f:
+        metrics = json.load(f)
+    assert metrics['command'] == 'ec2' and metrics['uuid'] == recorded.uuid
+    [api] = [api for api in metrics['apis'] if api['api'] == 'describe_snapshots']
+    assert (api['service'], api['region'], api['calls'], api['sources']['live'], api['sources']['cache']) == ('ec2', 'us-east-1', 2, 1, 1)
+    assert (api['requests'], api['items'], api['errors'], api['throttles']) == (1, 2, 0, 0)
+    assert api['bytes'] == len(snapshots_xml(SNAPSHOTS))
+    assert api['latency']['count'] == 1 and api['latency']['buckets']['+Inf'] == 1
+
+
+def test_openmetrics_of_a_call(recorded, tmp_path):
+    recorded.metrics.configure(path=str(tmp_path / 'metrics.txt'), metrics_format='openmetrics')
+    recorded.metrics.report()
+
+    with open(str(tmp_path / 'metrics.txt')) as f:
+        lines = f.read().splitlines()
+    assert 'ops_cli_aws_calls_total{{{},source="live"}} 1'.format(LABELS) in lines
+    assert 'ops_cli_aws_calls_total{{{},source="cache"}} 1'.format(LABELS) in lines
+    assert 'ops_cli_aws_requests_total{{{}}} 1'.format(LABELS) in lines
+    assert 'ops_cli_aws_items_total{{{}}} 2'.format(LABELS) in lines
+    assert 'ops_cli_aws_response_bytes_total{{{}}} {}'.format(LABELS, len(snapshots_xml(SNAPSHOTS))) in lines
+    assert 'ops_cli_aws_request_latency_seconds_bucket{{{},le="+Inf"}} 1'.format(LABELS) in lines
+    assert 'ops_cli_aws_request_latency_seconds_count{{{}}} 1'.format(LABELS) in lines
+    assert lines[-1] == '# EOF'
+
+
+def test_nothing_is_recorded_when_disabled(context, aws_endpoint):
+    aws_endpoint.responses['DescribeSnapshots'] = snapshots_xml(SNAPSHOTS)
+    context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {'OwnerIds': ['self']}, 60)
+    assert context.metrics.snapshot() == []
@@ -0,0 +1,41 @@
+import botocore.exceptions
+
+from conftest import new_context
+
+CALL = dict(api_namespace='ec2', api_name='describe_snapshot_attribute', api_response_key='CreateVolumePermissions',
+            api_request_config={'SnapshotId': 'snap-1', 'Attribute': 'createVolumePermission'}, api_cache_ttl=60)
+
+
+def not_found(params):
+    raise botocore.exceptions.ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'DescribeSnapshotAttribute')
+
+
+def test_not_found_is_cached_for_the_negative_ttl(context, fake_aws):
+    fake_aws.responses['DescribeSnapshotAttribute'] = not_found
+
+    assert context.get_from_aws_api(negative_ttl=300, **CALL) is None
+    assert context.last_call()['source'] == 'live'
+
+    second = new_context()
+    assert second.get_from_aws_api(negative_ttl=300, **CALL) is None
+    assert second.last_call()['source'] == 'missing'
+    assert fake_aws.operations() == ['DescribeSnapshotAttribute']
+
+
+def test_not_found_is_not_cached_without_negative_ttl(context, fake_aws):
+    fake_aws.responses['DescribeSnapshotAttribute'] = not_found
+
+    assert context.get_from_aws_api(**CALL) is None
+    assert new_context().get_from_aws_api(**CALL) is None
+    assert fake_aws.operations() == ['DescribeSnapshotAttribute', 'DescribeSnapshotAttribute']
+
+
+def test_invalidate_missing_calls_aws_again(context, fake_aws):
+    fake_aws.responses['DescribeSnapshotAttribute'] = not_found
+    context.get_from_aws_api(negative_ttl=300, **CALL)
+    fake_aws.responses['DescribeSnapshotAttribute'] = {'CreateVolumePermissions': [{'Group': 'all'}]}
+
+    second = new_context()
+    second.invalidate_missing(**{key: value for key, value in CALL.items() if key != 'api_cache_ttl'})
+    assert second.get_from_aws_api(negative_ttl=300, **CALL) == [{'Group': 'all'}]
+    assert second.last_call()['source'] == 'live'
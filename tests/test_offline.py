@@ -0,0 +1,45 @@
+import pytest
+
+from cli import OfflineError
+from conftest import ACCOUNT, new_context
+
+SNAPSHOTS   = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}]
+CALL        = dict(api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots', api_request_config={'OwnerIds': ['self']}, api_cache_ttl=60)
+
+
+@pytest.fixture
+def offline(context, fake_aws, monkeypatch):
+    """A run without credentials after an online run cached DescribeSnapshots; aws must not be called."""
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+    context.get_from_aws_api(**CALL)
+    with context.get_cache_backend().transaction() as conn:
+        conn.execute('UPDATE cache_entries SET created_at = created_at - 86400')
+
+    monkeypatch.delenv('AWS_ACCESS_KEY_ID')
+    monkeypatch.delenv('AWS_SECRET_ACCESS_KEY')
+    fake_aws.responses.clear()
+    rv          = new_context()
+    rv.offline  = True
+    return rv
+
+
+def test_cached_call_is_served_whatever_its_age(offline):
+    assert offline.get_from_aws_api(**CALL) == SNAPSHOTS
+    assert offline.last_call()['source'] == 'cache'
+    assert offline.obj['caller_id']['Account'] == ACCOUNT
+
+
+def test_call_never_cached_raises(offline):
+    with pytest.raises(OfflineError, match='not cached'):
+        offline.get_from_aws_api(**dict(CALL, region='eu-west-1'))
+
+
+def test_aws_clients_are_refused(offline):
+    with pytest.raises(OfflineError, match='aws client requested'):
+        offline.get_aws_client('ec2')
+
+
+def test_profile_never_used_online_raises(context):
+    context.offline = True
+    with pytest.raises(OfflineError, match='no identity stored'):
+        context.get_from_aws_api(**CALL)
@@ -0,0 +1,46 @@
+import threading
+
+from conftest import new_context
+from core.pool import LazyClient, create_session
+
+SNAPSHOTS = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}]
+
+
+def test_clients_are_shared_across_threads(context, fake_aws):
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(context.get_aws_client('ec2'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    # the session region and no region share a client.
+    assert context.get_aws_client('ec2', 'us-east-1') is clients[0]
+    assert context.get_aws_client('ec2', 'eu-west-1') is not clients[0]
+    assert [key[1:3] for key in context.client_pool.utilization()] == [('ec2', 'eu-west-1'), ('ec2', 'us-east-1')]
+
+
+def test_clients_use_the_pool_config(context, fake_aws):
+    context.client_pool.configure(max_pool_connections=32, read_timeout=5, retry_mode='standard', max_attempts=3)
+    config = context.get_aws_client('ec2').meta.config
+
+    assert (config.max_pool_connections, config.read_timeout) == (32, 5)
+    assert config.retries['mode'] == 'standard'
+
+
+def test_cache_hit_never_creates_a_client(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': SNAPSHOTS}
+    context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {}, 60)
+
+    second = new_context()
+    assert isinstance(second.get_aws_client('ec2', lazy=True), LazyClient)
+    assert second.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {}, 60) == SNAPSHOTS
+    assert second.client_pool.utilization() == []
+
+
+def test_sessions_share_the_loader(context):
+    loaders = [create_session(region_name=region)._session.get_component('data_loader') for region in ['us-east-1', 'eu-west-1']]
+
+    assert loaders[0] is loaders[1]
+    assert len(loaders[0].search_paths) == len(set(loaders[0].search_paths))
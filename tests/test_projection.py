@@ -0,0 +1,38 @@
+from conftest import new_context
+from core.projection import compile_projection, project
+
+VOLUMES = [
+    {'VolumeId': 'vol-1', 'Size': 8, 'Attachments': [{'InstanceId': 'i-1'}], 'Tags': [{'Key': 'Name', 'Value': 'web'}]},
+    {'VolumeId': 'vol-2', 'Size': 16, 'Attachments': []},
+]
+
+
+def test_listed_fields_are_kept():
+    assert project(compile_projection(['VolumeId', 'Tags']), VOLUMES) == [
+        {'VolumeId': 'vol-1', 'Tags': [{'Key': 'Name', 'Value': 'web'}]}, {'VolumeId': 'vol-2'}
+    ]
+
+
+def test_jmespath_expression_is_applied_to_each_item():
+    projection = compile_projection('{id: VolumeId, instance: Attachments[0].InstanceId}')
+    assert project(projection, VOLUMES) == [{'id': 'vol-1', 'instance': 'i-1'}, {'id': 'vol-2', 'instance': None}]
+
+
+def test_no_fields_is_no_projection():
+    assert compile_projection(None) is None
+    assert project(None, VOLUMES) is VOLUMES
+
+
+def test_only_projected_items_are_cached(context, fake_aws):
+    fake_aws.responses['DescribeVolumes'] = {'Volumes': VOLUMES}
+    call = dict(api_namespace='ec2', api_name='describe_volumes', api_response_key='Volumes', api_request_config={'PaginationConfig': {'PageSize': 100}}, api_cache_ttl=60)
+
+    assert context.get_from_aws_api(fields=['VolumeId'], **call) == [{'VolumeId': 'vol-1'}, {'VolumeId': 'vol-2'}]
+    second = new_context()
+    assert second.get_from_aws_api(fields=['VolumeId'], **call) == [{'VolumeId': 'vol-1'}, {'VolumeId': 'vol-2'}]
+    assert second.last_call()['source'] == 'cache'
+
+    # other fields are another cache entry.
+    assert second.get_from_aws_api(fields=['VolumeId', 'Size'], **call) == [{'VolumeId': 'vol-1', 'Size': 8}, {'VolumeId': 'vol-2', 'Size': 16}]
+    assert second.last_call()['source'] == 'live'
+    assert fake_aws.operations() == ['DescribeVolumes', 'DescribeVolumes']
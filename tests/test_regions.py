@@ -0,0 +1,36 @@
+REGIONS = [
+    {'RegionName': 'us-east-1', 'OptInStatus': 'opt-in-not-required'},
+    {'RegionName': 'eu-west-1', 'OptInStatus': 'opt-in-not-required'},
+    {'RegionName': 'af-south-1', 'OptInStatus': 'not-opted-in'},
+    {'RegionName': 'ap-east-1', 'OptInStatus': 'opted-in'},
+]
+
+
+def test_all_is_the_enabled_regions(context, fake_aws):
+    fake_aws.responses['DescribeRegions'] = {'Regions': REGIONS}
+
+    assert context.region_map.resolve(['us-east-1', 'all']) == ['us-east-1', 'ap-east-1', 'eu-west-1']
+    assert context.region_map.resolve(['all']) == context.region_map.get_enabled_regions()
+    assert fake_aws.operations() == ['DescribeRegions']
+
+
+def test_regions_without_the_service_are_dropped(context, fake_aws):
+    fake_aws.responses['DescribeRegions'] = {'Regions': REGIONS}
+
+    # the bundled endpoint data only lists us-west-2 for sagemaker-geospatial.
+    assert context.region_map.resolve(['us-west-2', 'eu-west-1'], service='sagemaker-geospatial') == ['us-west-2']
+    assert context.region_map.resolve(['eu-west-1', 'af-south-1'], service='ec2') == ['eu-west-1', 'af-south-1']
+
+
+def test_call_to_a_disabled_region_is_skipped(context, fake_aws):
+    fake_aws.responses['DescribeRegions'] = {'Regions': REGIONS}
+    context.region_map.resolve(['all'])
+
+    assert context.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {}, region='af-south-1') is None
+    assert fake_aws.operations() == ['DescribeRegions']
+
+
+def test_unknown_regions_and_global_services_are_assumed_available(context, fake_aws):
+    assert context.region_map.is_available('ec2', 'xx-nowhere-9')
+    assert context.region_map.is_available('iam', 'eu-west-1')
+    assert fake_aws.operations() == []
@@ -0,0 +1,40 @@
+import json
+import pickle
+import threading
+import zlib
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from dateutil.tz import tzutc
+
+from core import serialize
+
+RESULTS = [{'SnapshotId': 'snap-1', 'StartTime': datetime(2020, 1, 2, 3, 4, 5, tzinfo=tzutc()), 'Size': Decimal('8.5'),
+            'Body': b'\x00\x01', 'Ids': {'vol-1'}, 'Tags': [{'Key': 'Name', 'Value': 'web'}]}]
+
+
+def test_typed_round_trip_keeps_types():
+    payload = serialize.dumps(RESULTS)
+
+    assert payload[:4] in (serialize.HEADER_ZLIB, serialize.HEADER_ZSTD)
+    assert serialize.loads(payload) == RESULTS
+
+
+def test_json_payloads_stay_readable():
+    payload = serialize.dumps(RESULTS, 'json')
+
+    assert json.loads(payload.decode('utf-8'))[0]['StartTime'] == '2020-01-02 03:04:05+00:00'
+    assert serialize.loads(payload)[0]['StartTime'] == '2020-01-02 03:04:05+00:00'
+
+
+def test_unpicklable_results_are_stored_as_json():
+    results = {'Lock': threading.Lock()}
+    assert isinstance(serialize.loads(serialize.dumps(results))['Lock'], str)
+
+
+def test_unsafe_types_are_refused():
+    payload = serialize.HEADER_ZLIB + zlib.compress(pickle.dumps(serialize.SafeUnpickler))
+
+    with pytest.raises(pickle.UnpicklingError):
+        serialize.loads(payload)
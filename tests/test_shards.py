@@ -0,0 +1,45 @@
+from core.shards import get_shard_configs, merge_shards
+
+
+def instance(instance_id, state):
+    return {'InstanceId': instance_id, 'State': {'Name': state}}
+
+
+def test_reservation_split_across_state_shards_is_merged():
+    running = [{'ReservationId': 'r-1', 'Instances': [instance('i-1', 'running')]}]
+    stopped = [{'ReservationId': 'r-1', 'Instances': [instance('i-2', 'stopped')]}, {'ReservationId': 'r-2', 'Instances': [instance('i-3', 'stopped')]}]
+
+    merged = merge_shards('describe_instances', [running, stopped])
+    assert [r['ReservationId'] for r in merged] == ['r-1', 'r-2']
+    assert [i['InstanceId'] for i in merged[0]['Instances']] == ['i-1', 'i-2']
+    assert [i['InstanceId'] for i in running[0]['Instances']] == ['i-1']
+
+
+def test_instance_seen_in_two_shards_is_kept_once():
+    shard = [{'ReservationId': 'r-1', 'Instances': [instance('i-1', 'running')]}]
+
+    merged = merge_shards('describe_instances', [shard, shard])
+    assert [i['InstanceId'] for i in merged[0]['Instances']] == ['i-1']
+
+
+def test_duplicate_items_are_dropped():
+    merged = merge_shards('describe_snapshots', [[{'SnapshotId': 'snap-1'}, {'SnapshotId': 'snap-2'}], None, [{'SnapshotId': 'snap-1'}]])
+    assert merged == [{'SnapshotId': 'snap-1'}, {'SnapshotId': 'snap-2'}]
+
+
+def test_shard_filters_are_intersected_with_the_request_filters():
+    request = {'Filters': [{'Name': 'instance-state-name', 'Values': ['running', 'stopped']}]}
+
+    configs = get_shard_configs('describe_instances', request, 'status')
+    assert [c['Filters'] for c in configs] == [[{'Name': 'instance-state-name', 'Values': ['running']}], [{'Name': 'instance-state-name', 'Values': ['stopped']}]]
+    assert request['Filters'][0]['Values'] == ['running', 'stopped']
+
+
+def test_sharded_call_returns_every_instance_of_a_reservation(context, fake_aws):
+    def describe_instances(params):
+        states = [value for f in params['Filters'] for value in f['Values']]
+        return {'Reservations': [{'ReservationId': 'r-1', 'Instances': [instance('i-' + state, state) for state in states if state in ('running', 'stopped')]}]}
+    fake_aws.responses['DescribeInstances'] = describe_instances
+
+    reservations = context.get_from_aws_api('ec2', 'describe_instances', 'Reservations', {}, shards='status')
+    assert [i['InstanceId'] for r in reservations for i in r['Instances']] == ['i-running', 'i-stopped']
@@ -0,0 +1,52 @@
+from conftest import new_context
+
+OLD     = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}]
+NEW     = OLD + [{'SnapshotId': 'snap-2', 'VolumeId': 'vol-2'}]
+CALL    = dict(api_namespace='ec2', api_name='describe_snapshots', api_response_key='Snapshots', api_request_config={}, api_cache_ttl=60)
+
+
+def expire(context, seconds):
+    """Makes every cached entry `seconds` older."""
+    with context.get_cache_backend().transaction() as conn:
+        conn.execute('UPDATE cache_entries SET created_at = created_at - ?', (seconds,))
+
+
+def test_expired_entry_is_served_while_it_is_refreshed(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': OLD}
+    context.get_from_aws_api(stale_ttl=3600, **CALL)
+    expire(context, 120)
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': NEW}
+
+    second = new_context()
+    assert second.get_from_aws_api(stale_ttl=3600, **CALL) == OLD
+    assert second.last_call()['source'] == 'stale' and second.last_call()['age'] >= 120
+    # close waits for the refresh to be saved.
+    second.close()
+
+    third = new_context()
+    assert third.get_from_aws_api(stale_ttl=3600, **CALL) == NEW
+    assert third.last_call()['source'] == 'cache'
+    assert fake_aws.operations() == ['DescribeSnapshots', 'DescribeSnapshots']
+
+
+def test_expired_entry_past_the_stale_ttl_is_called_again(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': OLD}
+    context.get_from_aws_api(stale_ttl=60, **CALL)
+    expire(context, 180)
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': NEW}
+
+    second = new_context()
+    assert second.get_from_aws_api(stale_ttl=60, **CALL) == NEW
+    assert second.last_call()['source'] == 'live'
+
+
+def test_global_stale_ttl_is_the_default(context, fake_aws):
+    fake_aws.responses['DescribeSnapshots'] = {'Snapshots': OLD}
+    context.get_from_aws_api(**CALL)
+    expire(context, 120)
+
+    second              = new_context()
+    second.stale_ttl    = 3600
+    assert second.get_from_aws_api(**CALL) == OLD
+    assert second.last_call()['source'] == 'stale'
+    second.close()
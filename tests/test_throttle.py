@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import ACCOUNT, error_xml, snapshots_xml
+from core import throttle
+from core.throttle import TokenBucket
+
+SNAPSHOTS = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1'}]
+
+
+def test_bucket_waits_for_a_token(monkeypatch):
+    slept = []
+    monkeypatch.setattr(throttle.time, 'sleep', lambda seconds: slept.append(seconds) or clock.append(clock[-1] + seconds))
+    clock = [1000.0]
+    monkeypatch.setattr(throttle.time, 'monotonic', lambda: clock[-1])
+
+    bucket = TokenBucket(rate=2, max_rate=10)
+    assert bucket.acquire() == 0.0 and bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert slept == [pytest.approx(0.5)]
+
+
+def test_rate_is_halved_on_throttle_and_grows_back():
+    bucket = TokenBucket(rate=20, max_rate=21)
+    bucket.on_throttle()
+    assert bucket.rate == 10
+    for _ in range(200):
+        bucket.on_success()
+    assert bucket.rate == 21
+
+
+@pytest.fixture
+def limited(context, aws_endpoint, monkeypatch):
+    """botocore does not retry, throttled requests are retried by the rate limiter right away."""
+    monkeypatch.setattr(throttle.random, 'uniform', lambda low, high: 0)
+    context.client_pool.config_options['retries'] = {'mode': 'standard', 'total_max_attempts': 1}
+    context.rate_limiter.configure(rate=20, max_rate=100, max_attempts=3)
+    return context
+
+
+def test_throttled_request_is_retried_at_a_lower_rate(limited, aws_endpoint):
+    responses = [error_xml('RequestLimitExceeded'), snapshots_xml(SNAPSHOTS)]
+    aws_endpoint.responses['DescribeSnapshots'] = lambda params: responses.pop(0)
+
+    assert limited.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {}) == SNAPSHOTS
+    [(account, region, service, metrics, rate)] = [row for row in limited.rate_limiter.report() if row[2] == 'ec2']
+    assert (account, region) == (ACCOUNT, 'us-east-1')
+    assert (metrics['requests'], metrics['throttles'], metrics['retries']) == (2, 1, 1)
+    assert rate == pytest.approx(20 * throttle.DECREASE_FACTOR + throttle.INCREASE_STEP)
+
+
+def test_throttled_request_gives_up_after_max_attempts(limited, aws_endpoint):
+    import botocore.exceptions
+
+    aws_endpoint.responses['DescribeSnapshots'] = error_xml('RequestLimitExceeded')
+
+    with pytest.raises(botocore.exceptions.ClientError):
+        limited.get_from_aws_api('ec2', 'describe_snapshots', 'Snapshots', {})
+    assert aws_endpoint.actions() == ['DescribeSnapshots'] * 3
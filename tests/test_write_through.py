@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import ACCOUNT
+from core.cache import MISSING
+from core.events import invalidate_cache
+
+VOLUMES     = [{'VolumeId': 'vol-1', 'Tags': [{'Key': 'Name', 'Value': 'old'}]}, {'VolumeId': 'vol-2', 'Tags': []}]
+SNAPSHOTS   = [{'SnapshotId': 'snap-1', 'VolumeId': 'vol-1', 'Tags': []}]
+
+
+@pytest.fixture(params=['sqlite', 'json'])
+def cached(request, context, fake_aws):
+    """Volumes and snapshots listings cached in each backend."""
+    context.cache_backend_name                  = request.param
+    fake_aws.responses['DescribeVolumes']       = {'Volumes': VOLUMES}
+    fake_aws.responses['DescribeSnapshots']     = {'Snapshots': SNAPSHOTS}
+    for api_name, api_response_key in [('describe_volumes', 'Volumes'), ('describe_snapshots', 'Snapshots')]:
+        context.get_from_aws_api('ec2', api_name, api_response_key, {}, 3600)
+    return context
+
+
+def get_cached(context, api_name, api_response_key):
+    return context.get_cache_backend().get(context.get_call_namespace('ec2', api_name, api_response_key, {}), 3600)
+
+
+def test_tags_are_written_through(cached):
+    result = cached.write_through(tags_set={'arn:aws:ec2:us-east-1:{}:volume/vol-1'.format(ACCOUNT): {'Name': 'new'}})
+
+    assert result['patched'] == 1
+    assert get_cached(cached, 'describe_volumes', 'Volumes')[0]['Tags'] == [{'Key': 'Name', 'Value': 'new'}]
+    assert cached.get_from_aws_api('ec2', 'describe_volumes', 'Volumes', {}, 3600)[0]['Tags'] == [{'Key': 'Name', 'Value': 'new'}]
+    assert get_cached(cached, 'describe_snapshots', 'Snapshots') == SNAPSHOTS
+
+
+def test_deleted_resource_is_written_through(cached):
+    cached.write_through(deleted=['vol-2'])
+
+    assert [volume['VolumeId'] for volume in get_cached(cached, 'describe_volumes', 'Volumes')] == ['vol-1']
+
+
+def test_invalidate_is_scoped_to_the_api(cached):
+    assert invalidate_cache(cached, 'ec2', 'us-east-1', ['describe_volumes']) == 1
+
+    assert get_cached(cached, 'describe_volumes', 'Volumes') is MISSING
+    assert get_cached(cached, 'describe_snapshots', 'Snapshots') == SNAPSHOTS
+
+
+def test_failed_resources_are_not_written_through(cached, fake_aws, monkeypatch):
+    from command import cmd_tag_resources
+    monkeypatch.setattr(cmd_tag_resources, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(cmd_tag_resources.click, 'confirm', lambda text: False)
+    cached.dry_run = False
+    failed = 'arn:aws:ec2:us-east-1:{}:volume/vol-2'.format(ACCOUNT)
+    fake_aws.responses['TagResources'] = lambda params: {'FailedResourcesMap': {failed: {'ErrorCode': 'InternalServiceException'}} if failed in params['ResourceARNList'] else {}}
+
+    cmd_tag_resources.tag_resources(cached, {'vol-1': {'Name': 'new'}, 'vol-2': {'Name': 'new'}}, 'us-east-1')
+
+    assert [volume['Tags'] for volume in get_cached(cached, 'describe_volumes', 'Volumes')] == [[{'Key': 'Name', 'Value': 'new'}], []]
+
+
+@pytest.mark.parametrize('args, cache_ttl', [([], 3600), (['--cache-ttl', '60'], 60)])
+def test_tag_resources_cache_ttl_is_an_integer(context, args, cache_ttl):
+    """The listings are kept current by write_through, so they are cached for an hour by default."""
+    from command import cmd_tag_resources
+
+    ctx = cmd_tag_resources.subcmd.make_context('tag_resources', args + ['interactive'], obj=context)
+    assert ctx.params['cache_ttl'] == cache_ttl